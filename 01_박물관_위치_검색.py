@@ -1,50 +1,47 @@
 import streamlit as st
-import requests
-import folium
-from streamlit_folium import st_folium
-from typing import Optional, Tuple, List, Dict
-
-# --- 페이지 설정 (✅ 사이드바를 항상 펼쳐진 상태로 설정) ---
-st.set_page_config(
-    page_title="박물관 지도 & 큐레이터",
-    page_icon="🏛️",
-    layout="wide",
-    initial_sidebar_state="expanded"  # <-- 이 옵션을 추가합니다.
-)
-
-# --- ✅ 자동 생성된 상단 메뉴를 숨기는 CSS 코드 ---
-st.markdown("""
-<style>
-    [data-testid="stSidebarNav"] {
-        display: none;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-
-# ─────────────────────────────────────────
-# 사이드바: 페이지 링크(멀티페이지 내비게이션)
-# ─────────────────────────────────────────
-st.sidebar.title("📚 메뉴")
-st.sidebar.page_link("01_박물관_위치_검색.py", label="1. 박물관 위치 검색", icon="🏛️")
-st.sidebar.page_link("pages/02_큐레이터_챗봇.py", label="2. 큐레이터 챗봇", icon="🗣️")
-st.sidebar.page_link("pages/03_유물_돋보기.py", label="3. 유물 돋보기", icon="🖼️")
-st.sidebar.page_link("pages/04_QnA_for_foreigners.py", label="4. Q&A for Foreigners", icon="❓")
-st.sidebar.markdown("---")
+import streamlit.components.v1 as components
+
+from utils import metrics
+from utils.app_shell import secret, setup_page
+from utils.cache import all_stats
+from utils.bulk_search import (MAX_ADDRESSES, aggregate, bulk_search, dedupe_rows, museums_csv,
+                                parse_address_csv, parse_address_text)
+from utils.kakao import geocode_address_kakao, search_museums_around
+from utils.museum_map import (MAP_HEIGHT, build_bulk_map, build_museum_map, bulk_map_html, museum_map_html,
+                              museums_key)
+from utils.ratelimit import all_flight_stats, all_limiter_stats
+from utils.session_store import drop_blob, get_blob, put_blob
+
+# --- 페이지 설정 + 사이드바 메뉴 (✅ 사이드바를 항상 펼쳐진 상태로) ---
+setup_page("박물관 지도 & 큐레이터", "🏛️", metrics_page="01_map")
 
 # ─────────────────────────────────────────
 # API 키 로드 및 설정
-# (이하 코드는 기존과 동일하게 유지됩니다)
 # ─────────────────────────────────────────
-try:
-    KAKAO_KEY = st.secrets["KAKAO_KEY"]
+KAKAO_KEY = secret("KAKAO_KEY")
+if KAKAO_KEY:
     st.sidebar.success("✅ Kakao API 키 로드 성공!")
-except (KeyError, FileNotFoundError):
-    KAKAO_KEY = ""
+else:
     st.sidebar.error("⚠️ `secrets.toml`에 Kakao API 키를 설정해주세요.")
 
 st.sidebar.title("⚙️ 검색 설정")
 RADIUS_M = st.sidebar.slider("검색 반경 (미터)", 1000, 20000, 5000, 500)
+# 정적 모드: 캐시된 지도 HTML을 그대로 표시 (지도 조작이 재실행을 일으키지 않음)
+MAP_MODE = st.sidebar.radio("지도 표시 방식", ["빠른 정적 지도", "인터랙티브 지도"], index=0)
+MAP_RETURN_EVENTS = False
+if MAP_MODE == "인터랙티브 지도":
+    MAP_RETURN_EVENTS = st.sidebar.checkbox("지도 클릭/이동 정보 받기", value=False,
+                                            help="켜면 지도를 움직일 때마다 페이지가 다시 실행됩니다.")
+
+with st.sidebar.expander("🗄️ 캐시 현황"):
+    for name, stat in all_stats().items():
+        st.caption(f"{name}: 적중 {stat['hits'] + stat['disk_hits']} / 미스 {stat['misses']} "
+                   f"(적중률 {stat['hit_rate']:.0%}, 메모리 {stat['size']}건)")
+    for name, stat in all_limiter_stats().items():
+        st.caption(f"⏱️ {name}: 대기열 {stat['queue_depth']} · 평균 대기 {stat['avg_wait_ms']:.0f}ms "
+                   f"(p95 {stat['p95_wait_ms']:.0f}ms) · 거절 {stat['rejected']}")
+    for name, stat in all_flight_stats().items():
+        st.caption(f"🔗 {name}: 합쳐진 요청 {stat['shared']} / 실제 호출 {stat['calls']}")
 
 # ─────────────────────────────────────────
 # 세션 상태 초기화
@@ -54,97 +51,133 @@ if "search" not in st.session_state:
 
 st.title("🏛️ 내 위치 기반 박물관 검색 (지도 표시)")
 
-# (이하 Kakao API 유틸, 입력, 출력 코드 등은 모두 기존과 동일합니다)
-# ... (기존 코드 생략) ...
-def geocode_address_kakao(address: str, kakao_key: str) -> Tuple[Optional[Tuple[float, float]], str]:
-    if not kakao_key:
-        return None, "⚠️ Kakao API 키가 설정되지 않았습니다."
-    if not address:
-        return None, "⚠️ 주소를 입력해 주세요."
-    url = "https://dapi.kakao.com/v2/local/search/address.json"
-    headers = {"Authorization": f"KakaoAK {kakao_key}"}
-    try:
-        r = requests.get(url, headers=headers, params={"query": address}, timeout=20)
-        r.raise_for_status()
-        docs = r.json().get("documents", [])
-        if not docs:
-            return None, "⚠️ 주소를 찾지 못했습니다."
-        lat, lon = float(docs[0]["y"]), float(docs[0]["x"])
-        return (lat, lon), "✅ 주소를 좌표로 변환했습니다."
-    except Exception as e:
-        return None, f"❌ 지오코딩 실패: {e}"
-
-def search_museums_around(lat: float, lon: float, kakao_key: str, radius_m: int = 5000) -> Tuple[List[Dict], str]:
-    if not kakao_key:
-        return [], "⚠️ Kakao API 키가 비어 있습니다."
-    url = "https://dapi.kakao.com/v2/local/search/keyword.json"
-    headers = {"Authorization": f"KakaoAK {kakao_key}"}
-    museums = []
-    try:
-        params = {"query": "박물관", "x": lon, "y": lat, "radius": radius_m, "sort": "distance", "size": 15}
-        r = requests.get(url, headers=headers, params=params, timeout=20)
-        r.raise_for_status()
-        docs = r.json().get("documents", [])
-        for d in docs:
-            museums.append({
-                "name": d.get("place_name"),
-                "address": d.get("road_address_name") or d.get("address_name"),
-                "distance": int(d.get("distance") or 0),
-                "lat": float(d.get("y", 0)),
-                "lon": float(d.get("x", 0)),
-                "url": d.get("place_url"),
-            })
-        if not museums:
-            return [], "⚠️ 반경 내 박물관이 없습니다. 반경을 넓혀 보세요."
-        return museums, f"✅ 반경 {radius_m}m 내 박물관 {len(museums)}곳을 찾았습니다."
-    except Exception as e:
-        return [], f"❌ 장소검색 실패: {e}"
-
-address = st.text_input("내 주소", placeholder="예) 서울특별시 용산구 서빙고로 137", value=st.session_state.search["address"])
-col1, col2 = st.columns([1, 1])
-if col1.button("검색 실행", use_container_width=True, type="primary"):
-    if KAKAO_KEY:
-        latlon, msg = geocode_address_kakao(address, KAKAO_KEY)
-        st.session_state.search["address"] = address
-        st.session_state.search["msg_geo"] = msg
-        if latlon:
-            lat, lon = latlon
-            st.session_state.search["lat"], st.session_state.search["lon"] = lat, lon
-            museums, mmsg = search_museums_around(lat, lon, KAKAO_KEY, radius_m=RADIUS_M)
-            st.session_state.search["museums"], st.session_state.search["msg_museum"] = museums, mmsg
+SEARCH_MODE = st.radio("검색 방식", ["주소 하나", "여러 주소 한꺼번에"], horizontal=True,
+                       help="학교·숙소 여러 곳 주변의 박물관을 한 번에 찾을 때는 여러 주소를 고르세요.")
+if SEARCH_MODE == "주소 하나":
+    # Kakao API 유틸(지오코딩, 박물관 검색)은 utils/kakao.py 에 있습니다.
+    address = st.text_input("내 주소", placeholder="예) 서울특별시 용산구 서빙고로 137", value=st.session_state.search["address"])
+    col1, col2 = st.columns([1, 1])
+    if col1.button("검색 실행", use_container_width=True, type="primary"):
+        if KAKAO_KEY:
+            latlon, msg = geocode_address_kakao(address, KAKAO_KEY)
+            st.session_state.search["address"] = address
+            st.session_state.search["msg_geo"] = msg
+            if latlon:
+                lat, lon = latlon
+                st.session_state.search["lat"], st.session_state.search["lon"] = lat, lon
+                museums, mmsg = search_museums_around(lat, lon, KAKAO_KEY, radius_m=RADIUS_M)
+                st.session_state.search["museums"], st.session_state.search["msg_museum"] = museums, mmsg
+            else:
+                st.session_state.search["lat"], st.session_state.search["lon"] = None, None
+                st.session_state.search["museums"] = []
         else:
-            st.session_state.search["lat"], st.session_state.search["lon"] = None, None
-            st.session_state.search["museums"] = []
+            st.error("Kakao API 키가 없어 검색을 실행할 수 없습니다.")
+
+    if col2.button("결과 지우기", use_container_width=True):
+        st.session_state.search = {"address": "", "lat": None, "lon": None, "museums": [], "msg_geo": "", "msg_museum": ""}
+        st.rerun()
+
+    s = st.session_state.search
+    if s["msg_geo"]:
+        st.info(s["msg_geo"])
+    if s["lat"] and s["lon"]:
+        st.info(s["msg_museum"])
+
+        map_key = museums_key(s["museums"])
+        if MAP_MODE == "빠른 정적 지도":
+            with metrics.timer("map_render_seconds", mode="static", markers=len(s["museums"]) // 10 * 10):
+                components.html(museum_map_html(s["lat"], s["lon"], s["address"], map_key), height=MAP_HEIGHT)
+        else:
+            from streamlit_folium import st_folium  # 인터랙티브 모드에서만 필요하므로 이때 읽는다
+
+            with metrics.timer("map_render_seconds", mode="interactive", markers=len(s["museums"]) // 10 * 10):
+                m = build_museum_map(s["lat"], s["lon"], s["address"], map_key)
+                map_state = st_folium(m, width=None, height=MAP_HEIGHT, key="map",
+                                      returned_objects=None if MAP_RETURN_EVENTS else [])
+            if MAP_RETURN_EVENTS and map_state and map_state.get("last_object_clicked_tooltip"):
+                st.caption(f"선택한 위치: {map_state['last_object_clicked_tooltip']}")
+
+        st.subheader("거리순 목록")
+        st.dataframe(
+            [{"순위": i, "박물관명": x["name"], "주소": x["address"], "거리(m)": x["distance"], "링크": x["url"]}
+             for i, x in enumerate(s["museums"], start=1)],
+            use_container_width=True
+        )
     else:
-        st.error("Kakao API 키가 없어 검색을 실행할 수 없습니다.")
+        st.caption("주소를 입력하고 **검색 실행**을 눌러 지도를 표시하세요.")
 
-if col2.button("결과 지우기", use_container_width=True):
-    st.session_state.search = {"address": "", "lat": None, "lon": None, "museums": [], "msg_geo": "", "msg_museum": ""}
-    st.rerun()
-
-s = st.session_state.search
-if s["msg_geo"]:
-    st.info(s["msg_geo"])
-if s["lat"] and s["lon"]:
-    st.info(s["msg_museum"])
-
-    m = folium.Map(location=[s["lat"], s["lon"]], zoom_start=14, tiles="OpenStreetMap")
-    folium.Marker([s["lat"], s["lon"]], tooltip="기준 위치", popup=s["address"], icon=folium.Icon(color="red")).add_to(m)
-
-    for i, x in enumerate(s["museums"], start=1):
-        popup_html = f"<b>{i}. {x['name']}</b><br>주소: {x['address']}<br>거리: {x['distance']} m<br><a href='{x['url']}' target='_blank'>상세보기</a>"
-        folium.Marker([x["lat"], x["lon"]], tooltip=f"{i}. {x['name']}", popup=popup_html,
-                      icon=folium.Icon(color="blue", icon="info-sign")).add_to(m)
-
-    st_folium(m, width=None, height=560, key="map")
-
-    st.subheader("거리순 목록")
-    st.dataframe(
-        [{"순위": i, "박물관명": x["name"], "주소": x["address"], "거리(m)": x["distance"], "링크": x["url"]}
-         for i, x in enumerate(s["museums"], start=1)],
-        use_container_width=True
-    )
 else:
-    st.caption("주소를 입력하고 **검색 실행**을 눌러 지도를 표시하세요.")
+    # ─────────────────────────────────────────
+    # 일괄 검색: 여러 주소(학교·숙소 등)를 한꺼번에
+    # ─────────────────────────────────────────
+    st.caption("주소를 한 줄에 하나씩 붙여 넣거나 CSV 파일(주소 열, 선택: 이름 열)을 올리세요. "
+               "`이름 | 주소` 처럼 쓰면 이름을 붙일 수 있습니다.")
+    address_text = st.text_area("주소 목록", height=160,
+                                placeholder="서울고등학교 | 서울특별시 서초구 효령로 197\n서울특별시 용산구 서빙고로 137")
+    address_csv = st.file_uploader("또는 CSV 파일", type=["csv"])
+    rows = parse_address_text(address_text)
+    if address_csv is not None:
+        try:
+            rows = dedupe_rows(rows + parse_address_csv(address_csv.getvalue()))
+        except ValueError as e:
+            st.error(str(e))
+    max_workers = st.slider("동시 검색 수", 1, 8, 4, help="한 번에 Kakao에 보내는 주소 수입니다. 이미 찾아본 주소는 캐시에서 바로 나옵니다.")
+
+    st.caption(f"검색할 주소 {len(rows)}곳 (한 번에 최대 {MAX_ADDRESSES}곳)")
+
+    col1, col2 = st.columns([1, 1])
+    if col1.button("일괄 검색 실행", use_container_width=True, type="primary", disabled=not rows):
+        if KAKAO_KEY:
+            results = [None] * len(rows)
+            progress = st.progress(0.0, text="검색 준비 중...")
+            with metrics.timer("bulk_search_seconds"):
+                for done, (i, result) in enumerate(bulk_search(rows, KAKAO_KEY, RADIUS_M, max_workers), start=1):
+                    results[i] = result
+                    progress.progress(done / len(rows), text=f"{done}/{len(rows)} 완료 · {result['label']}")
+            metrics.observe("bulk_search_addresses", len(rows))
+            # 결과는 세션 보관소에 둔다 (크면 디스크로 간다)
+            put_blob("bulk_search", {"results": results, "museums": aggregate(results)})
+        else:
+            st.error("Kakao API 키가 없어 검색을 실행할 수 없습니다.")
+    if col2.button("일괄 결과 지우기", use_container_width=True):
+        drop_blob("bulk_search")
+        st.rerun()
+
+    bulk = get_blob("bulk_search")
+    if bulk:
+        results, museums = bulk["results"], bulk["museums"]
+        found = [r for r in results if r["lat"] is not None]
+        st.info(f"주소 {len(results)}곳 중 {len(found)}곳의 위치를 찾았고, 박물관 {len(museums)}곳을 찾았습니다. (중복 제외)")
+        with st.expander("주소별 결과"):
+            st.dataframe(
+                [{"이름": r["label"], "주소": r["address"], "박물관 수": len(r["museums"]), "결과": r["message"]}
+                 for r in results],
+                use_container_width=True, hide_index=True
+            )
+
+        if found:
+            origins = tuple((r["label"], r["lat"], r["lon"]) for r in found)
+            map_key = museums_key(museums)
+            if MAP_MODE == "빠른 정적 지도":
+                with metrics.timer("map_render_seconds", mode="bulk_static", markers=len(museums) // 10 * 10):
+                    components.html(bulk_map_html(origins, map_key), height=MAP_HEIGHT)
+            else:
+                from streamlit_folium import st_folium
+
+                with metrics.timer("map_render_seconds", mode="bulk_interactive", markers=len(museums) // 10 * 10):
+                    st_folium(build_bulk_map(origins, map_key), width=None, height=MAP_HEIGHT, key="bulk_map",
+                              returned_objects=[])
+
+        st.subheader("박물관 목록 (여러 출발지에서 가까운 순)")
+        st.dataframe(
+            [{"박물관명": m["name"], "주소": m["address"], "가장 가까운 출발지": m["nearest"], "거리(m)": m["distance"],
+              "출발지 수": len(m["origins"]), "링크": m["url"]} for m in museums],
+            use_container_width=True, hide_index=True
+        )
+        st.download_button("📥 CSV로 내려받기", museums_csv(museums), file_name="박물관_일괄검색.csv", mime="text/csv")
+    else:
+        st.caption("주소 목록을 넣고 **일괄 검색 실행**을 눌러 지도를 표시하세요.")
+
+    #streamlit run 01_박물관_위치_검색.py
 
-    #streamlit run 01_박물관_위치_검색.py
\ No newline at end of file
+metrics.end_rerun()
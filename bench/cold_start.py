@@ -0,0 +1,124 @@
+"""페이지별 콜드 스타트·재실행 시간 측정.
+
+페이지마다 새 파이썬 프로세스를 띄워 (컨테이너 재시작 직후와 같은 상태)
+``AppTest``로 첫 실행과 이어지는 재실행 시간을 재고, 그때 읽힌 무거운 SDK를 기록한다.
+
+    python -m bench.cold_start                      # 네 페이지, 각 5회
+    python -m bench.cold_start --repeat 10 --out cold_start.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from bench import streamlit_patches
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = {
+    "01_map": "01_박물관_위치_검색.py",
+    "02_curator": "pages/02_큐레이터_챗봇.py",
+    "03_magnifier": "pages/03_유물_돋보기.py",
+    "04_qna": "pages/04_QnA_for_foreigners.py",
+}
+HEAVY_MODULES = ("google.generativeai", "openai", "folium", "streamlit_folium", "PIL.Image", "numpy")
+SECRETS = {"KAKAO_KEY": "cold-kakao", "GOOGLE_API_KEY": "cold-google", "SOLAR_API_KEY": "cold-solar"}
+
+
+def child(script: str, reruns: int) -> Dict:
+    """새 프로세스 안에서 한 페이지를 실행하고 시간을 잰다."""
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    streamlit_ms = (time.perf_counter() - start) * 1000
+
+    sys.path.insert(0, REPO_ROOT)
+    streamlit_patches.install()
+    before = set(sys.modules)
+    at = AppTest.from_file(os.path.join(REPO_ROOT, script), default_timeout=120)
+    for key, value in SECRETS.items():
+        at.secrets[key] = value
+
+    start = time.perf_counter()
+    at.run()
+    first_ms = (time.perf_counter() - start) * 1000
+    rerun_ms = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        rerun_ms.append((time.perf_counter() - start) * 1000)
+    loaded = set(sys.modules) - before
+    return {
+        "streamlit_import_ms": streamlit_ms,
+        "first_run_ms": first_ms,
+        "rerun_ms": float(np.median(rerun_ms)) if rerun_ms else None,
+        "modules_loaded": len(loaded),
+        "heavy_loaded": [m for m in HEAVY_MODULES if m in loaded],
+        "exceptions": [str(e.value) for e in at.exception],
+    }
+
+
+def measure(page: str, repeat: int, reruns: int) -> Dict:
+    runs: List[Dict] = []
+    env = {**os.environ, "PYTHONWARNINGS": "ignore"}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = subprocess.run(
+            [sys.executable, "-m", "bench.cold_start", "--child", PAGES[page], "--reruns", str(reruns)],
+            cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True,
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        result["process_ms"] = (time.perf_counter() - start) * 1000
+        runs.append(result)
+
+    def median(key: str) -> Optional[float]:
+        values = [r[key] for r in runs if r.get(key) is not None]
+        return float(np.median(values)) if values else None
+
+    return {
+        "first_run_ms": median("first_run_ms"),
+        "rerun_ms": median("rerun_ms"),
+        "process_ms": median("process_ms"),
+        "streamlit_import_ms": median("streamlit_import_ms"),
+        "modules_loaded": median("modules_loaded"),
+        "heavy_loaded": runs[-1]["heavy_loaded"],
+        "exceptions": runs[-1]["exceptions"],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="페이지 콜드 스타트 측정")
+    parser.add_argument("--pages", default=",".join(PAGES))
+    parser.add_argument("--repeat", type=int, default=5, help="페이지마다 새 프로세스로 몇 번 잴지")
+    parser.add_argument("--reruns", type=int, default=5, help="첫 실행 뒤 재실행 횟수")
+    parser.add_argument("--out", default="", help="결과 JSON 경로 (비우면 화면에만 출력)")
+    parser.add_argument("--child", default="", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(child(args.child, args.reruns)))
+        return 0
+    try:
+        streamlit_patches.check()
+    except streamlit_patches.UnsupportedStreamlit as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    report = {"python": sys.version.split()[0], "repeat": args.repeat, "pages": {}}
+    print(f"{'페이지':<14}{'첫 실행':>10}{'재실행':>10}{'프로세스':>10}  무거운 모듈")
+    for page in [p.strip() for p in args.pages.split(",") if p.strip()]:
+        r = report["pages"][page] = measure(page, args.repeat, args.reruns)
+        print(f"{page:<14}{r['first_run_ms']:>8.0f}ms{r['rerun_ms']:>8.0f}ms{r['process_ms']:>8.0f}ms  "
+              f"{', '.join(r['heavy_loaded']) or '-'}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
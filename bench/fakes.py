@@ -0,0 +1,270 @@
+"""벤치마크용 가짜 외부 서비스.
+
+- Kakao 로컬 API  : 로컬 HTTP 서버 (주소 검색 / 키워드 검색, 여러 페이지)
+- Solar          : OpenAI 호환 ``/chat/completions`` HTTP 서버 (SSE 스트리밍 포함)
+- Gemini         : ``google.generativeai`` 의 ``GenerativeModel``·``configure`` 를 바꿔 끼우는 스텁
+
+모두 지연 시간(평균 + 흔들림)과 오류 비율을 설정할 수 있다.
+"""
+
+import json
+import random
+import sys
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+@dataclass
+class Fault:
+    """지연 시간(ms)과 오류 비율 설정. 값을 바꾸면 실행 중인 서버에도 바로 반영된다."""
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+
+    def delay(self, scale: float = 1.0) -> None:
+        ms = max(0.0, random.gauss(self.latency_ms, self.jitter_ms)) * scale
+        if ms:
+            time.sleep(ms / 1000)
+
+    def should_fail(self) -> bool:
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+
+def _seeded(text: str) -> random.Random:
+    return random.Random(zlib.crc32(text.encode("utf-8")))
+
+
+class _QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address) -> None:
+        # 헤지에서 진 쪽 스트림을 닫으면 응답을 쓰다 연결이 끊긴다 → 정상이므로 조용히 넘긴다
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class _Server:
+    """``ThreadingHTTPServer`` 를 백그라운드 스레드에서 띄운다."""
+
+    def __init__(self, handler):
+        self.httpd = _QuietServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.requests = 0
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_ref: Optional[_Server] = None
+    fault = Fault()
+
+    def log_message(self, *args) -> None:  # 콘솔을 조용히
+        pass
+
+    def _json(self, status: int, body: Dict) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _inject(self) -> bool:
+        """지연을 넣고, 오류를 내야 하면 500을 보내고 True."""
+        if self.server_ref is not None:
+            self.server_ref.requests += 1
+        self.fault.delay()
+        if self.fault.should_fail():
+            self._json(500, {"error": "injected failure"})
+            return True
+        return False
+
+
+# ─────────────────────────────────────────
+# Kakao 로컬 API
+# ─────────────────────────────────────────
+class KakaoHandler(_Handler):
+    fault = Fault(latency_ms=80, jitter_ms=20)
+    total_places = 40   # 키워드 검색 결과 총 건수 (15건씩 나눠 준다)
+
+    def do_GET(self) -> None:
+        if self._inject():
+            return
+        url = urlparse(self.path)
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path == "/v2/local/search/address.json":
+            rng = _seeded(q.get("query", ""))
+            lat, lon = 37.45 + rng.random() * 0.2, 126.9 + rng.random() * 0.2
+            self._json(200, {"documents": [{"address_name": q.get("query"), "x": f"{lon:.6f}", "y": f"{lat:.6f}"}]})
+        elif url.path == "/v2/local/search/keyword.json":
+            self._json(200, self._keyword(q))
+        else:
+            self._json(404, {"error": "not found"})
+
+    def _keyword(self, q: Dict[str, str]) -> Dict:
+        lat, lon = float(q.get("y", 37.5)), float(q.get("x", 127.0))
+        page, size = int(q.get("page", 1)), int(q.get("size", 15))
+        rng = _seeded(f"{lat:.3f},{lon:.3f}")
+        places = []
+        for i in range(self.total_places):
+            dlat, dlon = (rng.random() - 0.5) * 0.06, (rng.random() - 0.5) * 0.06
+            places.append({
+                "id": str(zlib.crc32(f"{lat:.3f},{lon:.3f},{i}".encode("utf-8"))),
+                "place_name": f"가짜 박물관 {i + 1}",
+                "road_address_name": f"서울 어딘가 {i + 1}",
+                "address_name": f"서울 어딘가 {i + 1}",
+                "distance": str(int(((dlat * 111000) ** 2 + (dlon * 88000) ** 2) ** 0.5)),
+                "x": f"{lon + dlon:.6f}",
+                "y": f"{lat + dlat:.6f}",
+                "place_url": f"http://place.map.kakao.com/{i}",
+            })
+        docs = places[(page - 1) * size: page * size]
+        return {"documents": docs, "meta": {"total_count": len(places), "pageable_count": len(places),
+                                            "is_end": page * size >= len(places)}}
+
+
+# ─────────────────────────────────────────
+# Solar (OpenAI 호환)
+# ─────────────────────────────────────────
+ANSWER_WORDS = ("The museum", "is open", "from 10 AM", "to 6 PM.", "Please check", "the website", "for holidays.")
+
+
+class SolarHandler(_Handler):
+    fault = Fault(latency_ms=300, jitter_ms=50)
+    chunk_ms = 30.0     # 스트리밍 조각 사이 간격
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.endswith("/chat/completions"):
+            self._json(404, {"error": "not found"})
+            return
+        if self._inject():
+            return
+        base = {"id": "chatcmpl-bench", "created": int(time.time()), "model": body.get("model", "fake")}
+        prompt_tokens = sum(len(m.get("content") or "") for m in body.get("messages", [])) // 4
+        if not body.get("stream"):
+            text = " ".join(ANSWER_WORDS)
+            self._json(200, {**base, "object": "chat.completion", "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(text) // 4,
+                          "total_tokens": prompt_tokens + len(text) // 4}})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        for i, word in enumerate(ANSWER_WORDS):
+            if i:
+                time.sleep(self.chunk_ms / 1000)
+            chunk = {**base, "object": "chat.completion.chunk", "choices": [
+                {"index": 0, "delta": {"content": (" " if i else "") + word}, "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        done = {**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        self.wfile.write(f"data: {json.dumps(done)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+
+def start_kakao(fault: Optional[Fault] = None, total_places: int = 40) -> _Server:
+    handler = type("KakaoBench", (KakaoHandler,), {"fault": fault or Fault(80, 20), "total_places": total_places})
+    server = _Server(handler)
+    handler.server_ref = server
+    return server.start()
+
+
+def start_solar(fault: Optional[Fault] = None, chunk_ms: float = 30.0) -> _Server:
+    handler = type("SolarBench", (SolarHandler,), {"fault": fault or Fault(300, 50), "chunk_ms": chunk_ms})
+    server = _Server(handler)
+    handler.server_ref = server
+    return server.start()
+
+
+# ─────────────────────────────────────────
+# Gemini (google.generativeai 스텁)
+# ─────────────────────────────────────────
+class _Usage:
+    def __init__(self, prompt: int, output: int):
+        self.prompt_token_count = prompt
+        self.candidates_token_count = output
+
+
+class _Chunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _Response:
+    """``generate_content`` / ``send_message`` 응답 흉내 (스트리밍이면 조각 iterator)."""
+
+    def __init__(self, parts: List[str], prompt_chars: int, stream: bool, chunk_ms: float):
+        self._parts, self._stream, self._chunk_ms = parts, stream, chunk_ms
+        self.text = "".join(parts)
+        self.usage_metadata = _Usage(prompt_chars // 2, len(self.text) // 2)
+
+    def __iter__(self):
+        for i, p in enumerate(self._parts):
+            if i:
+                time.sleep(self._chunk_ms / 1000)
+            yield _Chunk(p)
+
+
+class FakeGemini:
+    """``install()`` 후에는 모든 Gemini 호출이 이 스텁으로 간다."""
+
+    GEMINI_PARTS = ["이 유물은 ", "삼국시대에 ", "만들어진 것으로 ", "추정됩니다. ", "자세한 내용은 ", "전시 해설을 ", "참고하세요."]
+
+    def __init__(self, fault: Optional[Fault] = None, chunk_ms: float = 30.0):
+        self.fault = fault or Fault(400, 80)
+        self.chunk_ms = chunk_ms
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _respond(self, contents, stream: bool) -> _Response:
+        with self._lock:
+            self.calls += 1
+        # 스트리밍이면 첫 조각까지의 지연만 기다리고, 나머지는 조각 간격으로 흘린다
+        self.fault.delay()
+        if self.fault.should_fail():
+            raise RuntimeError("injected Gemini failure")
+        return _Response(list(self.GEMINI_PARTS), len(str(contents)), stream, self.chunk_ms)
+
+    def install(self) -> None:
+        import google.generativeai as genai
+
+        fake = self
+
+        class _ChatSession:
+            def __init__(self, history):
+                self.history = history or []
+
+            def send_message(self, content, stream=False, **kwargs):
+                return fake._respond(content, stream)
+
+        class GenerativeModel:
+            def __init__(self, model_name="fake", system_instruction=None, **kwargs):
+                self.model_name = model_name
+
+            def start_chat(self, history=None):
+                return _ChatSession(history)
+
+            def generate_content(self, contents, stream=False, **kwargs):
+                return fake._respond(contents, stream)
+
+        genai.configure = lambda **kwargs: None
+        genai.GenerativeModel = GenerativeModel
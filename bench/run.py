@@ -0,0 +1,315 @@
+"""네 페이지를 헤드리스(Streamlit ``AppTest``)로 돌리는 부하 테스트 / 벤치마크.
+
+외부 서비스는 모두 로컬 가짜(``bench/fakes.py``)로 바꾸고, 세션 N개를 동시에 흉내 내며
+재실행 시간·응답 시간·세션당 메모리·처리량을 재서 JSON 보고서로 남긴다.
+
+    python -m bench.run                                   # 기본: 네 시나리오, 세션 8개, 동시 4개
+    python -m bench.run --scenarios qna --sessions 30 --concurrency 10 --solar-latency 800
+    python -m bench.run --error-rate 0.05 --out bench_report.json
+    python -m bench.run --baseline bench_baseline.json    # p95가 허용치 넘게 느려지면 종료 코드 1
+"""
+
+import argparse
+import gc
+import glob
+import io
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from bench import streamlit_patches
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# ─────────────────────────────────────────
+# 환경 준비 (utils 를 import 하기 전에 해야 한다)
+# ─────────────────────────────────────────
+def prepare_environment(args: argparse.Namespace):
+    from bench.fakes import Fault, FakeGemini, start_kakao, start_solar
+
+    workdir = tempfile.mkdtemp(prefix="museum-bench-")
+    os.environ["MUSEUM_CACHE_DIR"] = args.cache_dir or os.path.join(workdir, "cache")
+    if not args.with_knowledge:
+        os.environ["MUSEUM_KNOWLEDGE_INDEX"] = os.path.join(workdir, "no-knowledge-index")
+
+    kakao = start_kakao(Fault(args.kakao_latency, args.kakao_latency * 0.25, args.error_rate))
+    solar = start_solar(Fault(args.solar_latency, args.solar_latency * 0.2, args.error_rate), chunk_ms=args.chunk_ms)
+    os.environ["KAKAO_API_BASE"] = kakao.base_url
+    os.environ["SOLAR_BASE_URL"] = f"{solar.base_url}/v1/solar"
+    gemini = FakeGemini(Fault(args.gemini_latency, args.gemini_latency * 0.2, args.error_rate), chunk_ms=args.chunk_ms)
+    gemini.install()
+
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    # 재실행마다 찍히는 폐기 예정·bare mode 경고가 결과 출력을 덮지 않게
+    for name in ("streamlit.deprecation_util", "streamlit.runtime.scriptrunner_utils.script_run_context"):
+        logging.getLogger(name).addFilter(lambda record: record.levelno >= logging.ERROR)
+    streamlit_patches.install(concurrent=True)
+
+    if args.unthrottled:
+        from utils import ratelimit
+        for provider in ratelimit.DEFAULT_RATES:
+            ratelimit.DEFAULT_RATES[provider] = (1000.0, 1000)
+    return {"kakao": kakao, "solar": solar, "gemini": gemini}
+
+
+# ─────────────────────────────────────────
+# 시나리오: (스크립트, secrets, 한 번의 상호작용)
+# ─────────────────────────────────────────
+def _button(at, label: str):
+    return next(b for b in at.button if b.label == label)
+
+
+JOB_KEYS = ("curator_job", "qna_job", "magnifier_job")
+JOB_POLL_S = 0.05
+
+
+def _wait_for_jobs(at) -> None:
+    """페이지가 백그라운드 작업(utils/jobs.py)을 기다리는 동안 브라우저처럼 다시 실행한다.
+
+    AppTest 는 ``st.fragment(run_every=...)`` 를 스스로 돌리지 않으므로, 답변이 대화에 옮겨질
+    때까지 앱을 다시 실행해야 응답 시간이 실제 화면에 답이 나타난 시점까지로 잡힌다.
+    """
+    deadline = time.perf_counter() + at.default_timeout
+    while any(key in at.session_state and at.session_state[key] for key in JOB_KEYS):
+        if time.perf_counter() > deadline:
+            raise TimeoutError("background job did not finish")
+        time.sleep(JOB_POLL_S)
+        at.run()
+
+
+def _artifact_jpeg(seed: int) -> bytes:
+    from PIL import Image
+    rng = np.random.default_rng(seed)
+    # dHash 가 서로 다르도록 무늬가 있는 이미지를 만든다
+    pixels = (rng.random((60, 80, 3)) * 255).astype(np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(pixels).resize((1600, 1200)).save(buf, "JPEG", quality=90)
+    return buf.getvalue()
+
+
+def interact_map(at, k: int) -> None:
+    next(w for w in at.text_input if w.label == "내 주소").set_value(f"서울특별시 벤치로 {k}")
+    _button(at, "검색 실행").click().run()
+
+
+def interact_bulk_map(at, k: int) -> None:
+    next(w for w in at.radio if w.label == "검색 방식").set_value("여러 주소 한꺼번에").run()
+    lines = [f"{k}번 학교 | 서울특별시 벤치로 {k * 10 + j}" for j in range(10)]
+    next(w for w in at.text_area if w.label == "주소 목록").set_value("\n".join(lines)).run()
+    _button(at, "일괄 검색 실행").click().run()
+
+
+def interact_curator(at, k: int) -> None:
+    at.chat_input[0].set_value(f"{k}번 전시실의 신라 금관은 어떤 특징이 있나요?").run()
+    _wait_for_jobs(at)
+
+
+def interact_magnifier(at, k: int) -> None:
+    at.get("file_uploader")[0].upload(f"artifact_{k}.jpg", _artifact_jpeg(k), "image/jpeg")
+    at.run()
+    _button(at, "🚀 이미지 분석 시작").click().run()
+    _wait_for_jobs(at)
+
+
+def interact_qna(at, k: int) -> None:
+    at.chat_input[0].set_value(f"Could you tell me the story behind exhibit number {k}?").run()
+    _wait_for_jobs(at)
+
+
+SCENARIOS: Dict[str, Dict] = {
+    "map": {"script": "01_*.py", "secrets": {"KAKAO_KEY": "bench-kakao"}, "interact": interact_map},
+    "bulk_map": {"script": "01_*.py", "secrets": {"KAKAO_KEY": "bench-kakao"}, "interact": interact_bulk_map},
+    "curator": {"script": "pages/02_*.py", "secrets": {"GOOGLE_API_KEY": "bench-google"}, "interact": interact_curator},
+    "magnifier": {"script": "pages/03_*.py", "secrets": {"GOOGLE_API_KEY": "bench-google"},
+                  "interact": interact_magnifier},
+    "qna": {"script": "pages/04_*.py", "secrets": {"SOLAR_API_KEY": "bench-solar"}, "interact": interact_qna},
+    "qna_hedged": {"script": "pages/04_*.py", "secrets": {"SOLAR_API_KEY": "bench-solar", "GOOGLE_API_KEY": "bench-google"},
+                   "interact": interact_qna},
+}
+
+
+# ─────────────────────────────────────────
+# 측정
+# ─────────────────────────────────────────
+def summarize(values_ms: List[float]) -> Dict:
+    if not values_ms:
+        return {"count": 0}
+    v = np.asarray(values_ms, dtype=np.float64)
+    return {"count": int(len(v)), "mean": float(v.mean()), "p50": float(np.percentile(v, 50)),
+            "p95": float(np.percentile(v, 95)), "p99": float(np.percentile(v, 99)), "max": float(v.max())}
+
+
+def new_app(scenario: Dict, timeout: float):
+    from streamlit.testing.v1 import AppTest
+    return AppTest.from_file(glob.glob(os.path.join(REPO_ROOT, scenario["script"]))[0], default_timeout=timeout)
+
+
+def run_session(scenario: Dict, session_id: int, turns: int, distinct: int, timeout: float) -> Dict:
+    """세션 하나: 첫 화면 로드 후 ``turns``번 상호작용."""
+    result = {"load_ms": None, "response_ms": [], "exceptions": 0, "ui_errors": 0, "failed": None}
+    try:
+        at = new_app(scenario, timeout)
+        start = time.perf_counter()
+        at.run()
+        result["load_ms"] = (time.perf_counter() - start) * 1000
+        for turn in range(turns):
+            start = time.perf_counter()
+            scenario["interact"](at, (session_id * turns + turn) % distinct)
+            result["response_ms"].append((time.perf_counter() - start) * 1000)
+            result["exceptions"] += len(at.exception)
+            result["ui_errors"] += len(at.error)
+    except Exception as e:  # 시간 초과 등: 세션 전체를 실패로 센다
+        result["failed"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def measure_memory(scenario: Dict, sessions: int, turns: int, timeout: float) -> Optional[float]:
+    """세션을 만들어 살려 둔 채로 늘어난 Python 힙(KiB)을 세션 수로 나눈다."""
+    if sessions <= 0:
+        return None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        alive = []
+        for i in range(sessions):
+            at = new_app(scenario, timeout)
+            at.run()
+            for turn in range(turns):
+                scenario["interact"](at, 10_000 + i * turns + turn)
+            alive.append(at)
+        gc.collect()
+        grown = tracemalloc.get_traced_memory()[0] - base
+    finally:
+        tracemalloc.stop()
+    return grown / sessions / 1024
+
+
+def run_scenario(name: str, args: argparse.Namespace) -> Dict:
+    scenario = SCENARIOS[name]
+    distinct = args.distinct or args.sessions * args.turns
+    streamlit_patches.use_secrets(scenario["secrets"])
+    # 준비 운동: import·캐시 워밍 효과가 첫 세션 수치에 섞이지 않게 한 번 돌려 둔다
+    run_session(scenario, 99_999, 1, 1, args.timeout)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        sessions = list(pool.map(lambda i: run_session(scenario, i, args.turns, distinct, args.timeout),
+                                 range(args.sessions)))
+    wall = time.perf_counter() - start
+
+    responses = [ms for s in sessions for ms in s["response_ms"]]
+    report = {
+        "sessions": args.sessions,
+        "concurrency": args.concurrency,
+        "turns": args.turns,
+        "wall_seconds": wall,
+        "throughput_per_s": len(responses) / wall if wall else 0.0,
+        "load_ms": summarize([s["load_ms"] for s in sessions if s["load_ms"] is not None]),
+        "response_ms": summarize(responses),
+        "script_exceptions": sum(s["exceptions"] for s in sessions),
+        "ui_errors": sum(s["ui_errors"] for s in sessions),
+        "failed_sessions": [s["failed"] for s in sessions if s["failed"]],
+    }
+    report["memory_kib_per_session"] = measure_memory(scenario, args.memory_sessions, args.turns, args.timeout)
+    return report
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """기준 보고서보다 p95가 ``tolerance`` 비율 넘게 느려진 항목."""
+    regressions = []
+    for name, current in report["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(name)
+        if not old:
+            continue
+        for metric in ("load_ms", "response_ms"):
+            before, after = old[metric].get("p95"), current[metric].get("p95")
+            if before and after and after > before * (1 + tolerance):
+                regressions.append(f"{name}.{metric}.p95: {before:.0f}ms → {after:.0f}ms")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="박물관 앱 헤드리스 벤치마크")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="쉼표로 구분 (map,bulk_map,curator,magnifier,qna,qna_hedged)")
+    parser.add_argument("--sessions", type=int, default=8, help="시나리오마다 흉내 낼 세션 수")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시에 실행할 세션 수")
+    parser.add_argument("--turns", type=int, default=2, help="세션마다 상호작용 횟수")
+    parser.add_argument("--distinct", type=int, default=0, help="서로 다른 입력 개수 (작을수록 캐시 적중↑, 0=모두 다름)")
+    parser.add_argument("--kakao-latency", type=float, default=80.0, help="Kakao 응답 지연(ms)")
+    parser.add_argument("--gemini-latency", type=float, default=400.0, help="Gemini 첫 응답 지연(ms)")
+    parser.add_argument("--solar-latency", type=float, default=300.0, help="Solar 첫 응답 지연(ms)")
+    parser.add_argument("--chunk-ms", type=float, default=30.0, help="스트리밍 조각 사이 간격(ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="가짜 서비스 오류 비율 (0~1)")
+    parser.add_argument("--unthrottled", action="store_true", help="속도 제한을 사실상 끄고 앱 자체 비용만 잰다")
+    parser.add_argument("--memory-sessions", type=int, default=3, help="메모리 측정용 세션 수 (0=측정 안 함)")
+    parser.add_argument("--with-knowledge", action="store_true", help="큐레이터 RAG 인덱스를 그대로 사용")
+    parser.add_argument("--cache-dir", default="", help="디스크 캐시 위치 (기본: 빈 임시 폴더)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="재실행 한 번의 최대 시간(초)")
+    parser.add_argument("--out", default="bench_report.json", help="보고서 경로")
+    parser.add_argument("--baseline", default="", help="비교할 이전 보고서")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="허용하는 p95 증가 비율")
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error(f"알 수 없는 시나리오: {', '.join(unknown)}")
+
+    try:
+        streamlit_patches.check()    # 가짜 서버를 띄우기 전에 먼저 확인한다
+    except streamlit_patches.UnsupportedStreamlit as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    fakes = prepare_environment(args)
+    from utils import metrics
+
+    report = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+        "scenarios": {},
+    }
+    for name in names:
+        print(f"▶ {name} …", flush=True)
+        report["scenarios"][name] = result = run_scenario(name, args)
+        print(f"  응답 p50 {result['response_ms'].get('p50', 0):.0f}ms · p95 {result['response_ms'].get('p95', 0):.0f}ms"
+              f" · 처리량 {result['throughput_per_s']:.2f}/s · 오류 {result['ui_errors']}"
+              f" · 세션당 메모리 {result['memory_kib_per_session'] or 0:.0f}KiB", flush=True)
+
+    report["upstream_requests"] = {"kakao": fakes["kakao"].requests, "solar": fakes["solar"].requests,
+                                   "gemini": fakes["gemini"].calls}
+    report["app_metrics"] = metrics.snapshot()
+    report["threads_alive"] = threading.active_count()
+    for key in ("kakao", "solar"):
+        fakes[key].stop()
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"📄 보고서: {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print("❌ 성능 회귀:\n  " + "\n  ".join(regressions))
+            return 1
+        print("✅ 기준 대비 회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""벤치마크가 ``AppTest`` 를 쓰려고 건드리는 Streamlit 내부 패치를 한곳에 모은 것.
+
+모두 Streamlit 의 비공개 구현에 기대므로, 확인한 버전(``SUPPORTED_STREAMLIT``)에서만 적용한다.
+다른 버전이거나 패치할 속성이 없으면 ``UnsupportedStreamlit`` 으로 바로 멈춘다.
+(조용히 깨지거나 다른 것을 재지 않게) Streamlit 을 올렸으면 아래 패치가 여전히 맞는지 확인하고
+``SUPPORTED_STREAMLIT`` 를 고친다.
+
+- ``DeltaGenerator.page_link`` → 아무것도 안 함: AppTest 는 페이지 하나만 실행해 다른 페이지로 가는 링크를 못 만든다.
+- ``magic.add_magic`` → 잠금 안에서: CPython 3.11 의 ``ast.parse`` 는 여러 스레드에서 동시에 부르면 간혹
+  SystemError 를 낸다.
+- ``app_test.Runtime`` → 가짜 런타임 공유: AppTest 는 실행마다 전역 ``Runtime._instance`` 를 바꿨다가
+  None 으로 되돌려, 동시에 돌리면 서로의 런타임을 지운다.
+- ``st.secrets`` → 전역 한 벌: AppTest 의 secrets 도 실행마다 전역을 바꿨다 되돌린다.
+
+    from bench import streamlit_patches
+    streamlit_patches.install(concurrent=True)
+"""
+
+import threading
+from typing import Dict
+
+SUPPORTED_STREAMLIT = "1.65"    # 패치를 확인한 버전 (major.minor)
+
+
+class UnsupportedStreamlit(RuntimeError):
+    pass
+
+
+def check() -> None:
+    """설치된 Streamlit 이 확인한 버전이고 패치할 속성이 모두 있는지 본다."""
+    import streamlit
+    import streamlit.delta_generator as dg
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner import magic
+    from streamlit.runtime.secrets import Secrets
+    from streamlit.testing.v1 import app_test
+
+    version = ".".join(streamlit.__version__.split(".")[:2])
+    if version != SUPPORTED_STREAMLIT:
+        raise UnsupportedStreamlit(
+            f"벤치마크는 Streamlit {SUPPORTED_STREAMLIT}.x 에서만 확인했습니다 (설치됨: {streamlit.__version__}). "
+            "bench/streamlit_patches.py 의 패치가 여전히 맞는지 확인한 뒤 SUPPORTED_STREAMLIT 를 고쳐 주세요."
+        )
+    missing = [name for obj, attr, name in (
+        (dg.DeltaGenerator, "page_link", "DeltaGenerator.page_link"),
+        (magic, "add_magic", "scriptrunner.magic.add_magic"),
+        (app_test, "Runtime", "testing.v1.app_test.Runtime"),
+        (Runtime, "_instance", "Runtime._instance"),
+        (Secrets(), "_secrets", "Secrets._secrets"),
+    ) if not hasattr(obj, attr)]
+    if missing:
+        raise UnsupportedStreamlit(f"Streamlit {streamlit.__version__} 에 패치할 속성이 없습니다: {', '.join(missing)}")
+
+
+def install(concurrent: bool = False) -> None:
+    """``check`` 후 패치를 적용한다. ``concurrent`` 면 여러 AppTest 를 스레드에서 동시에 돌릴 수 있게 한다."""
+    check()
+    import streamlit.delta_generator as dg
+    dg.DeltaGenerator.page_link = lambda self, *a, **k: None
+    if concurrent:
+        _lock_add_magic()
+        _share_runtime()
+
+
+def _lock_add_magic() -> None:
+    from streamlit.runtime.scriptrunner import magic
+    add_magic, compile_lock = magic.add_magic, threading.Lock()
+
+    def locked_add_magic(code, script_path):
+        with compile_lock:
+            return add_magic(code, script_path)
+    magic.add_magic = locked_add_magic
+
+
+def _share_runtime() -> None:
+    # 처음 만든 가짜 런타임을 계속 쓴다 (실제 서버처럼 모든 세션이 캐시·속도 제한기를 한 프로세스에서 공유)
+    from streamlit.runtime import Runtime
+    from streamlit.testing.v1 import app_test
+
+    class _SharedRuntimeMeta(type(Runtime)):
+        def __setattr__(cls, name, value):
+            if name != "_instance":
+                super().__setattr__(name, value)
+            elif value is not None and Runtime._instance is None:
+                Runtime._instance = value
+
+    app_test.Runtime = _SharedRuntimeMeta("SharedRuntime", (Runtime,), {})
+
+
+def use_secrets(secrets: Dict[str, str]) -> None:
+    """모든 세션이 같은 secrets 를 쓰도록 전역으로 한 번 정한다. (``install`` 뒤에 부른다)"""
+    import streamlit as st
+    from streamlit.runtime.secrets import Secrets
+    st.secrets = Secrets()
+    st.secrets._secrets = dict(secrets)
@@ -1,47 +1,56 @@
 import streamlit as st
-import google.generativeai as genai
 
-# --- 상단 메뉴 숨기기 및 사이드바 기본 펼침 ---
-st.set_page_config(
-    page_title="큐레이터 챗봇", 
-    page_icon="🗣️", 
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-st.markdown("""
-<style>
-    [data-testid="stSidebarNav"] {
-        display: none;
-    }
-</style>
-""", unsafe_allow_html=True)
+from utils import jobs, llm, metrics
+from utils.app_shell import secret, setup_page
+from utils.history import SUMMARY_PROMPT_KO, new_summary_state, window_history
+from utils.knowledge import format_passages, get_knowledge_index, retrieve
+from utils.semantic_cache import get_answer_cache
+from utils.session_store import session_log
 
-
-# ─────────────────────────────────────────
-# 사이드바: 내비게이션 & API 키 설정
-# ─────────────────────────────────────────
-st.sidebar.title("📚 메뉴")
-st.sidebar.page_link("01_박물관_위치_검색.py", label="1. 박물관 위치 검색", icon="🏛️")
-st.sidebar.page_link("pages/02_큐레이터_챗봇.py", label="2. 큐레이터 챗봇", icon="🗣️")
-st.sidebar.page_link("pages/03_유물_돋보기.py", label="3. 유물 돋보기", icon="🖼️")
-st.sidebar.page_link("pages/04_QnA_for_foreigners.py", label="4. Q&A for Foreigners", icon="❓")
-st.sidebar.markdown("---")
+# --- 페이지 설정 + 사이드바 메뉴 ---
+setup_page("큐레이터 챗봇", "🗣️", metrics_page="02_curator")
 
 # ─────────────────────────────────────────
 # API 키 로드 및 모델 설정
 # ─────────────────────────────────────────
-try:
-    API_KEY = st.secrets["GOOGLE_API_KEY"]
-    genai.configure(api_key=API_KEY)
+API_KEY = secret("GOOGLE_API_KEY")
+if API_KEY:
     st.sidebar.success("✅ Google API 키 로드 성공!")
-except (KeyError, FileNotFoundError):
-    API_KEY = ""
+else:
     st.sidebar.error("⚠️ `secrets.toml`에 Google API 키를 설정해주세요.")
 
 st.sidebar.title("🧠 모델 설정")
 temperature = st.sidebar.slider("창의성(temperature)", 0.0, 1.0, 0.5, 0.1) # 창의성 기본값을 0.5로 약간 낮춤
+history_budget = st.sidebar.slider("대화 기억 예산(토큰)", 500, 8000, 2000, 250,
+                                   help="이 양을 넘는 오래된 대화는 요약으로 접어서 보냅니다.")
 reset_btn = st.sidebar.button("대화 초기화", use_container_width=True, type="secondary")
 
+# ─────────────────────────────────────────
+# 답변 캐시: 첫 질문이 예전 질문과 충분히 비슷하면 저장된 답변을 바로 사용
+# ─────────────────────────────────────────
+MODEL_NAME = llm.DEFAULT_MODELS[llm.GEMINI]
+answer_cache = get_answer_cache()
+use_answer_cache = st.sidebar.checkbox("비슷한 질문의 저장된 답변 사용", value=True)
+cache_threshold = st.sidebar.slider("질문 유사도 기준", 0.70, 1.00, 0.90, 0.01)
+with st.sidebar.expander("🗄️ 답변 캐시 현황"):
+    cache_stats = answer_cache.stats()
+    st.caption(f"저장 {cache_stats['size']}건 · 적중 {cache_stats['hits']} / 미스 {cache_stats['misses']} "
+               f"(적중률 {cache_stats['hit_rate']:.0%})")
+
+# ─────────────────────────────────────────
+# 지식 검색(RAG): 로컬 유물 자료에서 관련 내용을 찾아 질문과 함께 보냄
+# (인덱스 생성: python -m utils.knowledge build)
+# ─────────────────────────────────────────
+knowledge_index = get_knowledge_index()
+use_knowledge = st.sidebar.checkbox("박물관 자료 검색 사용", value=knowledge_index is not None,
+                                    disabled=knowledge_index is None)
+knowledge_k = st.sidebar.slider("참고 자료 개수", 1, 8, 4)
+if knowledge_index is None:
+    st.sidebar.caption("📚 자료 인덱스가 없습니다. `python -m utils.knowledge build` 로 만들 수 있어요.")
+else:
+    st.sidebar.caption(f"📚 자료 {knowledge_index.manifest['count']}조각 "
+                       f"(파일 {len(knowledge_index.manifest['files'])}개)")
+
 # ─────────────────────────────────────────
 # ✅ 시스템 프롬프트 (신뢰성 강화)
 # ─────────────────────────────────────────
@@ -63,34 +72,41 @@ SYSTEM_INSTRUCTION = """
 
 # ─────────────────────────────────────────
 # 세션 상태: 멀티턴 대화 저장
+# (대화는 세션 보관소에 두고, 메모리 상한을 넘는 오래된 메시지는 디스크로 넘어간다)
 # ─────────────────────────────────────────
-if "curator_msgs" not in st.session_state or reset_btn:
-    st.session_state.curator_msgs = [
+curator_msgs = session_log("curator")
+if reset_btn:
+    if st.session_state.get("curator_job"):
+        jobs.forget_job(st.session_state.curator_job["id"])
+    curator_msgs.clear()
+    st.session_state.curator_show_older = 0
+    st.session_state.curator_job = None
+if not curator_msgs:
+    curator_msgs.append(
         {"role": "assistant", "content": "안녕하세요! 저는 신뢰할 수 있는 정보를 바탕으로 유물과 예술 작품을 설명해 드리는 큐레이터 챗봇입니다. 무엇이든 물어보세요."}
-    ]
+    )
+if "curator_summary" not in st.session_state or reset_btn:
+    st.session_state.curator_summary = new_summary_state()
+st.session_state.setdefault("curator_show_older", 0)
 
 # ─────────────────────────────────────────
-# Gemini 모델 준비
+# 유틸: 요약 + 최근 대화 → 모델에 보낼 메시지 목록
+# (Gemini 클라이언트는 utils/llm.py 게이트웨이가 프로세스 전체에서 재사용)
 # ─────────────────────────────────────────
-model = None
-if API_KEY:
-    try:
-        model = genai.GenerativeModel(
-            "gemini-1.5-flash",
-            system_instruction=SYSTEM_INSTRUCTION
-        )
-    except Exception as e:
-        st.error(f"모델 초기화 중 오류: {e}")
-
-# ─────────────────────────────────────────
-# 유틸: Streamlit 히스토리 → Gemini history 포맷 변환
-# ─────────────────────────────────────────
-def to_gemini_history(streamlit_msgs):
-    history = []
+def with_passages(question, passages):
+    if not passages:
+        return question
+    return (f"{question}\n\n[참고 자료]\n{format_passages(passages)}\n\n"
+            "위 참고 자료에 있는 내용은 자료를 근거로 설명하고, 자료에 없는 내용은 그렇다고 밝힌 뒤 답하라.")
+
+def to_model_messages(streamlit_msgs, summary=""):
+    messages = []
+    if summary:
+        messages.append({"role": "user", "content": f"[이전 대화 요약]\n{summary}"})
+        messages.append({"role": "assistant", "content": "네, 이전 대화 내용을 참고해서 이어서 설명하겠습니다."})
     for m in streamlit_msgs:
-        role = "user" if m["role"] == "user" else "model"
-        history.append({"role": role, "parts": [m["content"]]})
-    return history
+        messages.append({"role": "user" if m["role"] == "user" else "assistant", "content": m["content"]})
+    return messages
 
 # ─────────────────────────────────────────
 # UI
@@ -98,40 +114,118 @@ def to_gemini_history(streamlit_msgs):
 st.title("🗣️ 큐레이터 챗봇")
 st.caption("전시/유물에 대해 질문하면 큐레이터처럼 깊이 있게 해설해 드려요. (예: '신라 금관의 특징 알려줘')")
 
-# 기존 대화 렌더링
-for m in st.session_state.curator_msgs:
+# ─────────────────────────────────────────
+# 답변 생성: 모델 호출은 백그라운드 작업으로 돌리고, 화면은 진행 상황만 주기적으로 갱신한다
+# (다시 입력하거나 다른 페이지에 다녀와도 진행 중인 답변을 버리지 않는다)
+# ─────────────────────────────────────────
+def show_sources(sources):
+    if sources is None:
+        return
+    st.caption(f"📚 참고 자료 {len(sources['passages'])}건 · 검색 {sources['ms']:.0f} ms")
+    if sources["passages"]:
+        with st.expander("참고한 자료 보기"):
+            for p in sources["passages"]:
+                st.markdown(f"**{p['title']}** — `{p['source']}`\n\n{p['text']}")
+
+def show_progress(job):
+    if job.text:
+        st.markdown(job.text + " ▌")
+    else:
+        st.caption(f"💭 답변을 준비하고 있어요… ({job.elapsed:.0f}초)")
+    if st.button("⏹️ 답변 중단", key="curator_cancel"):
+        job.cancel()
+
+def finish_answer(job, pending):
+    """끝난 작업의 답변을 대화 기록으로 옮긴다."""
+    text = job.text.strip()
+    if job.status == jobs.DONE and text:
+        answer = text
+        if pending["first_turn"]:
+            answer_cache.store(pending["question"], answer, MODEL_NAME, pending["temperature"],
+                               context=pending["cache_context"])
+    elif job.status == jobs.DONE:
+        answer = "죄송해요, 지금은 답변을 생성하지 못했어요. 다시 시도해 주세요."
+    elif job.status == jobs.ERROR:
+        answer = f"{text}\n\n⚠️ (응답이 중간에 끊겼어요: {job.error})" if text else f"오류가 발생했어요: {job.error}"
+    elif job.status == jobs.TIMEOUT:
+        answer = f"{text}\n\n⚠️ (응답 시간이 초과되었어요)" if text else "⏱️ 응답 시간이 초과되었어요. 다시 시도해 주세요."
+    else:  # 사용자가 중단 (빈 답변이어도 남겨야 다음 질문이 user 차례로 연달아 가지 않는다)
+        answer = f"{text}\n\n_(응답이 중단되었습니다)_" if text else "_(응답이 중단되었습니다)_"
+    curator_msgs.append({"role": "assistant", "content": answer, "sources": pending["sources"]})
+
+# 진행 중인 답변 작업 (끝났으면 대화를 그리기 전에 기록으로 옮겨 둔다)
+pending = jobs.consume_finished("curator_job", finish_answer)
+
+# 기존 대화 렌더링: 디스크로 넘어간 이전 대화는 버튼을 누른 만큼만 읽어 온다
+if curator_msgs.spilled > st.session_state.curator_show_older and st.button("⬆️ 이전 대화 더 보기"):
+    st.session_state.curator_show_older += 20
+for m in curator_msgs.older(st.session_state.curator_show_older) + curator_msgs.recent():
     with st.chat_message(m["role"]):
         st.markdown(m["content"])
+        show_sources(m.get("sources"))
 
-# 입력창
-if user_text := st.chat_input("질문을 입력하세요…"):
+# 입력창 (답변을 만드는 동안에는 잠가 둔다)
+if user_text := st.chat_input("질문을 입력하세요…", disabled=pending is not None):
     # 1) 사용자 메시지 반영
-    st.session_state.curator_msgs.append({"role": "user", "content": user_text})
+    curator_msgs.append({"role": "user", "content": user_text})
     with st.chat_message("user"):
         st.markdown(user_text)
 
     # 2) 모델 응답 생성
-    if not model:
+    # 대화 맥락이 없는 첫 질문만 공용 답변 캐시를 쓴다
+    first_turn = len(curator_msgs) == 2
+    # 참고 자료를 붙인 답변과 안 붙인 답변, 인덱스를 다시 빌드하기 전후의 답변은 서로 섞지 않는다
+    grounded = use_knowledge and knowledge_index is not None
+    cache_context = f"rag:{knowledge_k}:{knowledge_index.version}" if grounded else "plain"
+    cached = None
+    if API_KEY and first_turn and use_answer_cache:
+        cached = answer_cache.lookup(user_text, MODEL_NAME, temperature, context=cache_context,
+                                     threshold=cache_threshold)
+
+    if not API_KEY:
         answer = "⚠️ API 키가 없어 응답을 생성할 수 없습니다. `secrets.toml` 파일을 확인해주세요."
+        curator_msgs.append({"role": "assistant", "content": answer})
+        with st.chat_message("assistant"):
+            st.markdown(answer)
+    elif cached:
+        answer, score = cached
+        curator_msgs.append({"role": "assistant", "content": answer})
+        with st.chat_message("assistant"):
+            st.markdown(answer)
+            st.caption(f"⚡ 비슷한 질문에 대한 저장된 답변입니다. (유사도 {score:.2f})")
     else:
-        try:
-            gemini_history = to_gemini_history(st.session_state.curator_msgs[:-1])
-            chat = model.start_chat(history=gemini_history)
-            resp = chat.send_message(
-                user_text,
-                generation_config=genai.types.GenerationConfig(temperature=temperature)
-            )
-            answer = resp.text.strip()
-            if not answer:
-                answer = "죄송해요, 지금은 답변을 생성하지 못했어요. 다시 시도해 주세요."
-        except Exception as e:
-            answer = f"오류가 발생했어요: {e}"
-
-    # 3) 모델 응답 보관 + 출력
-    st.session_state.curator_msgs.append({"role": "assistant", "content": answer})
+        summary, recent = window_history(
+            curator_msgs.view(-1), history_budget, st.session_state.curator_summary,
+            summarize=lambda previous, transcript: llm.generate(
+                llm.GEMINI, API_KEY, SUMMARY_PROMPT_KO.format(previous=previous or "(없음)", transcript=transcript)
+            ),
+        )
+        passages, retrieval_ms = retrieve(user_text, knowledge_k) if use_knowledge else ([], 0.0)
+        messages = to_model_messages(
+            recent + [{"role": "user", "content": with_passages(user_text, passages)}], summary
+        )
+        request_id = f"curator:{len(curator_msgs)}"
+        jobs.submit_job(request_id, lambda job, messages=messages, temperature=temperature: jobs.stream_into(
+            job, lambda: llm.chat(llm.GEMINI, API_KEY, messages, system=SYSTEM_INSTRUCTION,
+                                  model=MODEL_NAME, temperature=temperature, stream=True),
+        ), kind="curator")
+        sources = None
+        if use_knowledge:
+            sources = {"ms": retrieval_ms,
+                       "passages": [{"title": p.title, "source": p.source, "text": p.text} for p in passages]}
+        st.session_state.curator_job = pending = {
+            "id": request_id, "question": user_text, "first_turn": first_turn,
+            "temperature": temperature, "cache_context": cache_context, "sources": sources,
+        }
+
+# 3) 진행 중인 답변: 조각(fragment)만 주기적으로 다시 그리고, 끝나면 전체를 다시 실행해 대화에 옮긴다
+if pending is not None:
     with st.chat_message("assistant"):
-        st.markdown(answer)
+        jobs.poll_job(jobs.get_job(pending["id"]), show_progress)
+        show_sources(pending["sources"])
 
 # 첫 화면 도움말
-if len(st.session_state.curator_msgs) == 1:
-    st.info("예시) '이집트 미라 전시를 볼 때 어떤 점을 주의하면 좋을까?' '고려청자의 대표 문양과 제작 기법은?'", icon="💡")
\ No newline at end of file
+if len(curator_msgs) == 1:
+    st.info("예시) '이집트 미라 전시를 볼 때 어떤 점을 주의하면 좋을까?' '고려청자의 대표 문양과 제작 기법은?'", icon="💡")
+
+metrics.end_rerun()
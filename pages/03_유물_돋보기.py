@@ -1,103 +1,290 @@
 
+import hashlib
+
 import streamlit as st
-import google.generativeai as genai
-from PIL import Image
-
-# --- 페이지 설정 ---
-st.set_page_config(
-    page_title="🎨 이미지 기반 유물 분석기",
-    page_icon="📜",
-    layout="wide"
-)
-
-# --- ✅ 자동 생성된 상단 메뉴를 숨기는 CSS 코드 ---
-st.markdown("""
-<style>
-    [data-testid="stSidebarNav"] {
-        display: none;
-    }
-</style>
-""", unsafe_allow_html=True)
 
+from utils import jobs, llm, metrics
+from utils.app_shell import secret, setup_page
+from utils.batch import markdown_bundle, run_bounded
+from utils.image_cache import DEFAULT_MAX_DISTANCE, dhash, get_image_cache
+from utils.image_prep import DEFAULT_MAX_EDGE, DEFAULT_QUALITY, prepare_image
+from utils.session_store import get_blob, put_blob
+
+# --- 페이지 설정 + 사이드바 메뉴 ---
+setup_page("🎨 이미지 기반 유물 분석기", "📜", metrics_page="03_magnifier", sidebar="auto")
 
-# ─────────────────────────────────────────
-# 사이드바: 내비게이션 & API 키 설정
-# ─────────────────────────────────────────
-st.sidebar.title("📚 메뉴")
-st.sidebar.page_link("01_박물관_위치_검색.py", label="1. 박물관 위치 검색", icon="🏛️")
-st.sidebar.page_link("pages/02_큐레이터_챗봇.py", label="2. 큐레이터 챗봇", icon="🗣️")
-st.sidebar.page_link("pages/03_유물_돋보기.py", label="3. 유물 돋보기", icon="🖼️")
-st.sidebar.page_link("pages/04_QnA_for_foreigners.py", label="4. Q&A for Foreigners", icon="❓")
-st.sidebar.markdown("---")
 # ─────────────────────────────────────────
 # API 키 설정 (st.secrets 사용)
 # ─────────────────────────────────────────
-try:
-    google_api_key = st.secrets["GOOGLE_API_KEY"]
+google_api_key = secret("GOOGLE_API_KEY")
+if google_api_key:
     st.sidebar.success("✅ Google API 키 로드 성공!")
-except (KeyError, FileNotFoundError):
-    google_api_key = ""
+else:
     st.sidebar.error("⚠️ `secrets.toml`에 Google API 키를 설정해주세요.")
 
+# ─────────────────────────────────────────
+# 이미지 전처리 설정 (업로드 용량 ↓ → 분석 대기 시간 ↓)
+# ─────────────────────────────────────────
+st.sidebar.title("🖼️ 이미지 설정")
+max_edge = st.sidebar.select_slider("분석용 최대 해상도(긴 변, px)", options=[512, 768, 1024, 1536, 2048, 3072],
+                                    value=DEFAULT_MAX_EDGE)
+jpeg_quality = st.sidebar.slider("JPEG 품질", 50, 95, DEFAULT_QUALITY, 5)
+
+
+# 미리보기(PIL 이미지)는 세션이 아니라 이 공용 캐시에만 두고, 오래 안 쓰면 비운다
+@st.cache_data(max_entries=32, ttl=1800, show_spinner=False)
+def prepare_upload(raw: bytes, max_edge: int, quality: int):
+    return prepare_image(raw, max_edge=max_edge, quality=quality)
+
+
+# ─────────────────────────────────────────
+# 분석 프롬프트 + 결과 캐시 (비슷한 사진은 저장된 분석 결과 재사용)
+# ─────────────────────────────────────────
+ANALYSIS_PROMPT = """
+당신은 해박한 지식을 가진 박물관의 전문 큐레이터입니다.
+주어진 이미지를 보고, 아래의 형식에 맞춰 유물 또는 예술 작품에 대해 상세하고 깊이 있게 설명해주세요.
+설명은 초등학생도 이해할 수 있도록 쉽고 흥미롭게 작성해주세요. 관련 유물이 검색되지 않을 때에는 상상에 기반해서 지어내지 말고 사실을 기반으로 정확한 정보만 제공하세요.
+
+**1. 명칭:** (이미지를 통해 추정되는 공식 명칭 또는 일반 명칭)
+
+**2. 시대와 출처:** (어느 시대에, 어디에서 만들어졌는지)
+
+**3. 재료 및 기법:** (무엇으로, 어떻게 만들어졌는지)
+
+**4. 특징과 의미:** (생김새의 특징과 그 안에 담긴 상징이나 의미)
+
+**5. 역사적 가치:** (이 유물이 왜 중요하고 대단한지)
+
+**6. 재미있는 이야기:** (이 유물과 관련된 흥미로운 일화나 사실)
+"""
+
+MODEL_NAME = llm.DEFAULT_MODELS[llm.GEMINI]
+# 프롬프트가 바뀌면 예전 분석 결과와 섞이지 않도록 캐시 공간을 나눈다
+CACHE_NAMESPACE = f"{MODEL_NAME}:{hashlib.sha1(ANALYSIS_PROMPT.encode('utf-8')).hexdigest()[:12]}"
+image_cache = get_image_cache()
+
+st.sidebar.title("🗄️ 분석 캐시")
+bypass_cache = st.sidebar.checkbox("저장된 분석 결과 무시하고 새로 분석", value=False)
+max_hash_distance = st.sidebar.slider("같은 사진 판정 기준 (해밍 거리)", 0, 16, DEFAULT_MAX_DISTANCE,
+                                      help="작을수록 더 똑같은 사진만 같은 것으로 봅니다.")
+with st.sidebar.expander("캐시 현황"):
+    cache_stats = image_cache.stats()
+    st.caption(f"저장 {cache_stats['size']}건 · 적중 {cache_stats['hits']} / 미스 {cache_stats['misses']} "
+               f"(적중률 {cache_stats['hit_rate']:.0%})")
+
+
 # --- 메인 화면 구성 ---
 st.title("🖼️ 이미지 기반 유물 돋보기")
 st.markdown("유물, 예술 작품, 역사적 사진 등을 업로드하면 AI가 큐레이터처럼 설명해 드립니다.")
 st.markdown("---")
 
-# 이미지 업로더
-uploaded_file = st.file_uploader(
-    "분석할 이미지를 업로드하세요.",
-    type=["jpg", "jpeg", "png"]
-)
+# 이미지 업로더 (일괄 모드에서는 여러 장을 한꺼번에 받는다)
+batch_mode = st.toggle("여러 장 일괄 분석", value=False, help="전시실 한 곳의 사진을 한 번에 올려 모두 분석합니다.")
+if batch_mode:
+    uploaded_files = st.file_uploader(
+        "분석할 이미지를 모두 선택하세요.",
+        type=["jpg", "jpeg", "png"],
+        accept_multiple_files=True
+    )
+    uploaded_file = None
+else:
+    uploaded_file = st.file_uploader(
+        "분석할 이미지를 업로드하세요.",
+        type=["jpg", "jpeg", "png"]
+    )
+    uploaded_files = []
 
-if uploaded_file is not None:
-    image = Image.open(uploaded_file)
-    st.image(image, caption=f"분석 대상 이미지: {uploaded_file.name}", use_column_width=True)
 
-    if st.button("🚀 이미지 분석 시작", type="primary"):
-        if not google_api_key:
-            st.error("⚠️ 사이드바에서 Google API 키를 먼저 설정해주세요.")
-            st.stop()
+# ─────────────────────────────────────────
+# 분석 작업: 모델 호출은 백그라운드 작업으로 돌리고, 화면은 진행 상황만 주기적으로 갱신한다
+# (다른 버튼을 누르거나 페이지를 옮겨도 분석 중인 결과를 버리지 않는다)
+# ─────────────────────────────────────────
+def analyze_one(part, image_hash, api_key=google_api_key):
+    # 작업 스레드에서 실행된다 (Streamlit 호출 금지). 받은 결과는 중단돼도 캐시에 남긴다
+    analysis = llm.generate(llm.GEMINI, api_key, [ANALYSIS_PROMPT, part])
+    if analysis.strip():
+        image_cache.store(image_hash, CACHE_NAMESPACE, analysis)
+    return analysis
+
 
+def batch_job(todo, max_workers):
+    def run(job):
+        tasks = run_bounded(todo, lambda task: analyze_one(task[1], task[2]), max_workers=max_workers)
         try:
-            genai.configure(api_key=google_api_key)
-            model = genai.GenerativeModel(model_name='gemini-1.5-flash')
+            for j, analysis, error in tasks:
+                job.emit((todo[j][0], analysis, None if error is None else str(error)))
+                if job.should_stop():
+                    break
+        finally:
+            tasks.close()   # 중단되면 아직 시작 안 한 사진은 보내지 않는다
+    return run
+
+
+def finish_analysis(job, pending):
+    """끝난 작업의 결과를 세션 보관소로 옮긴다."""
+    if pending["kind"] == "single":
+        if job.status == jobs.DONE:
+            put_blob("single_analysis", {"file_id": pending["file_id"], "name": pending["names"][0],
+                                         "analysis": job.result, "distance": None})
+        elif job.status == jobs.ERROR:
+            st.session_state.magnifier_notice = f"오류가 발생했습니다: {job.error}"
+        elif job.status == jobs.TIMEOUT:
+            st.session_state.magnifier_notice = "분석 시간이 초과되었습니다."
+        return
+    results = {int(i): analysis for i, analysis in pending["cached"].items()}
+    errors = []
+    for i, analysis, error in list(job.parts):
+        if error is None:
+            results[i] = analysis
+        else:
+            errors.append(f"{pending['names'][i]} — {error}")
+    put_blob("batch_results", [(pending["names"][i], results[i]) for i in sorted(results)])
+    if errors:
+        st.session_state.magnifier_notice = "일부 사진을 분석하지 못했습니다: " + " / ".join(errors)
+    elif job.status == jobs.TIMEOUT:
+        st.session_state.magnifier_notice = "분석 시간이 초과되어 일부 사진만 분석했습니다."
+
+
+def show_cancel(job):
+    if st.button("⏹️ 분석 중단", key="magnifier_cancel"):
+        job.cancel()
+
+
+def show_single_progress(job):
+    st.info(f"⏳ AI 큐레이터가 이미지를 분석하고 있습니다... 잠시만 기다려주세요. ({job.elapsed:.0f}초)")
+    show_cancel(job)
+
+
+def show_batch_progress(job, pending):
+    names, cached = pending["names"], pending["cached"]
+    finished = {i: error for i, _, error in list(job.parts)}
+    done = len(cached) + len(finished)
+    st.progress(done / len(names), text=f"{done}/{len(names)} 완료 ({job.elapsed:.0f}초)")
+    for i, name in enumerate(names):
+        if str(i) in cached:
+            st.success(f"⚡ {name} — 저장된 분석 결과 사용")
+        elif i not in finished:
+            st.info(f"⏳ {name} — 분석 중")
+        elif finished[i] is None:
+            st.success(f"✅ {name} — 분석 완료")
+        else:
+            st.error(f"❌ {name} — 오류: {finished[i]}")
+    show_cancel(job)
+
 
-            prompt = """
-            당신은 해박한 지식을 가진 박물관의 전문 큐레이터입니다.
-            주어진 이미지를 보고, 아래의 형식에 맞춰 유물 또는 예술 작품에 대해 상세하고 깊이 있게 설명해주세요.
-            설명은 초등학생도 이해할 수 있도록 쉽고 흥미롭게 작성해주세요. 관련 유물이 검색되지 않을 때에는 상상에 기반해서 지어내지 말고 사실을 기반으로 정확한 정보만 제공하세요.
+def poll_pending(pending):
+    """진행 중이면 조각(fragment)만 주기적으로 다시 그리고, 끝나면 전체를 다시 실행해 결과를 옮긴다."""
+    job = jobs.get_job(pending["id"])
+    if pending["kind"] == "batch":
+        jobs.poll_job(job, lambda job: show_batch_progress(job, pending))
+    else:
+        jobs.poll_job(job, show_single_progress)
 
-            **1. 명칭:** (이미지를 통해 추정되는 공식 명칭 또는 일반 명칭)
 
-            **2. 시대와 출처:** (어느 시대에, 어디에서 만들어졌는지)
+# 분석 작업이 끝났으면 화면을 그리기 전에 결과를 옮긴다
+pending = jobs.consume_finished("magnifier_job", finish_analysis)
+polled = False
+if notice := st.session_state.pop("magnifier_notice", None):
+    st.error(notice)
+    st.info("API 키가 정확한지, 할당량이 초과되지 않았는지 확인해보세요. 문제가 지속되면 잠시 후 다시 시도해주세요.")
 
-            **3. 재료 및 기법:** (무엇으로, 어떻게 만들어졌는지)
 
-            **4. 특징과 의미:** (생김새의 특징과 그 안에 담긴 상징이나 의미)
+if uploaded_files:
+    max_workers = st.slider("동시 분석 수", 1, 8, 4, help="한 번에 모델에 보내는 요청 수입니다.")
+    st.caption(f"{len(uploaded_files)}장 선택됨")
 
-            **5. 역사적 가치:** (이 유물이 왜 중요하고 대단한지)
+    if st.button("🚀 일괄 분석 시작", type="primary", disabled=pending is not None):
+        if not google_api_key:
+            st.error("⚠️ 사이드바에서 Google API 키를 먼저 설정해주세요.")
+            st.stop()
+
+        # 1) 전처리 + 캐시 확인: 캐시에 있는 사진은 모델을 부르지 않는다
+        cached, todo = {}, []
+        for i, f in enumerate(uploaded_files):
+            prepared = prepare_upload(f.getvalue(), max_edge, jpeg_quality)
+            image_hash = dhash(prepared.data)
+            hit = None if bypass_cache else image_cache.lookup(image_hash, CACHE_NAMESPACE, max_hash_distance)
+            if hit:
+                cached[str(i)] = hit[0]
+            else:
+                todo.append((i, prepared.as_part(), image_hash))
 
-            **6. 재미있는 이야기:** (이 유물과 관련된 흥미로운 일화나 사실)
-            """
+        # 2) 나머지는 백그라운드 작업에서 병렬 분석 (속도 제한은 llm 게이트웨이가 모든 세션에 걸쳐 적용)
+        names = [f.name for f in uploaded_files]
+        if todo:
+            request_id = "magnifier:batch:" + ",".join(f"{task[2]:x}" for task in todo)
+            jobs.submit_job(request_id, batch_job(todo, max_workers), timeout=600, kind="magnifier_batch")
+            st.session_state.magnifier_job = pending = {
+                "id": request_id, "kind": "batch", "names": names, "cached": cached,
+            }
+        else:
+            put_blob("batch_results", [(names[int(i)], cached[i]) for i in sorted(cached, key=int)])
 
-            with st.spinner("AI 큐레이터가 이미지를 분석하고 있습니다... 잠시만 기다려주세요."):
-                response = model.generate_content([prompt, image])
+    if pending is not None and pending["kind"] == "batch":
+        poll_pending(pending)
+        polled = True
 
-                st.subheader("📊 AI 큐레이터 분석 결과")
-                st.markdown(response.text)
+    # 결과는 세션 보관소에 남겨 두어 다운로드 버튼을 눌러도 사라지지 않는다 (크면 디스크에 있다)
+    batch_results = get_blob("batch_results", [])
+    if batch_results:
+        st.subheader("📊 일괄 분석 결과")
+        for name, analysis in batch_results:
+            with st.expander(name):
+                st.markdown(analysis)
+        st.download_button(
+            label="📥 전체 분석 결과 다운로드 (ZIP)",
+            data=markdown_bundle(batch_results, title="AI 큐레이터 분석 결과"),
+            file_name="분석결과_모음.zip",
+            mime="application/zip"
+        )
 
-                # 분석 결과 다운로드 버튼
-                st.download_button(
-                    label="📥 분석 결과 다운로드",
-                    data=response.text.encode('utf-8'),
-                    file_name=f"분석결과_{uploaded_file.name.split('.')[0]}.txt",
-                    mime="text/plain"
-                )
+elif uploaded_file is not None:
+    prepared = prepare_upload(uploaded_file.getvalue(), max_edge, jpeg_quality)
+    st.image(prepared.preview, caption=f"분석 대상 이미지: {uploaded_file.name}", use_column_width=True)
+    st.caption(
+        f"전송 이미지 {prepared.size[0]}×{prepared.size[1]} · "
+        f"{prepared.original_bytes / 1024:,.0f}KB → {len(prepared.data) / 1024:,.0f}KB "
+        f"({max(prepared.saved_bytes, 0) / 1024:,.0f}KB 절약)"
+    )
 
-        except Exception as e:
-            st.error(f"오류가 발생했습니다: {e}")
-            st.info("API 키가 정확한지, 할당량이 초과되지 않았는지 확인해보세요. 문제가 지속되면 잠시 후 다시 시도해주세요.")
+    if st.button("🚀 이미지 분석 시작", type="primary", disabled=pending is not None):
+        if not google_api_key:
+            st.error("⚠️ 사이드바에서 Google API 키를 먼저 설정해주세요.")
+            st.stop()
+
+        image_hash = dhash(prepared.data)
+        cached = None if bypass_cache else image_cache.lookup(image_hash, CACHE_NAMESPACE, max_hash_distance)
+        if cached:
+            put_blob("single_analysis", {"file_id": uploaded_file.file_id, "name": uploaded_file.name,
+                                         "analysis": cached[0], "distance": cached[1]})
+        else:
+            request_id = f"magnifier:{image_hash}"
+            part = prepared.as_part()
+            jobs.submit_job(request_id, lambda job, part=part, image_hash=image_hash: analyze_one(part, image_hash),
+                            kind="magnifier")
+            st.session_state.magnifier_job = pending = {
+                "id": request_id, "kind": "single", "names": [uploaded_file.name], "file_id": uploaded_file.file_id,
+            }
+
+    if pending is not None and pending["kind"] == "single":
+        poll_pending(pending)
+        polled = True
+
+    # 분석 결과는 세션 보관소에 남겨 두어 다운로드 버튼을 눌러도 사라지지 않는다
+    result = get_blob("single_analysis")
+    if result and result["file_id"] == uploaded_file.file_id:
+        st.subheader("📊 AI 큐레이터 분석 결과")
+        if result["distance"] is not None:
+            st.caption(f"⚡ 비슷한 사진의 저장된 분석 결과입니다. (해밍 거리 {result['distance']})")
+        st.markdown(result["analysis"])
+
+        # 분석 결과 다운로드 버튼
+        st.download_button(
+            label="📥 분석 결과 다운로드",
+            data=result["analysis"].encode('utf-8'),
+            file_name=f"분석결과_{result['name'].split('.')[0]}.txt",
+            mime="text/plain"
+        )
 
 else:
     st.info("🖼️ 분석하고 싶은 유물이나 예술 작품 이미지를 업로드 해주세요.")
@@ -108,4 +295,11 @@ else:
     - **미술 작품**: 레오나르도 다빈치의 '모나리자', 김홍도의 '씨름' 등
     - **역사적 사진**: 흑백으로 된 옛날 사진이나 역사적 사건 현장 사진
     """)
-    #streamlit run app.py
\ No newline at end of file
+    #streamlit run app.py
+
+# 모드를 바꾸거나 사진을 지워도 진행 중인 작업은 계속 지켜보다가 끝나면 결과를 옮긴다
+if pending is not None and not polled:
+    st.caption(f"🔄 이전에 시작한 분석({', '.join(pending['names'])})이 아직 진행 중입니다.")
+    poll_pending(pending)
+
+metrics.end_rerun()
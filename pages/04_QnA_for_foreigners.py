@@ -1,77 +1,50 @@
 
 import streamlit as st
-import google.generativeai as genai
-from openai import OpenAI
-
-# --- 페이지 설정 ---
-st.set_page_config(
-    page_title="Museum Q&A",
-    page_icon="❓",
-    layout="wide"
-)
-
-# --- ✅ 자동 생성된 상단 메뉴를 숨기는 CSS 코드 ---
-st.markdown("""
-<style>
-    [data-testid="stSidebarNav"] {
-        display: none;
-    }
-</style>
-""", unsafe_allow_html=True)
 
-# ─────────────────────────────────────────
-# 사이드바: 내비게이션 & API 키 설정
-# ─────────────────────────────────────────
-st.sidebar.title("📚 메뉴")
-st.sidebar.page_link("01_박물관_위치_검색.py", label="1. 박물관 위치 검색", icon="🏛️")
-st.sidebar.page_link("pages/02_큐레이터_챗봇.py", label="2. 큐레이터 챗봇", icon="🗣️")
-st.sidebar.page_link("pages/03_유물_돋보기.py", label="3. 유물 돋보기", icon="🖼️")
-st.sidebar.page_link("pages/04_QnA_for_foreigners.py", label="4. Q&A for Foreigners", icon="❓")
-st.sidebar.markdown("---")
+from utils import faq_bundles, jobs, llm, metrics
+from utils.app_shell import secret, setup_page
+from utils.faq_index import DEFAULT_THRESHOLD as FAQ_THRESHOLD, get_faq_index, grounding_text
+from utils.hedge import DEFAULT_HEDGE_AFTER, hedged_chat
+from utils.history import SUMMARY_PROMPT_EN, new_summary_state, window_history
+from utils.session_store import session_log
 
+# --- 페이지 설정 + 사이드바 메뉴 ---
+setup_page("Museum Q&A", "❓", metrics_page="04_qna", sidebar="auto")
 
 st.sidebar.title("🔐 API Keys")
 st.sidebar.info("Solar API 키를 입력하면 더 정확한 답변을 제공합니다.")
-try:
-    google_api_key = st.secrets.get("GOOGLE_API_KEY")
-    solar_api_key = st.secrets.get("SOLAR_API_KEY")
-    if google_api_key:
-        st.sidebar.success("Google API Key loaded!")
-    if solar_api_key:
-        st.sidebar.success("Solar API Key loaded!")
-except (KeyError, FileNotFoundError):
-    google_api_key = None
-    solar_api_key = None
+google_api_key = secret("GOOGLE_API_KEY")
+solar_api_key = secret("SOLAR_API_KEY")
+if google_api_key:
+    st.sidebar.success("Google API Key loaded!")
+if solar_api_key:
+    st.sidebar.success("Solar API Key loaded!")
 
 google_api_key_input = st.sidebar.text_input("Google API Key (Optional)", type="password", value=google_api_key or "")
 solar_api_key_input = st.sidebar.text_input("Solar API Key (Recommended)", type="password", value=solar_api_key or "")
 st.sidebar.markdown("[Upstage Solar API 키 발급받기](https://console.upstage.ai/services/solar)")
+history_budget = st.sidebar.slider("대화 기억 예산(토큰)", 500, 8000, 1500, 250,
+                                   help="이 양을 넘는 오래된 대화는 요약으로 접어서 보냅니다.")
+faq_threshold = st.sidebar.slider("FAQ 바로 답변 기준", 0.5, 1.0, FAQ_THRESHOLD, 0.05,
+                                  help="질문이 FAQ와 이만큼 일치하면 모델 없이 FAQ 답변을 보여줍니다.")
+hedging = hedge_after = None
+if solar_api_key_input and google_api_key_input:
+    hedging = st.sidebar.toggle("Solar + Gemini 헤징", value=True,
+                                help="Solar 답변이 늦게 시작하거나 실패하면 Gemini에도 요청해 먼저 오는 답변을 씁니다.")
+    hedge_after = st.sidebar.slider("Gemini 추가 요청까지 기다릴 시간(초)", 0.5, 10.0, DEFAULT_HEDGE_AFTER, 0.5,
+                                    disabled=not hedging)
 
 
 # ─────────────────────────────────────────
-# 다국어 Q&A 데이터
+# 다국어 Q&A 데이터: data/faq/source.json 을 빌드한 언어별 묶음 (utils/faq_bundles.py)
+# 고른 언어의 묶음 하나만 읽고, 프로세스 안에서 재사용한다
 # ─────────────────────────────────────────
-translations = {
-    "English": {
-        "title": "❓ Q&A for Visitors",
-        "info": "Here are some frequently asked questions to help you plan your visit.",
-        "qna": [
-            {"q": "What are the museum's opening hours?", "a": "The museum is open from 10:00 AM to 6:00 PM on Tuesdays, Thursdays, and Fridays. On Wednesdays and Saturdays, it's open until 7:00 PM. On Sundays and holidays, it closes at 6:00 PM. Last admission is 30 minutes before closing."},
-            {"q": "Is there an admission fee?", "a": "Admission to the main exhibition halls is free. Special exhibitions may require a paid ticket."},
-            {"q": "When is the museum closed?", "a": "The museum is closed on January 1st, Seollal (Lunar New Year's Day), Chuseok (Korean Thanksgiving Day), and every Monday."},
-            {"q": "Are there guided tours in English?", "a": "Yes, English guided tours are available. Please check the official website for the latest schedule. Audio guides in English can also be rented."},
-            {"q": "How do I get to the museum?", "a": "Take Subway Line 4 or the Gyeongui-Jungang Line to Ichon Station and use Exit 2. The museum is connected via an underpass called the 'Museum Path'."}
-        ],
-        "chat_title": "💬 Ask a Question in Real-Time",
-        "chat_placeholder": "Ask anything about the museum, e.g., 'Are there any cafes inside?'"
-    },
-    # 다른 언어 번역 데이터는 공간 절약을 위해 생략 (기존 코드와 동일)
-}
+languages = faq_bundles.available_languages()
 
 # --- 메인 화면 구성 ---
 
-lang_option = st.selectbox("Select Language", options=list(translations.keys()))
-content = translations[lang_option]
+lang_option = st.selectbox("Select Language", options=list(languages), format_func=languages.get)
+content = faq_bundles.load_bundle(lang_option)
 st.title(content["title"])
 st.info(content["info"])
 
@@ -98,67 +71,136 @@ Your primary goal is to answer visitor questions accurately.
 6.  Respond in the language of the user's question.
 """
 
-if "qna_messages" not in st.session_state:
-    st.session_state.qna_messages = []
+# 대화는 세션 보관소에 둔다 (메모리 상한을 넘는 오래된 메시지는 디스크로 넘어간다)
+qna_messages = session_log("qna")
+st.session_state.setdefault("qna_show_older", 0)
+if "qna_summary" not in st.session_state:
+    st.session_state.qna_summary = new_summary_state()
 
-# 모델 선택 로직
-client = None
-model_name = ""
+# 모델 선택 로직 (클라이언트는 utils/llm.py 게이트웨이가 재사용)
+# 헤징을 켜면 Solar가 주, Gemini가 보조 제공자다
+provider, provider_key = None, ""
+attempts = []
 if solar_api_key_input:
-    client = OpenAI(api_key=solar_api_key_input, base_url="https://api.upstage.ai/v1/solar")
-    model_name = "solar-1-mini-chat"
-    st.info("🤖 Solar 모델로 답변합니다.")
-elif google_api_key_input:
-    try:
-        genai.configure(api_key=google_api_key_input)
-        client = genai.GenerativeModel('gemini-1.5-flash', system_instruction=SYSTEM_PROMPT)
-        model_name = "gemini-1.5-flash"
-        st.info("🤖 Gemini 모델로 답변합니다.")
-    except Exception as e:
-        st.error(f"Google 모델 초기화 오류: {e}")
-        client = None
-
-# 이전 대화 내용 표시
-for message in st.session_state.qna_messages:
+    provider, provider_key = llm.SOLAR, solar_api_key_input
+    attempts.append((llm.SOLAR, solar_api_key_input))
+if google_api_key_input and (hedging or not provider):
+    attempts.append((llm.GEMINI, google_api_key_input))
+    if not provider:
+        provider, provider_key = llm.GEMINI, google_api_key_input
+if len(attempts) > 1:
+    st.info(f"🤖 Solar 모델로 답변합니다. ({hedge_after:g}초 안에 시작하지 않거나 실패하면 Gemini도 함께 요청합니다)")
+elif provider:
+    st.info(f"🤖 {'Solar' if provider == llm.SOLAR else 'Gemini'} 모델로 답변합니다.")
+
+# ─────────────────────────────────────────
+# 답변 생성: 모델 호출은 백그라운드 작업으로 돌리고, 화면은 진행 상황만 주기적으로 갱신한다
+# (다시 입력하거나 다른 페이지에 다녀와도 진행 중인 답변을 버리지 않는다)
+# ─────────────────────────────────────────
+ASSISTANT_AVATAR = "https://www.harpersbazaar.co.kr/resources/online/online_image/2025/07/04/1f9f0dc0-bab9-4d50-8d68-cc5deebd7924.jpg"
+
+
+def show_progress(job):
+    if job.text:
+        st.markdown(job.text + " ▌")
+    else:
+        st.caption(f"💭 Preparing an answer… ({job.elapsed:.0f}s)")
+    if st.button("⏹️ Stop", key="qna_cancel"):
+        job.cancel()
+
+
+def finish_answer(job, pending):
+    """끝난 작업의 답변을 대화 기록으로 옮기고, 오류는 다음 화면에 한 번 보여 준다.
+
+    답변이 비어 있어도 assistant 차례는 꼭 남긴다. (user 차례가 연달아 모델에 가지 않게)
+    """
+    text = job.text.strip()
+    if job.status == jobs.DONE:
+        answer = text or "Sorry, I couldn't prepare an answer just now. Please try again."
+    elif job.status == jobs.CANCELLED:
+        answer = f"{text}\n\n_(stopped)_" if text else "_(stopped)_"
+    else:
+        if job.status == jobs.ERROR:
+            st.session_state.qna_notice = (f"답변이 중간에 끊겼습니다: {job.error}" if text
+                                           else f"답변 생성 중 오류가 발생했습니다: {job.error}")
+        else:
+            st.session_state.qna_notice = "답변 시간이 초과되었습니다. 다시 시도해 주세요."
+        answer = f"{text} …" if text else "_(no answer)_"
+    qna_messages.append({"role": "assistant", "content": answer})
+
+
+# 답변 작업이 끝났으면 대화를 그리기 전에 기록으로 옮긴다
+pending = jobs.consume_finished("qna_job", finish_answer)
+
+# 이전 대화 내용 표시 (디스크로 넘어간 부분은 버튼을 누른 만큼만 읽어 온다)
+if qna_messages.spilled > st.session_state.qna_show_older and st.button("⬆️ Show earlier messages"):
+    st.session_state.qna_show_older += 20
+for message in qna_messages.older(st.session_state.qna_show_older) + qna_messages.recent():
     role = message["role"]
-    avatar_url = "https://www.harpersbazaar.co.kr/resources/online/online_image/2025/07/04/1f9f0dc0-bab9-4d50-8d68-cc5deebd7924.jpg" if role == "assistant" else None
+    avatar_url = ASSISTANT_AVATAR if role == "assistant" else None
     with st.chat_message(role, avatar=avatar_url):
         st.markdown(message["content"])
-
-# 사용자 입력 처리
-if prompt := st.chat_input(content["chat_placeholder"]):
-    if not client:
+if notice := st.session_state.pop("qna_notice", None):
+    st.error(notice)
+
+# 사용자 입력 처리 (답변을 만드는 동안에는 잠가 둔다)
+if prompt := st.chat_input(content["chat_placeholder"], disabled=pending is not None):
+    # 먼저 로컬 FAQ 인덱스에서 찾아본다 (인덱스는 언어별로 한 번만 만든다)
+    faq_index = get_faq_index(tuple((item["q"], item["a"]) for item in content["qna"]))
+    faq_hits = faq_index.search(prompt)
+    faq_question = faq_answer = None
+    if faq_index.confident(prompt, faq_hits, faq_threshold):
+        faq_question, faq_answer = faq_index.entries[faq_hits[0][1]]
+    metrics.inc("cache_lookups_total", cache="faq", result="miss" if faq_answer is None else "hit")
+
+    if not provider and faq_answer is None:
         st.error("API 키가 설정되지 않았습니다. 사이드바에서 API 키를 입력해주세요.")
     else:
-        st.session_state.qna_messages.append({"role": "user", "content": prompt})
+        qna_messages.append({"role": "user", "content": prompt})
         with st.chat_message("user"):
             st.markdown(prompt)
 
-        with st.chat_message("assistant", avatar="https://www.harpersbazaar.co.kr/resources/online/online_image/2025/07/04/1f9f0dc0-bab9-4d50-8d68-cc5deebd7924.jpg"):
-            with st.spinner("AI가 답변을 생성 중입니다..."):
-                try:
-                    answer = ""
-                    history_for_model = [{"role": m["role"], "content": m["content"]} for m in st.session_state.qna_messages]
-
-                    if model_name == "solar-1-mini-chat":
-                        # Solar 모델 호출
-                        system_message = {"role": "system", "content": SYSTEM_PROMPT}
-                        response = client.chat.completions.create(
-                            model=model_name,
-                            messages=[system_message] + history_for_model
-                        )
-                        answer = response.choices[0].message.content
-                    elif model_name == "gemini-1.5-flash":
-                        # Gemini 모델 호출
-                        chat = client.start_chat(history=[
-                            {"role": "user" if m["role"] == "user" else "model", "parts": [m["content"]]}
-                            for m in st.session_state.qna_messages[:-1]
-                        ])
-                        response = chat.send_message(prompt)
-                        answer = response.text
-                    
-                    st.markdown(answer)
-                    st.session_state.qna_messages.append({"role": "assistant", "content": answer})
-
-                except Exception as e:
-                    st.error(f"답변 생성 중 오류가 발생했습니다: {e}")
\ No newline at end of file
+        if faq_answer is not None:
+            # FAQ와 충분히 일치 → 모델 호출 없이 준비된 답변 사용
+            qna_messages.append({"role": "assistant", "content": faq_answer})
+            with st.chat_message("assistant", avatar=ASSISTANT_AVATAR):
+                st.markdown(faq_answer)
+                st.caption(f"📚 FAQ: {faq_question}")
+        else:
+            def summarize(previous, transcript):
+                summary_prompt = SUMMARY_PROMPT_EN.format(previous=previous or "(none)", transcript=transcript)
+                return llm.generate(provider, provider_key, summary_prompt)
+
+            # 예산을 넘는 오래된 대화는 요약으로 접고, 최근 대화만 그대로 보낸다
+            summary, recent = window_history(
+                qna_messages.view(-1), history_budget, st.session_state.qna_summary, summarize
+            )
+            summary_turns = [
+                {"role": "user", "content": f"[Earlier conversation summary]\n{summary}"},
+                {"role": "assistant", "content": "Understood. I will keep that in mind."},
+            ] if summary else []
+            # 애매하게 걸린 FAQ 항목은 참고 자료로 질문에 붙인다 (대화 기록에는 원래 질문만 남김)
+            question = prompt
+            if faq_hits:
+                question += (
+                    "\n\n[Reference: related entries from the official museum FAQ]\n"
+                    + grounding_text(faq_index, faq_hits)
+                )
+            messages = summary_turns + recent + [{"role": "user", "content": question}]
+
+            def answer_job(job, attempts=tuple(attempts), messages=messages, hedge_after=hedge_after):
+                if len(attempts) > 1:
+                    return hedged_chat(job, list(attempts), messages, system=SYSTEM_PROMPT, hedge_after=hedge_after)
+                provider, provider_key = attempts[0]
+                return jobs.stream_into(job, lambda: llm.chat(provider, provider_key, messages,
+                                                              system=SYSTEM_PROMPT, stream=True))
+
+            pending = st.session_state.qna_job = {"id": f"qna:{len(qna_messages)}"}
+            jobs.submit_job(pending["id"], answer_job, kind="qna")
+
+# 진행 중인 답변: 조각(fragment)만 주기적으로 다시 그리고, 끝나면 전체를 다시 실행해 대화에 옮긴다
+if pending is not None:
+    with st.chat_message("assistant", avatar=ASSISTANT_AVATAR):
+        jobs.poll_job(jobs.get_job(pending["id"]), show_progress)
+
+metrics.end_rerun()
@@ -0,0 +1,125 @@
+import hmac
+
+import streamlit as st
+
+from utils import metrics
+from utils.app_shell import secret, setup_page
+from utils.cache import all_stats
+from utils.image_cache import get_image_cache
+from utils.jobs import get_job_executor
+from utils.ratelimit import all_flight_stats, all_limiter_stats
+from utils.semantic_cache import get_answer_cache
+from utils.session_store import get_session_store
+
+# 운영자용 숨은 페이지: 사이드바 메뉴에는 링크가 없고 주소(/운영_지표)로만 들어온다
+setup_page("운영 지표", "📈", metrics_page="99_ops", nav=False)
+
+# ─────────────────────────────────────────
+# 접근 확인: secrets.toml 의 OPERATOR_TOKEN 과 같아야 볼 수 있다
+# (사이드바에서 숨긴 것만으로는 막히지 않으므로, 토큰이 없으면 아무것도 보여 주지 않는다)
+# ─────────────────────────────────────────
+OPERATOR_TOKEN = secret("OPERATOR_TOKEN")
+
+st.title("📈 운영 지표")
+if not OPERATOR_TOKEN:
+    st.error("`OPERATOR_TOKEN`이 설정되지 않아 이 페이지를 열 수 없습니다. `secrets.toml`에 토큰을 추가하세요.")
+    st.stop()
+token = st.text_input("운영자 토큰", type="password")
+if not hmac.compare_digest(token.encode("utf-8"), OPERATOR_TOKEN.encode("utf-8")):
+    st.info("운영자 토큰을 입력하면 지표를 볼 수 있습니다.")
+    st.stop()
+
+
+def fmt_labels(labels):
+    return ", ".join(f"{k}={v}" for k, v in labels.items())
+
+
+snap = metrics.snapshot()
+col1, col2, col3 = st.columns([1, 1, 2])
+col1.button("🔄 새로고침", use_container_width=True)
+if col2.button("지표 초기화", use_container_width=True):
+    metrics.reset()
+    st.rerun()
+col3.caption(f"수집 시작 후 {metrics.uptime_seconds() / 60:.0f}분 · "
+             f"지연 시간은 최근 {metrics.WINDOW}건 기준 분위수")
+
+# ─────────────────────────────────────────
+# 지연 시간·크기 (히스토그램)
+# ─────────────────────────────────────────
+st.subheader("⏱️ 지연 시간 · 크기")
+rows = []
+for h in snap["histograms"]:
+    # 시간 지표는 ms로, 그 밖(바이트·글자 수)은 그대로 보여 준다
+    scale = 1000 if h["name"].endswith("_seconds") else 1
+    rows.append({
+        "지표": h["name"].replace("_seconds", "_ms") if scale != 1 else h["name"],
+        "라벨": fmt_labels(h["labels"]),
+        "건수": h["count"],
+        "p50": round(h["p50"] * scale, 1),
+        "p95": round(h["p95"] * scale, 1),
+        "p99": round(h["p99"] * scale, 1),
+        "최대": round(h["max"] * scale, 1),
+    })
+if rows:
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+else:
+    st.caption("아직 기록된 값이 없습니다.")
+
+# ─────────────────────────────────────────
+# 카운터 (오류·토큰·캐시 조회)
+# ─────────────────────────────────────────
+st.subheader("🔢 카운터")
+if snap["counters"]:
+    st.dataframe([{"지표": c["name"], "라벨": fmt_labels(c["labels"]), "값": c["value"]} for c in snap["counters"]],
+                 use_container_width=True, hide_index=True)
+else:
+    st.caption("아직 기록된 값이 없습니다.")
+
+# ─────────────────────────────────────────
+# 속도 제한 · 캐시
+# ─────────────────────────────────────────
+col1, col2 = st.columns(2)
+with col1:
+    st.subheader("🚦 속도 제한")
+    limiter_rows = [{"대상": name, **stat} for name, stat in all_limiter_stats().items()]
+    limiter_rows += [{"대상": f"single-flight:{name}", **stat} for name, stat in all_flight_stats().items()]
+    limiter_rows.append({"대상": "background-jobs", **get_job_executor().stats()})
+    if limiter_rows:
+        st.dataframe(limiter_rows, use_container_width=True, hide_index=True)
+    else:
+        st.caption("아직 외부 API 호출이 없습니다.")
+with col2:
+    st.subheader("🗄️ 캐시")
+    cache_rows = [{"캐시": name, **stat} for name, stat in all_stats().items()]
+    cache_rows.append({"캐시": "answers", **get_answer_cache().stats()})
+    cache_rows.append({"캐시": "image_analysis", **get_image_cache().stats()})
+    st.dataframe(cache_rows, use_container_width=True, hide_index=True)
+
+# ─────────────────────────────────────────
+# 세션 메모리 (대화 기록·분석 결과 보관소)
+# ─────────────────────────────────────────
+st.subheader("🧠 세션 메모리")
+store = get_session_store()
+store_stats = store.stats()
+st.caption(f"세션 {store_stats['sessions']}개 · 메모리 {store_stats['memory_bytes'] / 1024:,.0f}KB "
+           f"(전역 상한 {store_stats['global_limit'] / 1024 / 1024:.0f}MB, "
+           f"세션 상한 {store_stats['session_limit'] / 1024:.0f}KB) · "
+           f"디스크 {store_stats['disk_bytes'] / 1024:,.0f}KB · "
+           f"디스크로 넘긴 메시지 {store_stats['spilled_messages']}건 · 만료된 세션 {store_stats['expired_sessions']}개")
+session_rows = store.session_stats()
+if session_rows:
+    st.dataframe(session_rows, use_container_width=True, hide_index=True)
+else:
+    st.caption("아직 대화를 시작한 세션이 없습니다.")
+
+# ─────────────────────────────────────────
+# 내보내기
+# ─────────────────────────────────────────
+st.subheader("📤 내보내기")
+col1, col2 = st.columns(2)
+col1.download_button("Prometheus 텍스트", metrics.prometheus_text(), file_name="metrics.prom",
+                     mime="text/plain", use_container_width=True)
+col2.download_button("JSONL", metrics.jsonl(), file_name="metrics.jsonl",
+                     mime="application/x-ndjson", use_container_width=True)
+with st.expander("Prometheus 텍스트 미리보기"):
+    st.code(metrics.prometheus_text(), language="text")
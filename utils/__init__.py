@@ -0,0 +1 @@
+"""박물관 앱 페이지들이 함께 쓰는 공용 모듈 모음."""
@@ -0,0 +1,66 @@
+"""모든 페이지가 함께 쓰는 화면 틀: 페이지 설정, 기본 CSS, 사이드바 메뉴, secrets 읽기.
+
+페이지 맨 위에서 ``setup_page(...)`` 한 번만 부르면 된다. 무거운 SDK(google.generativeai,
+openai, folium)는 여기서도, 페이지에서도 읽지 않고 실제로 호출할 때 처음 읽는다
+(``utils/llm.py``, ``utils/museum_map.py``). 그래서 컨테이너 재시작 직후 첫 화면이 빨리 뜬다.
+"""
+
+import threading
+from typing import Dict, Optional
+
+import streamlit as st
+
+from utils import metrics
+
+NAV_PAGES = (
+    ("01_박물관_위치_검색.py", "1. 박물관 위치 검색", "🏛️"),
+    ("pages/02_큐레이터_챗봇.py", "2. 큐레이터 챗봇", "🗣️"),
+    ("pages/03_유물_돋보기.py", "3. 유물 돋보기", "🖼️"),
+    ("pages/04_QnA_for_foreigners.py", "4. Q&A for Foreigners", "❓"),
+)
+
+# 자동 생성되는 상단 메뉴를 숨긴다 (대신 사이드바에 직접 만든 메뉴를 보여 준다)
+BASE_CSS = """
+<style>
+    [data-testid="stSidebarNav"] {
+        display: none;
+    }
+</style>
+"""
+
+
+def setup_page(title: str, icon: str, metrics_page: str, layout: str = "wide",
+               sidebar: str = "expanded", nav: bool = True) -> None:
+    """페이지 설정 + CSS + 사이드바 메뉴. 스크립트 맨 위에서 부른다."""
+    st.set_page_config(page_title=title, page_icon=icon, layout=layout, initial_sidebar_state=sidebar)
+    metrics.begin_rerun(metrics_page)
+    st.markdown(BASE_CSS, unsafe_allow_html=True)
+    if nav:
+        st.sidebar.title("📚 메뉴")
+        for path, label, page_icon in NAV_PAGES:
+            st.sidebar.page_link(path, label=label, icon=page_icon)
+        st.sidebar.markdown("---")
+
+
+# ─────────────────────────────────────────
+# secrets: 한 번 읽은 값은 프로세스 전체에서 재사용
+# (키를 바꾸면 앱을 다시 시작해야 반영된다)
+# ─────────────────────────────────────────
+_secrets: Dict[str, str] = {}
+_secrets_lock = threading.Lock()
+
+
+def secret(name: str, default: str = "") -> str:
+    """``secrets.toml`` 값. 없거나 파일이 없으면 ``default``."""
+    with _secrets_lock:
+        if name in _secrets:
+            return _secrets[name]
+    try:
+        value: Optional[str] = st.secrets.get(name)
+    except FileNotFoundError:
+        value = None
+    if not value:
+        return default  # 없는 값은 기억하지 않는다 (나중에 추가될 수 있음)
+    with _secrets_lock:
+        _secrets[name] = value
+    return value
@@ -0,0 +1,56 @@
+"""여러 작업을 제한된 동시성으로 실행하고, 끝나는 순서대로 결과를 돌려준다."""
+
+import contextvars
+import io
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from utils.ratelimit import TokenBucket
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def run_bounded(items: Iterable[T], fn: Callable[[T], R], max_workers: int = 4,
+                limiter: Optional[TokenBucket] = None) -> Iterator[Tuple[int, Optional[R], Optional[Exception]]]:
+    """``(순번, 결과, 예외)`` 를 완료되는 순서대로 내보낸다.
+
+    결과를 받는 쪽(Streamlit 스크립트 스레드)에서 진행 상황을 바로 그릴 수 있다.
+    """
+    def call(item: T) -> R:
+        if limiter is not None:
+            limiter.acquire()
+        return fn(item)
+
+    pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="batch")
+    try:
+        futures = {pool.submit(contextvars.copy_context().run, call, item): i for i, item in enumerate(items)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                yield i, future.result(), None
+            except Exception as e:
+                yield i, None, e
+    finally:
+        # 도중에 중단되면(재실행 등) 아직 시작 안 한 작업은 취소한다
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def markdown_bundle(results: List[Tuple[str, str]], title: str = "분석 결과") -> bytes:
+    """[(파일 이름, 마크다운)] → 개별 .md 파일과 전체 모음(index.md)을 담은 ZIP."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        index = [f"# {title}\n"]
+        used = set()
+        for name, text in results:
+            stem = name.rsplit(".", 1)[0] or "image"
+            filename, n = f"{stem}.md", 1
+            while filename in used:
+                n += 1
+                filename = f"{stem}_{n}.md"
+            used.add(filename)
+            zf.writestr(filename, f"# {name}\n\n{text}\n")
+            index.append(f"\n## {name}\n\n{text}\n")
+        zf.writestr("index.md", "".join(index))
+    return buf.getvalue()
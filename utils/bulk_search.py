@@ -0,0 +1,135 @@
+"""여러 주소를 한꺼번에 지오코딩하고 주변 박물관을 찾는 일괄 검색.
+
+학교·숙소 수십 곳의 주소를 붙여 넣거나 CSV로 올리면, 주소마다
+(지오코딩 → 주변 박물관 검색)을 제한된 동시성으로 실행한다. 두 단계 모두
+``utils/kakao.py`` 의 캐시·속도 제한을 그대로 거치므로 이미 찾아본 주소는 네트워크를 타지 않는다.
+여러 주소에서 겹쳐 나온 박물관은 하나로 합치고, 가장 가까운 주소와 거리를 남긴다.
+"""
+
+import csv
+import io
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utils.batch import run_bounded
+from utils.kakao import geocode_address_kakao, normalize_address, search_museums_around
+
+MAX_ADDRESSES = 200
+ADDRESS_COLUMNS = ("address", "주소", "도로명주소", "addr")
+LABEL_COLUMNS = ("name", "label", "이름", "학교", "숙소", "기관명")
+
+AddressRow = Tuple[str, str]   # (이름, 주소)
+
+
+# ─────────────────────────────────────────
+# 입력 읽기: 붙여 넣은 목록 / CSV
+# ─────────────────────────────────────────
+def dedupe_rows(rows: List[AddressRow]) -> List[AddressRow]:
+    seen, out = set(), []
+    for label, address in rows:
+        address = normalize_address(address)
+        if address and address not in seen:
+            seen.add(address)
+            out.append((label.strip() or address, address))
+    return out[:MAX_ADDRESSES]
+
+
+def parse_address_text(text: str) -> List[AddressRow]:
+    """한 줄에 주소 하나. ``이름 | 주소`` 처럼 쓰면 이름을 붙일 수 있다. (#으로 시작하면 무시)"""
+    rows = []
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        label, _, address = line.rpartition("|")
+        rows.append((label, address))
+    return dedupe_rows(rows)
+
+
+def parse_address_csv(raw: bytes) -> List[AddressRow]:
+    """주소 열(address/주소 …)과 이름 열(name/학교/숙소 …)을 찾아 읽는다. 머리글이 없으면 첫 열이 주소."""
+    for encoding in ("utf-8-sig", "cp949"):
+        try:
+            text = raw.decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        raise ValueError("CSV 파일을 UTF-8 또는 CP949로 읽을 수 없습니다.")
+
+    records = [r for r in csv.reader(io.StringIO(text)) if any(cell.strip() for cell in r)]
+    if not records:
+        return []
+    header = [cell.strip().lower() for cell in records[0]]
+    addr_col = next((header.index(c) for c in ADDRESS_COLUMNS if c in header), None)
+    label_col = next((header.index(c) for c in LABEL_COLUMNS if c in header), None)
+    if addr_col is None:   # 머리글 없음 → 모든 행이 데이터, 첫 열이 주소
+        addr_col, body = 0, records
+    else:
+        body = records[1:]
+    rows = []
+    for r in body:
+        if addr_col < len(r):
+            label = r[label_col] if label_col is not None and label_col < len(r) else ""
+            rows.append((label, r[addr_col]))
+    return dedupe_rows(rows)
+
+
+# ─────────────────────────────────────────
+# 검색: 주소마다 지오코딩 → 주변 검색 (작업 스레드에서 실행, Streamlit 호출 금지)
+# ─────────────────────────────────────────
+def search_one(row: AddressRow, kakao_key: str, radius_m: int) -> Dict:
+    label, address = row
+    result = {"label": label, "address": address, "lat": None, "lon": None, "museums": [], "message": ""}
+    latlon, msg = geocode_address_kakao(address, kakao_key)
+    if not latlon:
+        result["message"] = msg
+        return result
+    result["lat"], result["lon"] = latlon
+    result["museums"], result["message"] = search_museums_around(*latlon, kakao_key, radius_m=radius_m)
+    return result
+
+
+def bulk_search(rows: List[AddressRow], kakao_key: str, radius_m: int,
+                max_workers: int = 4) -> Iterator[Tuple[int, Dict]]:
+    """``(순번, 결과)`` 를 끝나는 순서대로 내보낸다. 예외도 결과의 ``message`` 로 바꿔 준다."""
+    for i, result, error in run_bounded(rows, lambda row: search_one(row, kakao_key, radius_m),
+                                        max_workers=max_workers):
+        if error is not None:
+            label, address = rows[i]
+            result = {"label": label, "address": address, "lat": None, "lon": None, "museums": [],
+                      "message": f"❌ 검색 실패: {error}"}
+        yield i, result
+
+
+# ─────────────────────────────────────────
+# 합치기 + 내보내기
+# ─────────────────────────────────────────
+def _museum_id(m: Dict) -> str:
+    return str(m.get("id") or f"{m['name']}|{m['address']}")
+
+
+def aggregate(results: List[Dict]) -> List[Dict]:
+    """여러 주소의 결과를 박물관 하나당 한 줄로 합친다. (여러 출발지에서 가까운 곳 먼저, 그다음 거리순)"""
+    merged: Dict[str, Dict] = {}
+    for r in results:
+        for m in r["museums"]:
+            key = _museum_id(m)
+            row: Optional[Dict] = merged.get(key)
+            if row is None:
+                row = merged[key] = {**m, "nearest": r["label"], "origins": []}
+            elif m["distance"] < row["distance"]:
+                row.update(distance=m["distance"], nearest=r["label"])
+            if r["label"] not in row["origins"]:
+                row["origins"].append(r["label"])
+    return sorted(merged.values(), key=lambda x: (-len(x["origins"]), x["distance"]))
+
+
+def museums_csv(museums: List[Dict]) -> bytes:
+    """엑셀에서 바로 열리도록 BOM을 붙인 UTF-8 CSV."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["박물관명", "주소", "가장 가까운 출발지", "거리(m)", "출발지 수", "출발지", "위도", "경도", "링크"])
+    for m in museums:
+        writer.writerow([m["name"], m["address"], m["nearest"], m["distance"], len(m["origins"]),
+                         " / ".join(m["origins"]), m["lat"], m["lon"], m["url"]])
+    return buf.getvalue().encode("utf-8-sig")
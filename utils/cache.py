@@ -0,0 +1,220 @@
+"""프로세스 전체에서 공유하는 TTL + LRU 캐시 (SQLite 디스크 영속화).
+
+Streamlit은 스크립트를 매번 다시 실행하지만, import된 모듈은 프로세스가
+살아 있는 동안 유지된다. 그래서 여기 만든 캐시는 모든 세션이 함께 쓰고,
+디스크에도 기록되므로 서버를 재시작해도 살아남는다.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from utils import metrics
+
+# ─────────────────────────────────────────
+# 저장 위치
+# ─────────────────────────────────────────
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.environ.get("MUSEUM_CACHE_DIR", os.path.join(_BASE_DIR, ".cache"))
+CACHE_DB = "cache.sqlite3"
+
+_MISSING = object()
+TOUCH_FRACTION = 0.1   # 디스크 적중 시 사용 시각은 TTL의 이 비율보다 오래됐을 때만 갱신
+EVICT_SLACK = 0.1      # 디스크 항목이 상한의 이 비율만큼 넘치면 한꺼번에 정리
+
+
+def open_db(filename: str = CACHE_DB) -> sqlite3.Connection:
+    """캐시 폴더 안의 SQLite 파일을 연다. (여러 스레드에서 잠금과 함께 사용)
+
+    폴더를 만들 수 없을 때도 ``sqlite3.Error`` 로 알려, 부르는 쪽이 한 가지 예외만 처리하면 되게 한다.
+    """
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+    except OSError as e:
+        raise sqlite3.OperationalError(f"캐시 폴더를 만들 수 없습니다: {CACHE_DIR} ({e})") from e
+    conn = sqlite3.connect(os.path.join(CACHE_DIR, filename), check_same_thread=False, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class TTLCache:
+    """메모리(LRU) + 디스크(SQLite) 2단 캐시.
+
+    - 메모리: 최근 사용 순으로 ``maxsize`` 개까지 보관
+    - 디스크: ``disk_maxsize`` 개까지 보관, 넘치면 오래 안 쓴 항목부터 삭제
+      (쓰기마다 정리하지 않고, 상한을 ``EVICT_SLACK`` 만큼 넘었을 때 한꺼번에 정리)
+    - 값은 JSON으로 직렬화할 수 있어야 한다.
+    """
+
+    def __init__(self, namespace: str, ttl: float, maxsize: int = 512,
+                 disk_maxsize: int = 10000, persist: bool = True):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.disk_maxsize = disk_maxsize
+        self._lock = threading.Lock()
+        self._mem: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disk_rows = 0    # 디스크 항목 수 (덮어쓰기도 1로 세므로 실제보다 많을 수 있다)
+        if persist:
+            try:
+                self._conn = open_db()
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS kv_cache ("
+                    " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+                    " expires_at REAL NOT NULL, accessed_at REAL NOT NULL,"
+                    " PRIMARY KEY (namespace, key))"
+                )
+                self._conn.commit()
+                self._disk_rows = self._conn.execute(
+                    "SELECT COUNT(*) FROM kv_cache WHERE namespace = ?", (namespace,)
+                ).fetchone()[0]
+            except sqlite3.Error:
+                # 디스크를 쓸 수 없는 환경이면 메모리 캐시로만 동작
+                self._conn = None
+
+    # ── 조회 ──────────────────────────────
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._get(key)
+        metrics.inc("cache_lookups_total", cache=self.namespace, result="miss" if value is _MISSING else "hit")
+        return default if value is _MISSING else value
+
+    def _get(self, key: str) -> Any:
+        now = time.time()
+        with self._lock:
+            item = self._mem.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at > now:
+                    self._mem.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return value
+                del self._mem[key]
+                self._stats["expired"] += 1
+
+            value = self._disk_get(key, now)
+            if value is not _MISSING:
+                self._stats["disk_hits"] += 1
+                return value
+
+            self._stats["misses"] += 1
+            return _MISSING
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._mem_put(key, expires_at, value)
+            self._disk_put(key, value, expires_at)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM kv_cache WHERE namespace = ?", (self.namespace,))
+                self._conn.commit()
+                self._disk_rows = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            s = dict(self._stats)
+            s["size"] = len(self._mem)
+        lookups = s["hits"] + s["disk_hits"] + s["misses"]
+        s["hit_rate"] = (s["hits"] + s["disk_hits"]) / lookups if lookups else 0.0
+        return s
+
+    # ── 내부 구현 (잠금을 잡은 상태에서 호출) ──────────────
+    def _mem_put(self, key: str, expires_at: float, value: Any) -> None:
+        self._mem[key] = (expires_at, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.maxsize:
+            self._mem.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _disk_get(self, key: str, now: float) -> Any:
+        if self._conn is None:
+            return _MISSING
+        try:
+            row = self._conn.execute(
+                "SELECT value, expires_at, accessed_at FROM kv_cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is None:
+                return _MISSING
+            raw, expires_at, accessed_at = row
+            if expires_at <= now:
+                self._conn.execute("DELETE FROM kv_cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+                self._conn.commit()
+                self._disk_rows -= 1
+                self._stats["expired"] += 1
+                return _MISSING
+            # 사용 시각은 LRU 정리 순서에만 쓰이므로 대략이면 충분하다 → 가끔만 쓴다
+            if now - accessed_at > self.ttl * TOUCH_FRACTION:
+                self._conn.execute(
+                    "UPDATE kv_cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                    (now, self.namespace, key),
+                )
+                self._conn.commit()
+            value = json.loads(raw)
+        except (sqlite3.Error, ValueError):
+            return _MISSING
+        self._mem_put(key, expires_at, value)
+        return value
+
+    def _disk_put(self, key: str, value: Any, expires_at: float) -> None:
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO kv_cache (namespace, key, value, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(value, ensure_ascii=False), expires_at, time.time()),
+            )
+            self._conn.commit()
+            self._disk_rows += 1
+            if self._disk_rows > self.disk_maxsize * (1 + EVICT_SLACK):
+                self._disk_evict()
+        except (sqlite3.Error, TypeError, ValueError):
+            pass
+
+    def _disk_evict(self) -> None:
+        """디스크 용량 제한: 만료된 항목과 오래 안 쓴 항목부터 정리해 상한까지 줄인다."""
+        self._conn.execute("DELETE FROM kv_cache WHERE namespace = ? AND expires_at <= ?",
+                           (self.namespace, time.time()))
+        self._conn.execute(
+            "DELETE FROM kv_cache WHERE namespace = ? AND key NOT IN ("
+            " SELECT key FROM kv_cache WHERE namespace = ? ORDER BY accessed_at DESC LIMIT ?)",
+            (self.namespace, self.namespace, self.disk_maxsize),
+        )
+        self._conn.commit()
+        self._disk_rows = self._conn.execute(
+            "SELECT COUNT(*) FROM kv_cache WHERE namespace = ?", (self.namespace,)
+        ).fetchone()[0]
+
+
+# ─────────────────────────────────────────
+# 이름별 캐시 레지스트리 (프로세스 전역)
+# ─────────────────────────────────────────
+_registry: Dict[str, TTLCache] = {}
+_registry_lock = threading.Lock()
+
+
+def get_cache(namespace: str, ttl: float, maxsize: int = 512, disk_maxsize: int = 10000) -> TTLCache:
+    """같은 이름이면 항상 같은 캐시 인스턴스를 돌려준다."""
+    with _registry_lock:
+        cache = _registry.get(namespace)
+        if cache is None:
+            cache = TTLCache(namespace, ttl=ttl, maxsize=maxsize, disk_maxsize=disk_maxsize)
+            _registry[namespace] = cache
+        return cache
+
+
+def all_stats() -> Dict[str, Dict[str, Any]]:
+    with _registry_lock:
+        caches = list(_registry.values())
+    return {c.namespace: c.stats() for c in caches}
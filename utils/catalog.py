@@ -0,0 +1,236 @@
+"""로컬 박물관 카탈로그 + 격자(grid) 공간 인덱스.
+
+Kakao 검색 결과를 쌓아 두었다가, 이미 검색했던 원 안쪽을 다시 묻는 경우
+(예: 반경만 줄인 재검색)에는 네트워크 없이 바로 답한다. Kakao가 느리거나
+할당량이 초과됐을 때의 대체 결과로도 쓴다.
+
+CSV 가져오기:
+    python -m utils.catalog import museums.csv
+    (열: id, name, address, lat, lon, url — id가 없으면 이름과 좌표로 만든다)
+"""
+
+import csv
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from utils.cache import open_db
+
+EARTH_RADIUS_M = 6371008.8
+CELL_DEG = 0.05          # 격자 한 칸 ≈ 5.5km (위도 기준)
+KAKAO_MAX_RESULTS = 45   # 이보다 적게 왔으면 그 반경은 '전부 받은 것'으로 본다
+COVERAGE_TTL = 7 * 24 * 3600
+
+
+def haversine_m(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """기준점 하나와 여러 지점 사이의 거리(m)를 한 번에 계산한다."""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _cell(lat: float, lon: float):
+    return int(np.floor(lat / CELL_DEG)), int(np.floor(lon / CELL_DEG))
+
+
+def _create_tables(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS museum_catalog ("
+        " id TEXT PRIMARY KEY, name TEXT, address TEXT, lat REAL NOT NULL, lon REAL NOT NULL,"
+        " url TEXT, updated_at REAL NOT NULL)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS museum_coverage ("
+        " lat REAL NOT NULL, lon REAL NOT NULL, radius_m REAL NOT NULL, created_at REAL NOT NULL)"
+    )
+    conn.commit()
+
+
+class MuseumCatalog:
+    """DB는 처음 한 번만 읽고, 그 뒤로는 추가된 행만 메모리 인덱스에 반영한다."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        try:
+            self._conn = open_db()
+            _create_tables(self._conn)
+        except (sqlite3.Error, OSError):
+            # 디스크를 쓸 수 없거나 잠겨 있으면 메모리 카탈로그로만 동작 (재시작하면 비어 있음)
+            self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+            _create_tables(self._conn)
+        self._rows: List[Dict] = []
+        self._pos: Dict[str, int] = {}       # id → self._rows 위치
+        self._lats = np.empty(0)
+        self._lons = np.empty(0)
+        self._grid: Dict[tuple, np.ndarray] = {}
+        self._coverage = np.empty((0, 4))
+        self._load()
+
+    # ── 쓰기 ──────────────────────────────
+    def add_many(self, museums: List[Dict]) -> int:
+        now = time.time()
+        rows = []
+        for m in museums:
+            if m.get("lat") is None or m.get("lon") is None:
+                continue
+            pid = m.get("id") or f"{m.get('name')}@{float(m['lat']):.5f},{float(m['lon']):.5f}"
+            rows.append((str(pid), m.get("name"), m.get("address"), float(m["lat"]), float(m["lon"]), m.get("url"), now))
+        if not rows:
+            return 0
+        with self._lock:
+            try:
+                self._conn.executemany("INSERT OR REPLACE INTO museum_catalog VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                self._conn.commit()
+            except sqlite3.Error:
+                pass    # 저장은 못 해도 이번 프로세스의 메모리 인덱스에는 반영한다
+            self._index_rows(rows)
+        return len(rows)
+
+    def record_coverage(self, lat: float, lon: float, radius_m: float) -> None:
+        """이 원 안의 박물관은 카탈로그에 빠짐없이 들어 있다고 기록한다."""
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute("INSERT INTO museum_coverage VALUES (?, ?, ?, ?)", (lat, lon, float(radius_m), now))
+                self._conn.execute("DELETE FROM museum_coverage WHERE created_at < ?", (now - COVERAGE_TTL,))
+                self._conn.commit()
+            except sqlite3.Error:
+                pass
+            cov = self._coverage[self._coverage[:, 3] >= now - COVERAGE_TTL]
+            self._coverage = np.vstack([cov, [[lat, lon, float(radius_m), now]]])
+
+    def import_csv(self, path: str) -> int:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            museums = [
+                {"id": row.get("id") or None, "name": row.get("name"), "address": row.get("address"),
+                 "lat": float(row["lat"]), "lon": float(row["lon"]), "url": row.get("url")}
+                for row in csv.DictReader(f)
+            ]
+        return self.add_many(museums)
+
+    # ── 읽기 ──────────────────────────────
+    def covers(self, lat: float, lon: float, radius_m: float) -> bool:
+        """요청한 원이 예전에 '전부 받은' 원 안에 완전히 들어가면 True."""
+        with self._lock:
+            cov = self._coverage
+        cov = cov[cov[:, 3] >= time.time() - COVERAGE_TTL]
+        if not len(cov):
+            return False
+        d = haversine_m(lat, lon, cov[:, 0], cov[:, 1])
+        return bool(np.any(d + radius_m <= cov[:, 2] + 1.0))
+
+    def query(self, lat: float, lon: float, radius_m: float, limit: Optional[int] = None) -> List[Dict]:
+        """반경 안의 박물관을 가까운 순으로 돌려준다. (검색 결과와 같은 dict 형식)"""
+        with self._lock:
+            rows, lats, lons, grid = self._rows, self._lats, self._lons, self._grid
+        if not rows:
+            return []
+
+        # 반경을 덮는 격자 칸들만 후보로 모은다
+        dlat = radius_m / 111_320.0
+        dlon = radius_m / (111_320.0 * max(np.cos(np.radians(lat)), 1e-6))
+        (r0, c0), (r1, c1) = _cell(lat - dlat, lon - dlon), _cell(lat + dlat, lon + dlon)
+        parts = [grid[(r, c)] for r in range(r0, r1 + 1) for c in range(c0, c1 + 1) if (r, c) in grid]
+        if not parts:
+            return []
+        idx = np.concatenate(parts)
+
+        dist = haversine_m(lat, lon, lats[idx], lons[idx])
+        mask = dist <= radius_m
+        idx, dist = idx[mask], dist[mask]
+        order = np.argsort(dist, kind="stable")
+        if limit is not None:
+            order = order[:limit]
+        return [{**rows[idx[i]], "distance": int(round(dist[i]))} for i in order]
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._rows)
+
+    # ── 내부: DB → 메모리 인덱스 ─────────────────
+    def _load(self) -> None:
+        """시작할 때 한 번만 전체를 읽는다."""
+        records = self._conn.execute("SELECT id, name, address, lat, lon, url FROM museum_catalog").fetchall()
+        self._rows = [{"id": r[0], "name": r[1], "address": r[2], "lat": r[3], "lon": r[4], "url": r[5]} for r in records]
+        self._pos = {row["id"]: i for i, row in enumerate(self._rows)}
+        self._lats = np.array([r[3] for r in records], dtype=np.float64)
+        self._lons = np.array([r[4] for r in records], dtype=np.float64)
+        cells: Dict[tuple, List[int]] = {}
+        for i, (la, lo) in enumerate(zip(self._lats, self._lons, strict=True)):
+            cells.setdefault(_cell(la, lo), []).append(i)
+        self._grid = {k: np.array(v, dtype=np.int64) for k, v in cells.items()}
+        cov = self._conn.execute("SELECT lat, lon, radius_m, created_at FROM museum_coverage").fetchall()
+        self._coverage = np.array(cov, dtype=np.float64).reshape(-1, 4)
+
+    def _index_rows(self, rows: List[tuple]) -> None:
+        """방금 저장한 행만 메모리 인덱스에 반영한다. (잠금을 잡은 상태에서 호출)
+
+        읽는 쪽이 잠금 밖에서 예전 배열을 쓰고 있을 수 있으므로, 배열·격자는 새로 만들어 바꿔 끼운다.
+        """
+        rows_list = list(self._rows)
+        lats, lons = self._lats.copy(), self._lons.copy()
+        new_lats, new_lons = [], []
+        before: Dict[int, Optional[tuple]] = {}   # 위치 → 이번 묶음 전의 칸 (새 행이면 None)
+        for pid, name, address, lat, lon, url, _ in rows:
+            row = {"id": pid, "name": name, "address": address, "lat": lat, "lon": lon, "url": url}
+            i = self._pos.get(pid)
+            if i is None:
+                i = self._pos[pid] = len(rows_list)
+                rows_list.append(row)
+                new_lats.append(lat)
+                new_lons.append(lon)
+                before[i] = None
+                continue
+            if i not in before:
+                before[i] = _cell(rows_list[i]["lat"], rows_list[i]["lon"])
+            rows_list[i] = row
+            if i < len(lats):
+                lats[i], lons[i] = lat, lon
+            else:    # 같은 묶음 안에서 앞서 추가된 id
+                new_lats[i - len(lats)], new_lons[i - len(lats)] = lat, lon
+
+        # 칸이 바뀐 행만 격자에서 옮긴다
+        removed: Dict[tuple, set] = {}
+        added: Dict[tuple, List[int]] = {}
+        for i, old_cell in before.items():
+            new_cell = _cell(rows_list[i]["lat"], rows_list[i]["lon"])
+            if old_cell == new_cell:
+                continue
+            if old_cell is not None:
+                removed.setdefault(old_cell, set()).add(i)
+            added.setdefault(new_cell, []).append(i)
+        grid = dict(self._grid)
+        for cell, gone in removed.items():
+            grid[cell] = np.array([i for i in grid[cell] if i not in gone], dtype=np.int64)
+        for cell, ids in added.items():
+            grid[cell] = np.concatenate([grid.get(cell, np.empty(0, dtype=np.int64)), np.array(ids, dtype=np.int64)])
+        self._rows = rows_list
+        self._lats = np.concatenate([lats, np.array(new_lats, dtype=np.float64)])
+        self._lons = np.concatenate([lons, np.array(new_lons, dtype=np.float64)])
+        self._grid = grid
+
+
+_catalog: Optional[MuseumCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> MuseumCatalog:
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = MuseumCatalog()
+        return _catalog
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "import":
+        n = get_catalog().import_csv(sys.argv[2])
+        print(f"✅ {n}곳을 카탈로그에 추가했습니다. (전체 {get_catalog().size()}곳)")
+    else:
+        print("사용법: python -m utils.catalog import <museums.csv>")
+        sys.exit(1)
@@ -0,0 +1,225 @@
+"""외국인 Q&A 페이지의 다국어 FAQ 묶음(bundle).
+
+원문은 ``data/faq/source.json`` 하나(영어)이고, 빌드할 때만 LLM으로 번역해
+``data/faq/bundles/<언어코드>.json`` 과 ``manifest.json`` 을 만든다. 페이지는 고른 언어의
+묶음 하나만 읽고 프로세스 안에서 재사용하므로, 질문할 때마다 번역 비용이 들지 않는다.
+
+manifest 에는 번역한 원문 문장의 해시를 남겨 둔다. 다시 빌드하면 원문이 바뀌었거나
+아직 번역되지 않은 문장만 모델에 보낸다. (번역에 실패한 문장은 원문으로 채우고 다음 빌드 때 다시 시도)
+
+    python -m utils.faq_bundles build            # 모든 언어 (바뀐 문장만 번역)
+    python -m utils.faq_bundles build ko,ja      # 일부 언어만
+    python -m utils.faq_bundles status
+
+번역에는 환경 변수 ``GOOGLE_API_KEY`` (Gemini) 또는 ``SOLAR_API_KEY`` (Solar)를 쓴다.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from utils import llm
+from utils.batch import run_bounded
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_PATH = os.environ.get("MUSEUM_FAQ_SOURCE", os.path.join(_BASE_DIR, "data", "faq", "source.json"))
+BUNDLE_DIR = os.environ.get("MUSEUM_FAQ_BUNDLES", os.path.join(_BASE_DIR, "data", "faq", "bundles"))
+
+TRANSLATE_WORKERS = 4
+STRING_KEYS = ("title", "info", "chat_title", "chat_placeholder")
+
+TRANSLATE_PROMPT = """Translate the values of the JSON object below from English into {language} for foreign visitors
+of the National Museum of Korea. Keep every key unchanged. Keep emoji, Markdown, times, and place names
+(e.g. Ichon Station, Seollal, Chuseok) accurate. Return only the JSON object.
+
+{payload}"""
+
+
+# ─────────────────────────────────────────
+# 원문 ↔ 번역 단위 (키 → 문장)
+# ─────────────────────────────────────────
+def load_source(path: str = SOURCE_PATH) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _flatten(source: Dict) -> Dict[str, str]:
+    texts = {k: source["strings"][k] for k in STRING_KEYS}
+    for item in source["qna"]:
+        texts[f"qna.{item['id']}.q"] = item["q"]
+        texts[f"qna.{item['id']}.a"] = item["a"]
+    return texts
+
+
+def _bundle(source: Dict, language: Dict, texts: Dict[str, str]) -> Dict:
+    """페이지가 그대로 쓰는 모양 (title, info, qna[{q, a}], chat_title, chat_placeholder)."""
+    bundle = {"code": language["code"], "name": language["name"]}
+    bundle.update({k: texts[k] for k in STRING_KEYS})
+    bundle["qna"] = [{"id": item["id"], "q": texts[f"qna.{item['id']}.q"], "a": texts[f"qna.{item['id']}.a"]}
+                     for item in source["qna"]]
+    return bundle
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+# ─────────────────────────────────────────
+# 빌드
+# ─────────────────────────────────────────
+def _translator() -> Optional[Tuple[str, str]]:
+    if os.environ.get("GOOGLE_API_KEY"):
+        return llm.GEMINI, os.environ["GOOGLE_API_KEY"]
+    if os.environ.get("SOLAR_API_KEY"):
+        return llm.SOLAR, os.environ["SOLAR_API_KEY"]
+    return None
+
+
+def _translate(provider: str, api_key: str, language: str, pending: Dict[str, str]) -> Dict[str, str]:
+    """키를 유지한 채 번역된 문장만 돌려준다. (빠지거나 빈 값은 버린다)"""
+    prompt = TRANSLATE_PROMPT.format(language=language, payload=json.dumps(pending, ensure_ascii=False, indent=1))
+    reply = llm.generate(provider, api_key, prompt, temperature=0.2)
+    match = re.search(r"\{.*\}", reply, re.DOTALL)
+    if not match:
+        raise ValueError("번역 결과에서 JSON을 찾지 못했습니다.")
+    translated = json.loads(match.group(0))
+    return {k: v.strip() for k, v in translated.items() if k in pending and isinstance(v, str) and v.strip()}
+
+
+def _read_json(path: str) -> Optional[Dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: str, obj: Dict) -> None:
+    # 임시 파일에 쓴 뒤 바꿔치기 (읽는 중인 프로세스가 깨지지 않게)
+    tmp = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=1)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def build_bundles(codes: Optional[List[str]] = None, source_path: str = SOURCE_PATH,
+                  bundle_dir: str = BUNDLE_DIR) -> Dict[str, Dict]:
+    """언어별 묶음을 만들거나 갱신한다. ``{언어코드: {"translated", "reused", "missing", "error"}}``"""
+    os.makedirs(bundle_dir, exist_ok=True)
+    source = load_source(source_path)
+    texts = _flatten(source)
+    hashes = {k: _hash(v) for k, v in texts.items()}
+    manifest = _read_json(os.path.join(bundle_dir, "manifest.json")) or {"languages": {}}
+    translator = _translator()
+
+    targets = [lang for lang in source["languages"] if codes is None or lang["code"] in codes]
+    jobs = []
+    report: Dict[str, Dict] = {}
+    for lang in targets:
+        code = lang["code"]
+        if code == source["source"]:
+            jobs.append((lang, dict(texts), {}, dict(hashes)))
+            continue
+        # 원문 해시가 그대로인 문장은 지난 번역을 다시 쓴다
+        old = manifest["languages"].get(code, {}).get("hashes", {})
+        old_bundle = _read_json(os.path.join(bundle_dir, f"{code}.json"))
+        old_texts = _flatten({"strings": old_bundle, "qna": old_bundle["qna"]}) if old_bundle else {}
+        done = {k: old_texts[k] for k, h in hashes.items() if old.get(k) == h and k in old_texts}
+        pending = {k: v for k, v in texts.items() if k not in done}
+        jobs.append((lang, done, pending, {k: hashes[k] for k in done}))
+
+    def translate(job):
+        lang, done, pending, _ = job
+        if not pending or translator is None:
+            return {}
+        return _translate(*translator, lang["name"], pending)
+
+    results: Dict[int, Tuple[Dict[str, str], Optional[Exception]]] = {}
+    for i, translated, error in run_bounded(jobs, translate, max_workers=TRANSLATE_WORKERS):
+        results[i] = (translated or {}, error)
+
+    for i, (lang, done, pending, kept) in enumerate(jobs):
+        code = lang["code"]
+        translated, error = results[i]
+        kept.update({k: hashes[k] for k in translated})
+        final = {**texts, **done, **translated}     # 번역 못 한 문장은 원문으로 채운다
+        missing = len(texts) - len(kept)
+        report[code] = {"translated": len(translated), "reused": len(done), "missing": missing,
+                        "error": str(error) if error else ("번역 키 없음" if pending and translator is None else "")}
+        if len(kept) == 0:
+            continue    # 번역된 문장이 하나도 없으면 묶음을 만들지 않는다 (목록에 원문만 있는 언어가 뜨지 않게)
+        _write_json(os.path.join(bundle_dir, f"{code}.json"), _bundle(source, lang, final))
+        manifest["languages"][code] = {"name": lang["name"], "missing": missing, "hashes": kept}
+
+    # 목록 순서는 원문 파일의 언어 순서를 따른다
+    order = [lang["code"] for lang in source["languages"]]
+    manifest = {"source": source["source"],
+                "languages": {c: manifest["languages"][c] for c in order if c in manifest["languages"]}}
+    _write_json(os.path.join(bundle_dir, "manifest.json"), manifest)
+    return report
+
+
+# ─────────────────────────────────────────
+# 페이지에서 읽기: 고른 언어만, 한 번 읽으면 재사용 (다시 빌드되면 새로 읽음)
+# ─────────────────────────────────────────
+_bundles: Dict[str, Tuple[float, Dict]] = {}
+_bundles_lock = threading.Lock()
+
+
+def _cached(path: str) -> Optional[Dict]:
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _bundles_lock:
+        hit = _bundles.get(path)
+        if hit is not None and hit[0] == mtime:
+            return hit[1]
+    data = _read_json(path)
+    if data is not None:
+        with _bundles_lock:
+            _bundles[path] = (mtime, data)
+    return data
+
+
+def available_languages(bundle_dir: str = BUNDLE_DIR) -> Dict[str, str]:
+    """``{언어코드: 이름}`` (빌드된 언어만). 묶음이 없으면 원문 언어 하나."""
+    manifest = _cached(os.path.join(bundle_dir, "manifest.json"))
+    if manifest and manifest["languages"]:
+        return {code: info["name"] for code, info in manifest["languages"].items()}
+    source = load_source()
+    return {lang["code"]: lang["name"] for lang in source["languages"] if lang["code"] == source["source"]}
+
+
+def load_bundle(code: str, bundle_dir: str = BUNDLE_DIR) -> Dict:
+    """고른 언어의 묶음. 없으면 원문(영어)으로 만든 묶음."""
+    bundle = _cached(os.path.join(bundle_dir, f"{code}.json"))
+    if bundle is not None:
+        return bundle
+    source = load_source()
+    language = next(lang for lang in source["languages"] if lang["code"] == source["source"])
+    return _bundle(source, language, _flatten(source))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "build":
+        codes = sys.argv[2].split(",") if len(sys.argv) > 2 else None
+        if _translator() is None:
+            print("⚠️ GOOGLE_API_KEY / SOLAR_API_KEY 가 없어 원문 언어와 이미 번역된 문장만 반영합니다.")
+        for code, r in build_bundles(codes).items():
+            note = f" · {r['error']}" if r["error"] else ""
+            print(f"{code:8s} 번역 {r['translated']:3d} · 재사용 {r['reused']:3d} · 남음 {r['missing']:3d}{note}")
+        print(f"✅ 묶음 갱신 완료 → {BUNDLE_DIR}")
+    elif len(sys.argv) >= 2 and sys.argv[1] == "status":
+        built = (_read_json(os.path.join(BUNDLE_DIR, "manifest.json")) or {"languages": {}})["languages"]
+        for lang in load_source()["languages"]:
+            state = built.get(lang["code"])
+            print(f"{lang['code']:8s} {lang['name']:18s} " + (f"남은 문장 {state['missing']}" if state else "없음"))
+    else:
+        print("사용법: python -m utils.faq_bundles build [언어코드,…] | status")
+        sys.exit(1)
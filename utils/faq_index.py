@@ -0,0 +1,91 @@
+"""자주 묻는 질문(FAQ)용 로컬 검색 인덱스.
+
+점수는 "질문 단어의 IDF 가중치 중 몇 %를 이 FAQ 항목이 설명하는가"이다.
+FAQ 질문 문장에 있는 단어는 1, 답변에만 있는 단어는 0.5로 센다.
+FAQ 어디에도 없는 단어(예: 'cafe', 'parking')는 분모에만 들어가 점수를 낮춘다.
+
+점수가 기준 이상이면 모델을 부르지 않고 준비된 답변을 그대로 쓰고,
+애매하면 상위 항목을 참고 자료로 모델에 함께 넘긴다. 점수는 비율이라 'museum' 한 단어만
+물어도 1.0이 되므로, 2등과 점수 차가 ``MIN_MARGIN`` 이상이고 맞춘 단어의 IDF 합이
+``MIN_MATCHED_WEIGHT`` 이상일 때만 확실하다고 본다.
+"""
+
+import math
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+DEFAULT_THRESHOLD = 0.7
+ANSWER_ONLY_WEIGHT = 0.5
+MIN_MARGIN = 0.2              # 1등과 2등의 점수 차가 이보다 작으면 어느 항목인지 확실하지 않다
+MIN_MATCHED_WEIGHT = 3.0      # 맞춘 단어의 IDF 합 (흔한 단어 하나만 맞으면 모자란다)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "do", "does", "did", "can", "could", "i", "you", "we",
+    "it", "its", "of", "to", "in", "on", "at", "for", "and", "or", "there", "any", "what", "when", "where",
+    "how", "which", "who", "me", "my", "your", "this", "that", "with", "by", "from", "please", "tell", "about",
+    "much", "many", "have", "has", "need", "should", "will", "would", "if", "not", "get", "go",
+}
+_SUFFIXES = ("ing", "ed", "es", "s")
+
+
+def _stem(word: str) -> str:
+    for suffix in _SUFFIXES:
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[: -len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return [_stem(w) for w in _TOKEN_RE.findall(text) if w not in _STOPWORDS]
+
+
+class FAQIndex:
+    def __init__(self, entries: Sequence[Tuple[str, str]]):
+        self.entries = list(entries)
+        self.question_terms = [set(tokenize(q)) for q, _ in self.entries]
+        self.answer_terms = [set(tokenize(a)) for _, a in self.entries]
+        df = Counter(t for q, a in zip(self.question_terms, self.answer_terms, strict=True) for t in q | a)
+        n = len(self.entries)
+        self.idf: Dict[str, float] = {t: math.log((1 + n) / (1 + c)) + 1.0 for t, c in df.items()}
+        self.unknown_idf = math.log(1 + n) + 1.0
+
+    def _weights(self, query: str) -> Dict[str, float]:
+        return {t: self.idf.get(t, self.unknown_idf) for t in set(tokenize(query))}
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[float, int]]:
+        """(0~1 점수, 항목 번호) 를 높은 순으로 최대 k개."""
+        weights = self._weights(query)
+        if not weights:
+            return []
+        total = sum(weights.values())
+        scores = []
+        for i, (q_terms, a_terms) in enumerate(zip(self.question_terms, self.answer_terms, strict=True)):
+            covered = sum(w if t in q_terms else ANSWER_ONLY_WEIGHT * w if t in a_terms else 0.0
+                          for t, w in weights.items())
+            if covered:
+                scores.append((covered / total, i))
+        scores.sort(reverse=True)
+        return scores[:k]
+
+    def confident(self, query: str, hits: List[Tuple[float, int]], threshold: float = DEFAULT_THRESHOLD) -> bool:
+        """``search`` 의 1등 항목 답변을 모델 없이 그대로 써도 되는가. (아니면 참고 자료로만 쓴다)"""
+        if not hits or hits[0][0] < threshold:
+            return False
+        if len(hits) > 1 and hits[0][0] - hits[1][0] < MIN_MARGIN:
+            return False
+        return hits[0][0] * sum(self._weights(query).values()) >= MIN_MATCHED_WEIGHT
+
+
+@lru_cache(maxsize=32)
+def get_faq_index(entries: Tuple[Tuple[str, str], ...]) -> FAQIndex:
+    """같은 FAQ 목록이면 인덱스를 한 번만 만든다."""
+    return FAQIndex(entries)
+
+
+def grounding_text(index: FAQIndex, hits: List[Tuple[float, int]]) -> str:
+    return "\n".join(f"- Q: {index.entries[i][0]}\n  A: {index.entries[i][1]}" for _, i in hits)
@@ -0,0 +1,129 @@
+"""두 LLM 제공자에 걸친 헤지(hedged) 요청 + 오류 시 넘겨받기(failover).
+
+주 제공자에 먼저 요청하고, ``hedge_after`` 초 안에 첫 조각이 오지 않으면 보조 제공자에도
+같은 요청을 보낸다. 먼저 첫 조각을 보낸 쪽이 이기고, 진 쪽의 스트림은 닫는다. 아직 아무도
+조각을 보내지 않았을 때 한쪽이 실패하면 기다리지 않고 바로 다음 제공자로 넘긴다.
+평소에는 주 제공자 하나만 부르므로, 느린 꼬리(tail)에서만 요청이 두 배가 된다.
+
+백그라운드 작업(``utils/jobs.py``) 안에서 ``stream_into`` 대신 부른다.
+
+    jobs.submit_job("qna:3", lambda job: hedged_chat(job, [(llm.SOLAR, k1), (llm.GEMINI, k2)], messages))
+"""
+
+import contextvars
+import queue
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from utils import llm, metrics
+from utils.jobs import Job
+
+DEFAULT_HEDGE_AFTER = 3.0    # 주 제공자의 첫 조각을 기다리는 시간(초)
+POLL_INTERVAL = 0.1          # 취소·헤지 시점을 확인하는 주기(초)
+
+Attempt = Tuple[str, str]    # (제공자, API 키)
+
+_CHUNK, _END, _ERROR = "chunk", "end", "error"
+
+
+class _Runner:
+    """제공자 하나의 스트림을 별도 스레드에서 읽어 공용 큐에 넣는다."""
+
+    def __init__(self, index: int, attempt: Attempt, out: "queue.Queue", messages: List[llm.Message],
+                 system: Optional[str], temperature: Optional[float]):
+        self.index = index
+        self.provider, self.api_key = attempt
+        self.stop = threading.Event()
+        self._out = out
+        self._args = (messages, system, temperature)
+        thread = threading.Thread(target=contextvars.copy_context().run, args=(self._run,),
+                                  name=f"hedge-{self.provider}", daemon=True)
+        thread.start()
+
+    def _run(self) -> None:
+        messages, system, temperature = self._args
+        stream = None
+        try:
+            stream = llm.chat(self.provider, self.api_key, messages, system=system,
+                              temperature=temperature, stream=True)
+            for part in stream:
+                if self.stop.is_set():
+                    return
+                self._out.put((self.index, _CHUNK, part))
+            self._out.put((self.index, _END, None))
+        except Exception as e:
+            if not self.stop.is_set():
+                self._out.put((self.index, _ERROR, e))
+        finally:
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+
+
+def hedged_chat(job: Job, attempts: List[Attempt], messages: List[llm.Message], system: Optional[str] = None,
+                temperature: Optional[float] = None, hedge_after: float = DEFAULT_HEDGE_AFTER) -> str:
+    """``attempts`` 순서대로 (주, 보조, …) 헤지하며 이긴 쪽의 조각을 ``job.parts`` 에 쌓는다.
+
+    모든 제공자가 첫 조각 전에 실패하면 마지막 오류를 그대로 올린다. 이긴 쪽이 도중에
+    실패하면 이미 보여 준 답변과 섞이지 않도록 넘기지 않고 오류로 끝낸다.
+    """
+    out: "queue.Queue" = queue.Queue()
+    runners: List[_Runner] = []
+    failed: List[int] = []
+    winner: Optional[_Runner] = None
+    last_error: Optional[Exception] = None
+
+    def launch(reason: str) -> None:
+        runner = _Runner(len(runners), attempts[len(runners)], out, messages, system, temperature)
+        if runners:
+            metrics.inc("llm_hedges_total", provider=runner.provider, reason=reason)
+        runners.append(runner)
+
+    def stop_all(keep: Optional[_Runner] = None) -> None:
+        for runner in runners:
+            if runner is not keep:
+                runner.stop.set()
+
+    launch("primary")
+    hedge_at = time.monotonic() + hedge_after
+    try:
+        while True:
+            if job.should_stop():
+                return job.text
+            try:
+                index, kind, value = out.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                # 주 제공자가 느리다 → 아직 아무도 이기지 않았으면 다음 제공자도 부른다
+                if winner is None and len(runners) < len(attempts) and time.monotonic() >= hedge_at:
+                    launch("slow")
+                    hedge_at = time.monotonic() + hedge_after
+                continue
+
+            runner = runners[index]
+            if winner is None and kind != _ERROR:
+                winner = runner
+                stop_all(keep=winner)
+                metrics.inc("llm_hedge_wins_total", provider=runner.provider,
+                            role="primary" if index == 0 else "secondary", hedged=str(len(runners) > 1).lower())
+            if runner is not winner:
+                if kind == _ERROR and winner is None:
+                    # 첫 조각 전의 실패 → 아직 부르지 않은 제공자가 있으면 바로 넘긴다
+                    failed.append(index)
+                    last_error = value
+                    metrics.inc("llm_hedge_failures_total", provider=runner.provider, error=type(value).__name__)
+                    if len(runners) < len(attempts):
+                        launch("error")
+                        hedge_at = time.monotonic() + hedge_after
+                    elif len(failed) == len(runners):
+                        raise last_error
+                continue
+
+            if kind == _CHUNK:
+                job.emit(value)
+            elif kind == _END:
+                return job.text
+            else:
+                raise value
+    finally:
+        stop_all()
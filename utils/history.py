@@ -0,0 +1,107 @@
+"""토큰 예산 안에서 대화 기록을 잘라 보내고, 오래된 부분은 요약으로 접는다.
+
+최근 대화는 그대로 두고, 예산을 넘긴 앞부분만 요약에 합친다(rolling summary).
+예산을 넘을 때마다 한 번에 예산의 절반까지 밀어내므로, 요약은 매 턴이
+아니라 창이 미끄러질 때만 다시 만든다. 요약 결과는 모든 세션이 공유하는
+캐시에 저장된다.
+"""
+
+import hashlib
+from typing import Callable, Dict, List, Tuple
+
+from utils.cache import get_cache
+
+Message = Dict[str, str]
+# summarize(이전 요약, 새로 접을 대화 텍스트) -> 새 요약
+Summarizer = Callable[[str, str], str]
+
+SUMMARY_CACHE = get_cache("history_summaries", ttl=24 * 3600, maxsize=1024)
+
+
+def estimate_tokens(text: str) -> int:
+    """대략적인 토큰 수. 영문은 4글자≈1토큰, 한글 등은 1글자≈1토큰으로 센다."""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def messages_tokens(msgs: List[Message]) -> int:
+    return sum(estimate_tokens(m["content"]) + 4 for m in msgs)
+
+
+def format_transcript(msgs: List[Message]) -> str:
+    return "\n".join(f"{m['role']}: {m['content']}" for m in msgs)
+
+
+def new_summary_state() -> Dict:
+    """세션마다 하나씩 보관하는 요약 상태. upto = 요약에 접힌 메시지 개수."""
+    return {"upto": 0, "text": ""}
+
+
+def _slide_to(msgs: List[Message], start: int, target_tokens: int) -> int:
+    """msgs[cut:]이 target_tokens 이하가 되는 cut을 찾는다 (사용자 메시지에서 시작)."""
+    cut = start
+    remaining = messages_tokens(msgs[cut:])
+    while cut < len(msgs) - 1 and remaining > target_tokens:
+        remaining -= estimate_tokens(msgs[cut]["content"]) + 4
+        cut += 1
+    # 최근 창이 사용자 질문으로 시작하도록 맞춘다
+    while cut < len(msgs) - 1 and msgs[cut]["role"] != "user":
+        cut += 1
+    return cut
+
+
+def fallback_summary(previous: str, transcript: str, limit: int = 1200) -> str:
+    """요약 모델 호출이 실패했을 때 쓰는 단순 발췌 요약."""
+    lines = [line[:200] for line in transcript.splitlines() if line.strip()]
+    text = "\n".join(filter(None, [previous, *lines]))
+    return text[-limit:]
+
+
+def window_history(msgs: List[Message], budget_tokens: int, state: Dict,
+                   summarize: Summarizer) -> Tuple[str, List[Message]]:
+    """(요약 텍스트, 그대로 보낼 최근 메시지) 를 돌려준다. ``state``는 제자리에서 갱신된다."""
+    if state["upto"] > len(msgs):  # 대화가 초기화된 경우
+        state.update(new_summary_state())
+
+    # 아직 요약되지 않은 부분만 한 번 꺼내 쓴다 (앞부분이 디스크에 있어도 다시 읽지 않는다)
+    tail = msgs[state["upto"]:]
+    if messages_tokens(tail) > budget_tokens:
+        cut = _slide_to(tail, 0, budget_tokens // 2)
+        if cut == 0:  # 접을 메시지가 없다 (마지막 한 턴이 예산보다 큼)
+            return state["text"], tail
+        folded = format_transcript(tail[:cut])
+        key = hashlib.sha1(f"{state['text']}\x00{folded}".encode("utf-8")).hexdigest()
+        summary = SUMMARY_CACHE.get(key)
+        if summary is None:
+            try:
+                summary = summarize(state["text"], folded).strip() or fallback_summary(state["text"], folded)
+                SUMMARY_CACHE.set(key, summary)
+            except Exception:
+                summary = fallback_summary(state["text"], folded)
+        state["text"], state["upto"] = summary, state["upto"] + cut
+        tail = tail[cut:]
+
+    return state["text"], tail
+
+
+SUMMARY_PROMPT_KO = """아래는 박물관 큐레이터 챗봇과 관람객의 이전 대화입니다.
+이어지는 대화에 필요한 사실(언급된 유물·작가·시대, 관람객의 관심사, 이미 설명한 내용)만 남겨
+10문장 이내의 한국어로 요약하세요.
+
+[기존 요약]
+{previous}
+
+[새로 추가된 대화]
+{transcript}
+"""
+
+SUMMARY_PROMPT_EN = """Below is an earlier part of a conversation between a museum visitor and an assistant.
+Summarize only the facts needed to continue the conversation (topics asked, answers given, visitor preferences)
+in at most 8 sentences, in the language the visitor used.
+
+[Previous summary]
+{previous}
+
+[New conversation]
+{transcript}
+"""
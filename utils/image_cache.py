@@ -0,0 +1,171 @@
+"""지각 해시(dHash) 기반 이미지 분석 결과 캐시.
+
+같은 유물을 조금씩 다른 각도·밝기로 찍은 사진도 dHash 값은 거의 같다.
+해밍 거리가 기준 이하인 이미지가 있으면 저장된 분석 결과를 바로 돌려준다.
+결과는 (공간, 해시)마다 한 줄씩 SQLite에 저장되고, 최대 개수를 넘으면 오래 안 쓴 것부터
+``EVICT_TO`` 비율까지 한꺼번에 지운다.
+"""
+
+import io
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from utils import metrics
+from utils.cache import open_db
+
+HASH_SIZE = 8                 # 8x8 = 64비트
+DEFAULT_MAX_DISTANCE = 6      # 64비트 중 6비트 이하 차이면 같은 사진으로 본다
+EVICT_TO = 0.9                # 상한을 넘으면 이 비율까지 줄인다 (저장할 때마다 지우지 않게)
+
+
+def dhash(data: bytes, hash_size: int = HASH_SIZE) -> int:
+    """가로로 이웃한 픽셀의 밝기 차이 부호로 만든 64비트 해시."""
+    with Image.open(io.BytesIO(data)) as img:
+        small = img.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+        pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int("".join("1" if b else "0" for b in bits), 2)
+
+
+def _to_signed(h: int) -> int:
+    # SQLite INTEGER는 부호 있는 64비트
+    return h - (1 << 64) if h >= (1 << 63) else h
+
+
+def _hamming(hashes: np.ndarray, h: int) -> np.ndarray:
+    x = np.bitwise_xor(hashes, np.uint64(h))
+    return np.unpackbits(x.view(np.uint8)).reshape(-1, 64).sum(axis=1)
+
+
+def _create_tables(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS image_analysis ("
+        " id INTEGER PRIMARY KEY AUTOINCREMENT, namespace TEXT NOT NULL, hash INTEGER NOT NULL,"
+        " analysis TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+    )
+    # 예전 버전이 쌓아 둔 중복 줄은 가장 최근 것만 남기고 (공간, 해시) 유일 인덱스로 바꾼다
+    conn.execute(
+        "DELETE FROM image_analysis WHERE id NOT IN ("
+        " SELECT MAX(id) FROM image_analysis GROUP BY namespace, hash)"
+    )
+    conn.execute("DROP INDEX IF EXISTS image_analysis_ns")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS image_analysis_key ON image_analysis (namespace, hash)")
+    conn.commit()
+
+
+class ImageAnalysisCache:
+    def __init__(self, maxsize: int = 5000):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        try:
+            self._conn = open_db()
+            _create_tables(self._conn)
+        except sqlite3.Error:
+            # 디스크를 쓸 수 없거나 잠겨 있으면 메모리 캐시로만 동작 (재시작하면 비어 있음)
+            self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+            _create_tables(self._conn)
+        self._rows = self._conn.execute("SELECT COUNT(*) FROM image_analysis").fetchone()[0]
+        self._index: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}  # namespace -> (ids, hashes)
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def lookup(self, h: int, namespace: str,
+               max_distance: int = DEFAULT_MAX_DISTANCE) -> Optional[Tuple[str, int]]:
+        """(분석 결과, 해밍 거리) 또는 None."""
+        found = self._lookup(h, namespace, max_distance)
+        metrics.inc("cache_lookups_total", cache="image_analysis", result="hit" if found else "miss")
+        return found
+
+    def _lookup(self, h: int, namespace: str, max_distance: int) -> Optional[Tuple[str, int]]:
+        with self._lock:
+            ids, hashes = self._load(namespace)
+            if not len(ids):
+                self._stats["misses"] += 1
+                return None
+            dist = _hamming(hashes, h)
+            i = int(np.argmin(dist))
+            if dist[i] > max_distance:
+                self._stats["misses"] += 1
+                return None
+            row_id = int(ids[i])
+            self._conn.execute("UPDATE image_analysis SET accessed_at = ? WHERE id = ?", (time.time(), row_id))
+            self._conn.commit()
+            row = self._conn.execute("SELECT analysis FROM image_analysis WHERE id = ?", (row_id,)).fetchone()
+            if row is None:
+                self._index.pop(namespace, None)
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            return row[0], int(dist[i])
+
+    def store(self, h: int, namespace: str, analysis: str) -> None:
+        now = time.time()
+        with self._lock:
+            # 같은 (공간, 해시)는 한 줄: 새로 넣었을 때만 id가 돌아오고, 이미 있으면 분석 결과와 사용 시각만 바꾼다
+            inserted = self._conn.execute(
+                "INSERT INTO image_analysis (namespace, hash, analysis, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(namespace, hash) DO NOTHING RETURNING id",
+                (namespace, _to_signed(h), analysis, now, now),
+            ).fetchone()
+            if inserted is None:
+                self._conn.execute(
+                    "UPDATE image_analysis SET analysis = ?, accessed_at = ? WHERE namespace = ? AND hash = ?",
+                    (analysis, now, namespace, _to_signed(h)),
+                )
+            else:
+                self._rows += 1
+                cached = self._index.get(namespace)
+                if cached is not None:
+                    ids, hashes = cached
+                    self._index[namespace] = (np.append(ids, np.int64(inserted[0])),
+                                              np.append(hashes, np.uint64(h)))
+            self._conn.commit()
+            if self._rows > self.maxsize:
+                self._evict()
+
+    def _evict(self) -> None:
+        """오래 안 쓴 것부터 ``maxsize * EVICT_TO`` 개까지 줄인다. (잠금을 잡은 상태에서 호출)"""
+        cur = self._conn.execute(
+            "DELETE FROM image_analysis WHERE id NOT IN ("
+            " SELECT id FROM image_analysis ORDER BY accessed_at DESC LIMIT ?)",
+            (int(self.maxsize * EVICT_TO),),
+        )
+        self._conn.commit()
+        self._stats["evictions"] += max(cur.rowcount, 0)
+        self._rows = self._conn.execute("SELECT COUNT(*) FROM image_analysis").fetchone()[0]
+        self._index.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            s = dict(self._stats)
+            s["size"] = self._rows
+        lookups = s["hits"] + s["misses"]
+        s["hit_rate"] = s["hits"] / lookups if lookups else 0.0
+        return s
+
+    def _load(self, namespace: str) -> Tuple[np.ndarray, np.ndarray]:
+        cached = self._index.get(namespace)
+        if cached is None:
+            rows = self._conn.execute(
+                "SELECT id, hash FROM image_analysis WHERE namespace = ?", (namespace,)
+            ).fetchall()
+            ids = np.array([r[0] for r in rows], dtype=np.int64)
+            hashes = np.array([r[1] for r in rows], dtype=np.int64).view(np.uint64)
+            cached = self._index[namespace] = (ids, hashes)
+        return cached
+
+
+_cache: Optional[ImageAnalysisCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> ImageAnalysisCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ImageAnalysisCache()
+        return _cache
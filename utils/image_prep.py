@@ -0,0 +1,73 @@
+"""업로드 이미지 전처리: 모델 전송용 축소본 + 화면 표시용 미리보기.
+
+휴대폰 사진은 수 MB, 4000px 이상이지만 유물 설명에는 그만한 해상도가 필요 없다.
+EXIF 회전을 반영한 뒤 긴 변을 줄이고, 메타데이터 없이 JPEG로 다시 인코딩한다.
+"""
+
+import io
+import logging
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_EDGE = 1536
+DEFAULT_QUALITY = 85
+PREVIEW_EDGE = 720
+
+
+@dataclass
+class PreparedImage:
+    data: bytes            # 모델에 보낼 이미지 (재인코딩)
+    mime_type: str
+    size: Tuple[int, int]
+    preview: bytes         # 화면 표시용 작은 이미지
+    original_bytes: int
+    original_size: Tuple[int, int]
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_bytes - len(self.data)
+
+    def as_part(self) -> Dict:
+        """Gemini ``generate_content`` 에 그대로 넣을 수 있는 blob."""
+        return {"mime_type": self.mime_type, "data": self.data}
+
+
+def _encode(img: Image.Image, max_edge: int, quality: int) -> bytes:
+    img = img.copy()
+    img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+    buf = io.BytesIO()
+    # exif 등 메타데이터를 넘기지 않으므로 저장 결과에는 포함되지 않는다
+    img.save(buf, format="JPEG", quality=quality, optimize=True, progressive=True)
+    return buf.getvalue()
+
+
+def prepare_image(raw: bytes, max_edge: int = DEFAULT_MAX_EDGE, quality: int = DEFAULT_QUALITY,
+                  preview_edge: int = PREVIEW_EDGE) -> PreparedImage:
+    with Image.open(io.BytesIO(raw)) as src:
+        original_size = src.size
+        img = ImageOps.exif_transpose(src)
+        if img.mode in ("RGBA", "LA", "P"):
+            img = img.convert("RGBA")
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            background.paste(img, mask=img.getchannel("A"))
+            img = background
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+
+        data = _encode(img, max_edge, quality)
+        preview = _encode(img, min(preview_edge, max_edge), 80)
+        size = Image.open(io.BytesIO(data)).size
+
+    prepared = PreparedImage(
+        data=data, mime_type="image/jpeg", size=size, preview=preview,
+        original_bytes=len(raw), original_size=original_size,
+    )
+    logger.info(
+        "image prepared: %dx%d %d bytes -> %dx%d %d bytes (saved %d bytes)",
+        *original_size, len(raw), *size, len(data), prepared.saved_bytes,
+    )
+    return prepared
@@ -0,0 +1,251 @@
+"""LLM 호출을 스크립트 스레드 밖에서 돌리는 백그라운드 작업 실행기.
+
+Streamlit 은 사용자가 다시 입력하거나 다른 페이지로 가면 스크립트를 중단하고 새로 실행한다.
+모델 호출을 스크립트 안에서 하면 그때까지 받은 (돈을 낸) 결과가 버려진다. 여기서는 작업을
+(세션, 요청) 키로 프로세스 공용 풀에 맡기고, 페이지는 ``poll_job`` 조각(fragment)으로 진행 상황을
+주기적으로 그린다. 끝난 결과는 페이지가 가져갈 때까지 남아 있어 재실행해도 다시 만들지 않는다.
+요청 id 는 요청 내용에서 정한다(예: 대화 속 질문의 위치). 그래서 재실행 중에 같은 요청을 다시 내도
+새로 호출하지 않고 진행 중인 작업을 그대로 받는다.
+
+    st.session_state.curator_job = {"id": "curator:3", ...}
+    job = submit_job("curator:3", lambda job: stream_into(job, lambda: llm.chat(..., stream=True)))
+    poll_job(job, render=lambda job: st.markdown(job.text))
+    ...
+    pending = consume_finished("curator_job", on_done=finish_answer)   # 다음 실행 맨 위에서
+"""
+
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import streamlit as st
+
+from utils import metrics
+from utils.session_store import current_session_id
+
+JOB_WORKERS = int(os.environ.get("MUSEUM_JOB_WORKERS", "16"))
+DEFAULT_TIMEOUT = 180.0      # 작업 하나의 최대 실행 시간(초)
+KEEP_SECONDS = 1800.0        # 끝난 작업을 가져가지 않을 때 보관하는 시간(초)
+POLL_INTERVAL = 0.3          # 화면 갱신 주기(초)
+
+PENDING, RUNNING, DONE, ERROR, CANCELLED, TIMEOUT = "pending", "running", "done", "error", "cancelled", "timeout"
+FINISHED = (DONE, ERROR, CANCELLED, TIMEOUT)
+
+JobKey = Tuple[str, str]
+
+
+class Job:
+    """작업 하나의 상태. 작업 함수는 ``emit`` 으로 중간 결과를 쌓고 ``should_stop`` 을 확인한다."""
+
+    def __init__(self, key: JobKey, kind: str, timeout: float):
+        self.key = key
+        self.kind = kind
+        self.timeout = timeout
+        self.status = PENDING
+        self.parts: List[Any] = []       # 스트리밍 텍스트 조각 또는 진행 결과
+        self.result: Any = None
+        self.error: Optional[Exception] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        self._check_deadline()
+        return self.status in FINISHED
+
+    @property
+    def text(self) -> str:
+        return "".join(p for p in self.parts if isinstance(p, str))
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.time()) - (self.started_at or self.created_at)
+
+    def emit(self, part: Any) -> None:
+        self.parts.append(part)
+
+    def should_stop(self) -> bool:
+        """취소됐거나 시간이 다 됐으면 True. 작업 함수가 조각 사이마다 확인한다."""
+        self._check_deadline()
+        return self._cancel.is_set()
+
+    def cancel(self) -> None:
+        """바로 '중단됨'으로 끝낸다. 작업 함수는 다음 ``should_stop`` 확인 때 멈춘다."""
+        self._cancel.set()
+        with self._lock:
+            self._finish(CANCELLED)
+
+    def _check_deadline(self) -> None:
+        # 시간은 맡긴 순간부터 잰다: 풀이 꽉 차 기다리는 작업도, 응답을 기다리며 멈춰 있는 호출도
+        # 시간이 지나면 실패로 본다 (늦게 온 결과는 버리고, 아직 시작 안 한 작업은 시작하지 않는다)
+        with self._lock:
+            if self.status in (PENDING, RUNNING) and time.time() - self.created_at > self.timeout:
+                self._cancel.set()
+                self._finish(TIMEOUT)
+
+    def _finish(self, status: str) -> None:
+        """잠금을 잡은 상태에서 호출. 처음 한 번만 반영된다."""
+        if self.status in FINISHED:
+            return
+        self.status = status
+        self.finished_at = time.time()
+        metrics.inc("jobs_total", kind=self.kind, status=status)
+        metrics.observe("job_seconds", self.elapsed, kind=self.kind, status=status)
+
+
+class JobExecutor:
+    """모든 세션이 함께 쓰는 작업 풀. (프로세스에 하나, ``get_job_executor()``)"""
+
+    def __init__(self, max_workers: int = JOB_WORKERS, keep_seconds: float = KEEP_SECONDS):
+        self.keep_seconds = keep_seconds
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs: Dict[JobKey, Job] = {}
+
+    def submit(self, session_id: str, request_id: str, fn: Callable[[Job], Any],
+               timeout: float = DEFAULT_TIMEOUT, kind: str = "llm") -> Job:
+        """같은 키의 작업이 진행 중이거나 성공했으면 그 작업을 그대로 돌려준다 (다시 만들지 않음)."""
+        self._purge()
+        key = (session_id, request_id)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status not in (ERROR, CANCELLED, TIMEOUT):
+                return job
+            job = self._jobs[key] = Job(key, kind, timeout)
+        # 지표의 페이지 라벨 등 contextvars 를 작업 스레드로 넘긴다
+        self._pool.submit(contextvars.copy_context().run, self._run, job, fn)
+        return job
+
+    def get(self, session_id: str, request_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get((session_id, request_id))
+
+    def cancel(self, session_id: str, request_id: str) -> bool:
+        job = self.get(session_id, request_id)
+        if job is None or job.done:
+            return False
+        job.cancel()
+        return True
+
+    def forget(self, session_id: str, request_id: str) -> None:
+        """페이지가 결과를 세션에 옮긴 뒤 부른다. 끝나지 않은 작업이면 취소한다."""
+        with self._lock:
+            job = self._jobs.pop((session_id, request_id), None)
+        if job is not None and not job.done:
+            job.cancel()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        s = {status: 0 for status in (PENDING, RUNNING, *FINISHED)}
+        for job in jobs:
+            job._check_deadline()
+            s[job.status] += 1
+        s["workers"] = self._pool._max_workers
+        return s
+
+    def _run(self, job: Job, fn: Callable[[Job], Any]) -> None:
+        with job._lock:
+            if job.status != PENDING:    # 시작 전에 취소됨
+                return
+            job.status, job.started_at = RUNNING, time.time()
+        try:
+            result = fn(job)
+        except Exception as e:
+            with job._lock:
+                job.error = e
+                job._finish(ERROR)
+            return
+        with job._lock:
+            job.result = result
+            job._finish(CANCELLED if job._cancel.is_set() else DONE)
+
+    def _purge(self) -> None:
+        """가져가지 않은 채 오래된 작업을 지운다."""
+        cutoff = time.time() - self.keep_seconds
+        with self._lock:
+            stale = [k for k, job in self._jobs.items() if job.status in FINISHED and job.finished_at < cutoff]
+            for key in stale:
+                del self._jobs[key]
+
+
+_executor: Optional[JobExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_job_executor() -> JobExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = JobExecutor()
+        return _executor
+
+
+# ─────────────────────────────────────────
+# 페이지에서 쓰는 짧은 이름 (지금 세션 기준)
+# ─────────────────────────────────────────
+def submit_job(request_id: str, fn: Callable[[Job], Any], timeout: float = DEFAULT_TIMEOUT,
+               kind: str = "llm") -> Job:
+    return get_job_executor().submit(current_session_id(), request_id, fn, timeout=timeout, kind=kind)
+
+
+def get_job(request_id: str) -> Optional[Job]:
+    return get_job_executor().get(current_session_id(), request_id)
+
+
+def forget_job(request_id: str) -> None:
+    get_job_executor().forget(current_session_id(), request_id)
+
+
+def consume_finished(key: str, on_done: Callable[[Job, Dict[str, Any]], None]) -> Optional[Dict[str, Any]]:
+    """세션 상태 ``key`` 에 적어 둔 작업(``{"id": 요청 id, ...}``)이 끝났으면 결과를 옮기고 지운다.
+
+    끝났으면 ``on_done(job, pending)`` 을 부르고 None, 아직 진행 중이면 그 dict 를 돌려준다.
+    (프로세스가 재시작돼 작업이 사라졌으면 조용히 지운다)
+    """
+    pending = st.session_state.setdefault(key, None)
+    if pending is None:
+        return None
+    job = get_job(pending["id"])
+    if job is not None and not job.done:
+        return pending
+    if job is not None:
+        on_done(job, pending)
+        forget_job(pending["id"])
+    st.session_state[key] = None
+    return None
+
+
+def stream_into(job: Job, open_stream: Callable[[], Iterator[str]]) -> str:
+    """텍스트 조각을 ``job.parts`` 에 쌓는다. 취소되거나 시간이 다 되면 스트림을 닫고 멈춘다."""
+    stream = open_stream()
+    try:
+        for part in stream:
+            job.emit(part)
+            if job.should_stop():
+                break
+    finally:
+        close = getattr(stream, "close", None)
+        if close:
+            close()
+    return job.text
+
+
+def poll_job(job: Job, render: Callable[[Job], None], interval: float = POLL_INTERVAL) -> None:
+    """작업이 끝날 때까지 ``interval`` 마다 ``render(job)`` 만 다시 그리고, 끝나면 앱 전체를 재실행한다.
+
+    스크립트 스레드는 기다리지 않으므로 그동안 다른 입력·페이지 이동이 막히지 않는다.
+    """
+    @st.fragment(run_every=interval)
+    def _poll() -> None:
+        render(job)
+        if job.done:
+            st.rerun()
+
+    _poll()
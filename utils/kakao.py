@@ -0,0 +1,185 @@
+"""Kakao 로컬 API 클라이언트와 박물관 검색 함수.
+
+- 키마다 하나의 ``requests.Session``을 재사용해 연결(keep-alive)을 유지한다.
+- 429/5xx 응답은 지수 백오프로 재시도한다.
+- 키워드 검색은 여러 페이지(최대 45건)를 동시에 받아 place id로 중복을 제거한다.
+- 모든 요청은 키별 속도 제한을 지키고, 똑같은 요청이 진행 중이면 그 응답을 함께 받는다.
+"""
+
+import contextvars
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils import metrics
+from utils.cache import get_cache
+from utils.catalog import KAKAO_MAX_RESULTS, get_catalog
+from utils.ratelimit import get_limiter, get_single_flight, key_label
+
+KAKAO_API_BASE = os.environ.get("KAKAO_API_BASE", "https://dapi.kakao.com")  # 벤치마크에서는 가짜 서버로 바꾼다
+PAGE_SIZE = 15      # Kakao 키워드 검색 size 최대값
+MAX_PAGES = 3       # Kakao는 page * size 기준 최대 45건까지만 돌려준다
+TIMEOUT = (3.05, 10)  # (연결, 읽기) 초
+
+# ─────────────────────────────────────────
+# Kakao 응답 캐시 (모든 세션 공유 + 디스크 영속화)
+# ─────────────────────────────────────────
+GEOCODE_CACHE = get_cache("kakao_geocode", ttl=7 * 24 * 3600, maxsize=2048)
+# 여러 페이지를 받도록 바뀌면서 예전(15건 제한) 결과와 섞이지 않게 이름을 바꿨다
+MUSEUM_CACHE = get_cache("kakao_museums_v2", ttl=24 * 3600, maxsize=1024)
+
+
+class KakaoClient:
+    """키 하나에 대응하는 연결 풀 + 재시도 설정을 가진 클라이언트."""
+
+    def __init__(self, kakao_key: str, pool_size: int = 8, max_workers: int = MAX_PAGES):
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": f"KakaoAK {kakao_key}"})
+        retry = Retry(
+            total=3,
+            backoff_factor=0.3,  # 0.3s, 0.6s, 1.2s
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kakao")
+        self._limiter = get_limiter("kakao", kakao_key)
+        self._flight = get_single_flight("kakao")
+        self._label = key_label("kakao", kakao_key)
+
+    def get(self, path: str, params: Dict) -> Dict:
+        flight_key = f"{self._label}{path}?{json.dumps(params, sort_keys=True, ensure_ascii=False)}"
+        return self._flight.do(flight_key, lambda: self._fetch(path, params))
+
+    def _fetch(self, path: str, params: Dict) -> Dict:
+        self._limiter.acquire_or_raise("Kakao")
+        with metrics.timer("kakao_request_seconds", endpoint=path):
+            r = self.session.get(f"{KAKAO_API_BASE}{path}", params=params, timeout=TIMEOUT)
+            r.raise_for_status()
+        metrics.observe("kakao_response_bytes", len(r.content), endpoint=path)
+        return r.json()
+
+    def search_keyword_all(self, params: Dict) -> List[Dict]:
+        """키워드 검색의 모든 페이지를 받아 place id 기준으로 합친다.
+
+        첫 페이지의 ``meta``로 전체 건수를 확인한 뒤, 남은 페이지는 동시에 요청한다.
+        """
+        first = self.get("/v2/local/search/keyword.json", {**params, "size": PAGE_SIZE, "page": 1})
+        docs = list(first.get("documents", []))
+        meta = first.get("meta", {})
+        if not meta.get("is_end", True):
+            total = int(meta.get("pageable_count") or 0)
+            last_page = min(MAX_PAGES, max(1, -(-total // PAGE_SIZE)))
+            futures = [
+                # 작업 스레드에서도 같은 계측 라벨(페이지)이 붙도록 컨텍스트를 넘긴다
+                self._pool.submit(contextvars.copy_context().run, self.get, "/v2/local/search/keyword.json",
+                                  {**params, "size": PAGE_SIZE, "page": page})
+                for page in range(2, last_page + 1)
+            ]
+            for f in futures:
+                docs.extend(f.result().get("documents", []))
+
+        merged, seen = [], set()
+        for d in docs:
+            pid = d.get("id") or (d.get("place_name"), d.get("x"), d.get("y"))
+            if pid in seen:
+                continue
+            seen.add(pid)
+            merged.append(d)
+        return merged
+
+
+_clients: Dict[str, KakaoClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(kakao_key: str) -> KakaoClient:
+    with _clients_lock:
+        client = _clients.get(kakao_key)
+        if client is None:
+            client = KakaoClient(kakao_key)
+            _clients[kakao_key] = client
+        return client
+
+
+# ─────────────────────────────────────────
+# 페이지에서 쓰는 검색 함수
+# ─────────────────────────────────────────
+def normalize_address(address: str) -> str:
+    # 앞뒤 공백 제거 + 연속 공백을 하나로 → 같은 주소는 같은 캐시 키
+    return " ".join((address or "").split())
+
+def museum_cache_key(lat: float, lon: float, radius_m: int) -> str:
+    # 소수점 4자리(약 10m)로 반올림해 거의 같은 좌표는 같은 키로 묶는다
+    return f"{round(lat, 4):.4f},{round(lon, 4):.4f},{int(radius_m)}"
+
+def geocode_address_kakao(address: str, kakao_key: str) -> Tuple[Optional[Tuple[float, float]], str]:
+    if not kakao_key:
+        return None, "⚠️ Kakao API 키가 설정되지 않았습니다."
+    address = normalize_address(address)
+    if not address:
+        return None, "⚠️ 주소를 입력해 주세요."
+    cached = GEOCODE_CACHE.get(address)
+    if cached is not None:
+        return (cached[0], cached[1]), "✅ 주소를 좌표로 변환했습니다."
+    try:
+        docs = get_client(kakao_key).get("/v2/local/search/address.json", {"query": address}).get("documents", [])
+        if not docs:
+            return None, "⚠️ 주소를 찾지 못했습니다."
+        lat, lon = float(docs[0]["y"]), float(docs[0]["x"])
+        GEOCODE_CACHE.set(address, [lat, lon])
+        return (lat, lon), "✅ 주소를 좌표로 변환했습니다."
+    except Exception as e:
+        return None, f"❌ 지오코딩 실패: {e}"
+
+def search_museums_around(lat: float, lon: float, kakao_key: str, radius_m: int = 5000) -> Tuple[List[Dict], str]:
+    if not kakao_key:
+        return [], "⚠️ Kakao API 키가 비어 있습니다."
+    cache_key = museum_cache_key(lat, lon, radius_m)
+    cached = MUSEUM_CACHE.get(cache_key)
+    if cached is not None:
+        return cached, f"✅ 반경 {radius_m}m 내 박물관 {len(cached)}곳을 찾았습니다."
+    catalog = get_catalog()
+    if catalog.covers(lat, lon, radius_m):
+        # 예전에 더 넓게 검색한 원 안쪽 → 네트워크 없이 로컬 카탈로그로 답한다
+        museums = catalog.query(lat, lon, radius_m)
+        if not museums:
+            return [], "⚠️ 반경 내 박물관이 없습니다. 반경을 넓혀 보세요."
+        return museums, f"✅ 반경 {radius_m}m 내 박물관 {len(museums)}곳을 찾았습니다."
+    museums = []
+    try:
+        params = {"query": "박물관", "x": lon, "y": lat, "radius": radius_m, "sort": "distance"}
+        docs = get_client(kakao_key).search_keyword_all(params)
+        for d in docs:
+            museums.append({
+                "id": d.get("id"),
+                "name": d.get("place_name"),
+                "address": d.get("road_address_name") or d.get("address_name"),
+                "distance": int(d.get("distance") or 0),
+                "lat": float(d.get("y", 0)),
+                "lon": float(d.get("x", 0)),
+                "url": d.get("place_url"),
+            })
+        museums.sort(key=lambda x: x["distance"])
+        catalog.add_many(museums)
+        if len(docs) < KAKAO_MAX_RESULTS:
+            catalog.record_coverage(lat, lon, radius_m)
+        if not museums:
+            return [], "⚠️ 반경 내 박물관이 없습니다. 반경을 넓혀 보세요."
+        MUSEUM_CACHE.set(cache_key, museums)
+        return museums, f"✅ 반경 {radius_m}m 내 박물관 {len(museums)}곳을 찾았습니다."
+    except Exception as e:
+        # Kakao가 느리거나 할당량 초과 → 저장된 카탈로그로 대신 보여준다
+        museums = catalog.query(lat, lon, radius_m)
+        if museums:
+            return museums, f"⚠️ Kakao 검색 실패({e}) — 저장된 카탈로그에서 {len(museums)}곳을 찾았습니다."
+        return [], f"❌ 장소검색 실패: {e}"
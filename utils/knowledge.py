@@ -0,0 +1,314 @@
+"""큐레이터 챗봇용 오프라인 지식 인덱스 (RAG).
+
+``data/knowledge/`` 아래의 유물 설명 자료(Markdown/CSV/JSON)를 잘게 나눠
+두 가지 인덱스로 저장한다.
+
+- 벡터 인덱스: 글자 n-gram 해싱 벡터(float16)를 ``vectors.npy``에 저장,
+  검색할 때는 메모리 매핑(mmap)으로 읽는다.
+- 어휘 인덱스: BM25용 역색인(``lexical.json``).
+
+두 결과는 순위 융합(RRF)으로 합친다. 파일 해시를 기억해 두므로, 다시 빌드하면
+바뀐 파일만 새로 나누고 벡터를 계산한다.
+
+    python -m utils.knowledge build            # data/knowledge → 인덱스 생성/갱신
+    python -m utils.knowledge search "신라 금관"
+"""
+
+import csv
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.cache import CACHE_DIR
+from utils.textvec import embed, normalize_text
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_DIR = os.environ.get("MUSEUM_KNOWLEDGE_DIR", os.path.join(_BASE_DIR, "data", "knowledge"))
+INDEX_DIR = os.environ.get("MUSEUM_KNOWLEDGE_INDEX", os.path.join(CACHE_DIR, "knowledge_index"))
+
+VECTOR_DIM = 2048
+CHUNK_CHARS = 500
+CHUNK_OVERLAP = 100
+RRF_K = 60
+MIN_DENSE_SCORE = 0.15        # 이보다 낮은 코사인 유사도는 관련 없는 자료로 본다
+BM25_K1, BM25_B = 1.5, 0.75
+SUPPORTED = (".md", ".markdown", ".txt", ".csv", ".json")
+
+
+@dataclass
+class Passage:
+    source: str
+    title: str
+    text: str
+    score: float
+
+
+# ─────────────────────────────────────────
+# 자료 읽기 + 청크 나누기
+# ─────────────────────────────────────────
+def _split_text(text: str) -> List[str]:
+    """문단 단위로 모으되 CHUNK_CHARS를 넘으면 겹치게 자른다."""
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+    chunks, current = [], ""
+    for p in paragraphs:
+        if current and len(current) + len(p) + 1 > CHUNK_CHARS:
+            chunks.append(current)
+            current = current[-CHUNK_OVERLAP:] + "\n" + p
+        else:
+            current = f"{current}\n{p}" if current else p
+        while len(current) > CHUNK_CHARS * 1.5:
+            chunks.append(current[:CHUNK_CHARS])
+            current = current[CHUNK_CHARS - CHUNK_OVERLAP:]
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _markdown_chunks(text: str, default_title: str) -> List[Tuple[str, str]]:
+    sections, title, lines = [], default_title, []
+    for line in text.splitlines():
+        m = re.match(r"^#{1,6}\s+(.*)", line)
+        if m:
+            if lines:
+                sections.append((title, "\n".join(lines)))
+            title, lines = m.group(1).strip(), []
+        else:
+            lines.append(line)
+    if lines:
+        sections.append((title, "\n".join(lines)))
+    return [(t, c) for t, body in sections for c in _split_text(body)]
+
+
+def _record_chunks(record: Dict, default_title: str) -> List[Tuple[str, str]]:
+    title = str(record.get("title") or record.get("name") or record.get("명칭") or default_title)
+    body = "\n".join(f"{k}: {v}" for k, v in record.items() if v not in (None, ""))
+    return [(title, c) for c in _split_text(body)]
+
+
+def load_chunks(path: str) -> List[Tuple[str, str]]:
+    """파일 하나 → [(제목, 본문 청크)]."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            return [c for row in csv.DictReader(f) for c in _record_chunks(row, name)]
+    if ext == ".json":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        records = data if isinstance(data, list) else [data]
+        return [c for r in records if isinstance(r, dict) for c in _record_chunks(r, name)]
+    with open(path, encoding="utf-8") as f:
+        return _markdown_chunks(f.read(), name)
+
+
+# ─────────────────────────────────────────
+# 어휘(BM25) 토큰
+# ─────────────────────────────────────────
+def lexical_tokens(text: str) -> List[str]:
+    """단어 + 단어 안의 글자 2-gram (형태소 분석기 없이 한국어 조사 차이를 흡수)."""
+    tokens = []
+    for w in normalize_text(text).split():
+        tokens.append(w)
+        if len(w) > 2:
+            tokens.extend(w[i:i + 2] for i in range(len(w) - 1))
+    return tokens
+
+
+# ─────────────────────────────────────────
+# 빌드 (증분)
+# ─────────────────────────────────────────
+def _file_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def build_index(corpus_dir: str = CORPUS_DIR, index_dir: str = INDEX_DIR) -> Dict:
+    """코퍼스 폴더를 읽어 인덱스를 만들거나, 바뀐 파일만 반영해 갱신한다."""
+    os.makedirs(index_dir, exist_ok=True)
+    old_manifest, old_chunks, old_vectors = {"files": {}}, [], None
+    if os.path.exists(os.path.join(index_dir, "manifest.json")):
+        with open(os.path.join(index_dir, "manifest.json"), encoding="utf-8") as f:
+            old_manifest = json.load(f)
+        with open(os.path.join(index_dir, "chunks.jsonl"), encoding="utf-8") as f:
+            old_chunks = [json.loads(line) for line in f]
+        old_vectors = np.load(os.path.join(index_dir, "vectors.npy"), mmap_mode="r")
+        if old_manifest.get("dim") != VECTOR_DIM:
+            old_manifest, old_chunks, old_vectors = {"files": {}}, [], None
+
+    files = []
+    for root, _, names in os.walk(corpus_dir):
+        for n in sorted(names):
+            if n.lower().endswith(SUPPORTED) and n.lower() != "readme.md":
+                files.append(os.path.join(root, n))
+
+    chunks, vector_rows, new_texts, manifest_files = [], [], [], {}
+    reused = added = 0
+    for path in sorted(files):
+        rel = os.path.relpath(path, corpus_dir)
+        digest = _file_hash(path)
+        prev = old_manifest["files"].get(rel)
+        if prev and prev["sha1"] == digest and old_vectors is not None:
+            ids = []
+            for i in prev["chunks"]:
+                ids.append(len(chunks))
+                chunks.append(old_chunks[i])
+                vector_rows.append(("old", i))
+            reused += len(ids)
+        else:
+            ids = []
+            for title, text in load_chunks(path):
+                ids.append(len(chunks))
+                chunks.append({"source": rel, "title": title, "text": text})
+                vector_rows.append(("new", len(new_texts)))
+                new_texts.append(f"{title}\n{text}")
+            added += len(ids)
+        manifest_files[rel] = {"sha1": digest, "chunks": ids}
+
+    new_vectors = embed(new_texts, dim=VECTOR_DIM).astype(np.float16)
+    vectors = np.zeros((len(chunks), VECTOR_DIM), dtype=np.float16)
+    for row, (kind, i) in enumerate(vector_rows):
+        vectors[row] = old_vectors[i] if kind == "old" else new_vectors[i]
+
+    postings: Dict[str, List[List[int]]] = defaultdict(list)
+    lengths = []
+    for cid, c in enumerate(chunks):
+        counts = Counter(lexical_tokens(f"{c['title']} {c['text']}"))
+        lengths.append(sum(counts.values()))
+        for term, tf in counts.items():
+            postings[term].append([cid, tf])
+
+    # 새 파일을 임시 이름으로 쓴 뒤 바꿔치기 (읽는 중인 프로세스가 깨지지 않게)
+    def _write(name: str, writer) -> None:
+        tmp = os.path.join(index_dir, f".{name}.tmp")
+        writer(tmp)
+        os.replace(tmp, os.path.join(index_dir, name))
+
+    def _save_vectors(p: str) -> None:
+        with open(p, "wb") as f:
+            np.save(f, vectors)
+
+    def _save_json(obj):
+        def writer(p: str) -> None:
+            with open(p, "w", encoding="utf-8") as f:
+                json.dump(obj, f, ensure_ascii=False)
+        return writer
+
+    def _save_chunks(p: str) -> None:
+        with open(p, "w", encoding="utf-8") as f:
+            for c in chunks:
+                f.write(json.dumps(c, ensure_ascii=False) + "\n")
+
+    del old_vectors
+    _write("vectors.npy", _save_vectors)
+    _write("chunks.jsonl", _save_chunks)
+    _write("lexical.json", _save_json({"postings": postings, "lengths": lengths}))
+    manifest = {"dim": VECTOR_DIM, "count": len(chunks), "built_at": time.time(), "files": manifest_files}
+    _write("manifest.json", _save_json(manifest))
+    return {"chunks": len(chunks), "reused": reused, "embedded": added, "files": len(files)}
+
+
+# ─────────────────────────────────────────
+# 검색
+# ─────────────────────────────────────────
+class KnowledgeIndex:
+    def __init__(self, index_dir: str = INDEX_DIR):
+        with open(os.path.join(index_dir, "manifest.json"), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        # 다시 빌드할 때마다 바뀐다 (이 인덱스로 만든 답변을 구분하는 데 쓴다)
+        self.version = f"{self.manifest.get('built_at', 0)!r}:{self.manifest.get('count', 0)}"
+        with open(os.path.join(index_dir, "chunks.jsonl"), encoding="utf-8") as f:
+            self.chunks = [json.loads(line) for line in f]
+        with open(os.path.join(index_dir, "lexical.json"), encoding="utf-8") as f:
+            lexical = json.load(f)
+        self.postings: Dict[str, List[List[int]]] = lexical["postings"]
+        self.lengths = np.asarray(lexical["lengths"], dtype=np.float32)
+        self.avg_len = float(self.lengths.mean()) if len(self.lengths) else 0.0
+        self.vectors = np.load(os.path.join(index_dir, "vectors.npy"), mmap_mode="r")
+
+    def _bm25(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        n = len(self.chunks)
+        for term in set(lexical_tokens(query)):
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            idf = math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            ids = np.fromiter((p[0] for p in plist), dtype=np.int64, count=len(plist))
+            tf = np.fromiter((p[1] for p in plist), dtype=np.float32, count=len(plist))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[ids] / max(self.avg_len, 1e-6))
+            scores[ids] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query: str, k: int = 4) -> List[Passage]:
+        if not self.chunks or not query.strip():
+            return []
+        dense = np.asarray(self.vectors @ embed([query], dim=VECTOR_DIM)[0].astype(np.float16), dtype=np.float32)
+        lexical = self._bm25(query)
+
+        # 순위 융합: 두 목록에서의 순위를 1/(K+rank) 로 더한다
+        depth = min(len(self.chunks), max(k * 5, 20))
+        fused: Dict[int, float] = defaultdict(float)
+        for scores, floor in ((dense, MIN_DENSE_SCORE), (lexical, 0.0)):
+            top = np.argsort(-scores)[:depth]
+            for rank, i in enumerate(top):
+                if scores[i] > floor:
+                    fused[int(i)] += 1.0 / (RRF_K + rank + 1)
+        best = sorted(fused.items(), key=lambda x: -x[1])[:k]
+        return [Passage(self.chunks[i]["source"], self.chunks[i]["title"], self.chunks[i]["text"], s) for i, s in best]
+
+
+_index: Optional[KnowledgeIndex] = None
+_index_mtime = 0.0
+_index_lock = threading.Lock()
+
+
+def get_knowledge_index(index_dir: str = INDEX_DIR) -> Optional[KnowledgeIndex]:
+    """프로세스당 한 번 읽는다. 인덱스가 다시 빌드되면(manifest 변경) 자동으로 새로 읽는다."""
+    global _index, _index_mtime
+    manifest = os.path.join(index_dir, "manifest.json")
+    try:
+        mtime = os.path.getmtime(manifest)
+    except OSError:
+        return None
+    with _index_lock:
+        if _index is None or mtime != _index_mtime:
+            _index, _index_mtime = KnowledgeIndex(index_dir), mtime
+        return _index
+
+
+def retrieve(query: str, k: int = 4) -> Tuple[List[Passage], float]:
+    """(검색된 자료, 걸린 시간 ms). 인덱스가 없으면 빈 목록."""
+    start = time.perf_counter()
+    index = get_knowledge_index()
+    passages = index.search(query, k) if index else []
+    return passages, (time.perf_counter() - start) * 1000
+
+
+def format_passages(passages: List[Passage]) -> str:
+    return "\n\n".join(f"({i}) [{p.title} — {p.source}]\n{p.text}" for i, p in enumerate(passages, start=1))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "build":
+        corpus = sys.argv[2] if len(sys.argv) > 2 else CORPUS_DIR
+        result = build_index(corpus)
+        print(f"✅ 인덱스 갱신 완료: 파일 {result['files']}개, 청크 {result['chunks']}개 "
+              f"(새로 계산 {result['embedded']}, 재사용 {result['reused']}) → {INDEX_DIR}")
+    elif len(sys.argv) >= 3 and sys.argv[1] == "search":
+        passages, ms = retrieve(" ".join(sys.argv[2:]))
+        for p in passages:
+            print(f"[{p.score:.4f}] {p.title} — {p.source}\n{p.text[:200]}\n")
+        print(f"({ms:.1f} ms)")
+    else:
+        print("사용법: python -m utils.knowledge build [코퍼스 폴더] | search <질문>")
+        sys.exit(1)
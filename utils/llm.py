@@ -0,0 +1,260 @@
+"""모든 페이지가 함께 쓰는 LLM 게이트웨이 (Gemini / Solar).
+
+클라이언트·모델 객체는 (제공자, 키, 모델, 시스템 프롬프트)마다 한 번만 만들어
+프로세스 전체에서 재사용한다. 그래서 매 재실행마다 ``genai.configure`` 나
+``OpenAI(...)`` 를 다시 만들지 않고, 연결(커넥션 풀·TLS 세션)도 계속 살아 있다.
+SDK 자체도 처음 호출할 때 읽는다 (import 만으로 1초 가까이 걸려 첫 화면이 느려진다).
+
+메시지 형식은 페이지 세션 상태와 같은 ``{"role": "user"|"assistant", "content": str}`` 이다.
+
+모든 호출은 (제공자, 키)별 속도 제한을 거치고, 지연 시간·요청 크기·토큰 사용량이
+``utils.metrics``에 기록된다. 스트리밍이 아닌 텍스트 호출은
+똑같은 요청이 이미 진행 중이면 새로 보내지 않고 그 결과를 함께 받는다.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Union
+
+from utils import metrics
+from utils.ratelimit import get_limiter, get_single_flight
+from utils.streaming import gemini_text_chunks, openai_text_chunks
+
+if TYPE_CHECKING:
+    import google.generativeai as genai
+    from openai import OpenAI
+
+GEMINI = "gemini"
+SOLAR = "solar"
+
+DEFAULT_MODELS = {
+    GEMINI: "gemini-1.5-flash",
+    SOLAR: "solar-1-mini-chat",
+}
+SOLAR_BASE_URL = os.environ.get("SOLAR_BASE_URL", "https://api.upstage.ai/v1/solar")
+REQUEST_TIMEOUT = 60.0   # 초
+MAX_RETRIES = 2
+
+Message = Dict[str, str]
+TextOrStream = Union[str, Iterator[str]]
+
+_lock = threading.Lock()
+_gemini_models: Dict[tuple, "genai.GenerativeModel"] = {}
+_openai_clients: Dict[tuple, "OpenAI"] = {}
+_gemini_configured_key: Optional[str] = None
+
+
+# ─────────────────────────────────────────
+# 클라이언트 캐시
+# ─────────────────────────────────────────
+def _configure_gemini(api_key: str) -> None:
+    # google-generativeai 는 API 키를 프로세스 전역으로 하나만 가진다.
+    # 키가 바뀔 때만 다시 설정한다.
+    import google.generativeai as genai
+
+    global _gemini_configured_key
+    if _gemini_configured_key != api_key:
+        genai.configure(api_key=api_key)
+        _gemini_configured_key = api_key
+
+
+def get_gemini_model(api_key: str, model: Optional[str] = None,
+                     system_instruction: Optional[str] = None) -> "genai.GenerativeModel":
+    model = model or DEFAULT_MODELS[GEMINI]
+    key = (api_key, model, system_instruction)
+    with _lock:
+        _configure_gemini(api_key)
+        m = _gemini_models.get(key)
+        if m is None:
+            import google.generativeai as genai
+
+            m = genai.GenerativeModel(model, system_instruction=system_instruction)
+            _gemini_models[key] = m
+        return m
+
+
+def get_openai_client(api_key: str, base_url: str = SOLAR_BASE_URL) -> "OpenAI":
+    key = (api_key, base_url)
+    with _lock:
+        client = _openai_clients.get(key)
+        if client is None:
+            from openai import OpenAI
+
+            client = OpenAI(api_key=api_key, base_url=base_url, timeout=REQUEST_TIMEOUT, max_retries=MAX_RETRIES)
+            _openai_clients[key] = client
+        return client
+
+
+# ─────────────────────────────────────────
+# 속도 제한 + 같은 요청 합치기
+# ─────────────────────────────────────────
+def _flight_key(*parts) -> Optional[str]:
+    try:
+        raw = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+    except TypeError:
+        return None  # 이미지 등 바이너리가 섞인 요청은 합치지 않는다
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _guarded(provider: str, api_key: str, flight_key: Optional[str], call, op: str, payload):
+    def limited():
+        get_limiter(provider, api_key).acquire_or_raise(provider.capitalize())
+        metrics.observe("llm_request_bytes", _payload_size(payload), provider=provider, op=op)
+        start = time.perf_counter()
+        with metrics.timer("llm_request_seconds", provider=provider, op=op):
+            result = call()
+        if isinstance(result, str):
+            metrics.observe("llm_response_chars", len(result), provider=provider, op=op)
+            return result
+        return _metered_stream(result, provider, op, start)
+    if flight_key is None:
+        return limited()
+    return get_single_flight("llm").do(flight_key, limited)
+
+
+# ─────────────────────────────────────────
+# 계측
+# ─────────────────────────────────────────
+def _payload_size(payload) -> int:
+    """요청에 실리는 대략적인 바이트 수 (텍스트 + 이미지 등 바이너리)."""
+    if isinstance(payload, str):
+        return len(payload.encode("utf-8"))
+    if isinstance(payload, (bytes, bytearray)):
+        return len(payload)
+    if isinstance(payload, dict):
+        return sum(_payload_size(v) for v in payload.values())
+    if isinstance(payload, (list, tuple)):
+        return sum(_payload_size(v) for v in payload)
+    return 0
+
+
+def _metered_stream(chunks: Iterator[str], provider: str, op: str, start: float) -> Iterator[str]:
+    # 첫 조각까지 걸린 시간과 전체 스트리밍 시간을 따로 기록한다
+    chars, first = 0, True
+    try:
+        for chunk in chunks:
+            if first:
+                metrics.observe("llm_first_token_seconds", time.perf_counter() - start, provider=provider, op=op)
+                first = False
+            chars += len(chunk)
+            yield chunk
+    except Exception as e:
+        metrics.inc("llm_request_errors_total", provider=provider, op=op, error=type(e).__name__)
+        raise
+    finally:
+        metrics.observe("llm_stream_seconds", time.perf_counter() - start, provider=provider, op=op)
+        metrics.observe("llm_response_chars", chars, provider=provider, op=op)
+        close = getattr(chunks, "close", None)
+        if close:
+            close()
+
+
+def _record_usage(provider: str, response) -> None:
+    """제공자가 알려 준 토큰 사용량을 기록한다 (없으면 건너뜀)."""
+    if provider == GEMINI:
+        usage = getattr(response, "usage_metadata", None)
+        prompt, output = getattr(usage, "prompt_token_count", None), getattr(usage, "candidates_token_count", None)
+    else:
+        usage = getattr(response, "usage", None)
+        prompt, output = getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None)
+    if isinstance(prompt, int):
+        metrics.inc("llm_tokens_total", prompt, provider=provider, kind="prompt")
+    if isinstance(output, int):
+        metrics.inc("llm_tokens_total", output, provider=provider, kind="output")
+
+
+def _gemini_stream(response) -> Iterator[str]:
+    # 스트리밍 응답의 토큰 사용량은 마지막 조각까지 받은 뒤에 알 수 있다
+    yield from gemini_text_chunks(response)
+    _record_usage(GEMINI, response)
+
+
+# ─────────────────────────────────────────
+# 공통 호출 인터페이스
+# ─────────────────────────────────────────
+def chat(provider: str, api_key: str, messages: List[Message], system: Optional[str] = None,
+         model: Optional[str] = None, temperature: Optional[float] = None,
+         stream: bool = False) -> TextOrStream:
+    """멀티턴 대화. ``messages``의 마지막 항목이 이번 사용자 질문이다.
+
+    ``stream=True``이면 텍스트 조각 iterator를, 아니면 전체 텍스트를 돌려준다.
+    """
+    model = model or DEFAULT_MODELS[provider]
+    flight_key = None if stream else _flight_key("chat", provider, api_key, model, system, temperature, messages)
+    return _guarded(provider, api_key, flight_key,
+                    lambda: _chat(provider, api_key, messages, system, model, temperature, stream),
+                    op="chat", payload=[system or "", messages])
+
+
+def _chat(provider: str, api_key: str, messages: List[Message], system: Optional[str],
+          model: str, temperature: Optional[float], stream: bool) -> TextOrStream:
+    if provider == SOLAR:
+        request = [{"role": "system", "content": system}] if system else []
+        request += [{"role": m["role"], "content": m["content"]} for m in messages]
+        kwargs = {"temperature": temperature} if temperature is not None else {}
+        response = get_openai_client(api_key).chat.completions.create(
+            model=model, messages=request, stream=stream, **kwargs
+        )
+        if stream:
+            return openai_text_chunks(response)
+        _record_usage(SOLAR, response)
+        return response.choices[0].message.content or ""
+
+    if provider == GEMINI:
+        history = [
+            {"role": "user" if m["role"] == "user" else "model", "parts": [m["content"]]}
+            for m in messages[:-1]
+        ]
+        chat_session = get_gemini_model(api_key, model, system).start_chat(history=history)
+        response = chat_session.send_message(
+            messages[-1]["content"],
+            generation_config=_gemini_config(temperature),
+            request_options={"timeout": REQUEST_TIMEOUT},
+            stream=stream,
+        )
+        if stream:
+            return _gemini_stream(response)
+        _record_usage(GEMINI, response)
+        return response.text
+
+    raise ValueError(f"알 수 없는 LLM 제공자: {provider}")
+
+
+def generate(provider: str, api_key: str, contents: Union[str, Sequence], system: Optional[str] = None,
+             model: Optional[str] = None, temperature: Optional[float] = None,
+             stream: bool = False) -> TextOrStream:
+    """단발성 생성. Gemini는 이미지 등 여러 파트를 ``contents``로 받을 수 있다."""
+    if provider == SOLAR:
+        if not isinstance(contents, str):
+            raise ValueError("Solar는 텍스트 프롬프트만 지원합니다.")
+        return chat(provider, api_key, [{"role": "user", "content": contents}], system=system,
+                    model=model, temperature=temperature, stream=stream)
+
+    if provider == GEMINI:
+        flight_key = None if stream else _flight_key("generate", provider, api_key, model, system, temperature, contents)
+        return _guarded(provider, api_key, flight_key,
+                        lambda: _generate_gemini(api_key, contents, system, model, temperature, stream),
+                        op="generate", payload=[system or "", contents])
+
+    raise ValueError(f"알 수 없는 LLM 제공자: {provider}")
+
+
+def _generate_gemini(api_key: str, contents: Union[str, Sequence], system: Optional[str],
+                     model: Optional[str], temperature: Optional[float], stream: bool) -> TextOrStream:
+    response = get_gemini_model(api_key, model, system).generate_content(
+        contents,
+        generation_config=_gemini_config(temperature),
+        request_options={"timeout": REQUEST_TIMEOUT},
+        stream=stream,
+    )
+    if stream:
+        return _gemini_stream(response)
+    _record_usage(GEMINI, response)
+    return response.text
+
+
+def _gemini_config(temperature: Optional[float]) -> Optional[Dict]:
+    return {"temperature": temperature} if temperature is not None else None
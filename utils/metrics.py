@@ -0,0 +1,182 @@
+"""프로세스 전체에서 공유하는 가벼운 계측(지연 시간·크기·토큰·오류 수).
+
+- ``observe`` : 히스토그램에 값 하나를 기록 (최근 ``WINDOW``개로 p50/p95/p99 계산)
+- ``inc``     : 카운터 증가
+- ``timer``   : ``with`` 블록의 걸린 시간(초)을 기록하고, 예외가 나면 ``<이름>_errors_total``을 올린다
+
+라벨은 키워드 인자로 붙인다. ``page`` 라벨은 ``begin_rerun``에서 정한 현재 페이지가
+자동으로 붙는다(작업 스레드로 넘길 때는 ``contextvars.copy_context()``로 전달).
+내보내기는 Prometheus 텍스트 형식과 JSONL 두 가지를 지원한다.
+"""
+
+import contextvars
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+WINDOW = 2048     # 히스토그램마다 기억하는 최근 표본 수
+QUANTILES = (0.5, 0.95, 0.99)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_current_page: contextvars.ContextVar[str] = contextvars.ContextVar("metrics_page", default="")
+_rerun_started: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("metrics_rerun", default=None)
+
+
+class Histogram:
+    def __init__(self):
+        self.samples = deque(maxlen=WINDOW)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def summary(self) -> Dict:
+        values = np.fromiter(self.samples, dtype=np.float64, count=len(self.samples))
+        s = {"count": self.count, "sum": self.total, "mean": self.total / self.count if self.count else 0.0}
+        for q in QUANTILES:
+            s[f"p{int(q * 100)}"] = float(np.quantile(values, q)) if len(values) else 0.0
+        s["max"] = float(values.max()) if len(values) else 0.0
+        return s
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self.started_at = time.time()
+
+    @staticmethod
+    def _labels(labels: Dict[str, object]) -> LabelKey:
+        page = _current_page.get()
+        if page and "page" not in labels:
+            labels = {"page": page, **labels}
+        return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, self._labels(labels))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram()
+            hist.observe(float(value))
+
+    def inc(self, name: str, amount: float = 1.0, **labels) -> None:
+        key = (name, self._labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + amount
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.inc(f"{name.rsplit('_seconds', 1)[0]}_errors_total", error=type(e).__name__, **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self) -> Dict[str, List[Dict]]:
+        with self._lock:
+            hists = [(name, labels, h.summary()) for (name, labels), h in self._histograms.items()]
+            counters = list(self._counters.items())
+        return {
+            "histograms": [{"name": name, "labels": dict(labels), **summary}
+                           for name, labels, summary in sorted(hists, key=lambda x: x[:2])],
+            "counters": [{"name": name, "labels": dict(labels), "value": value}
+                         for (name, labels), value in sorted(counters)],
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self.started_at = time.time()
+
+
+_registry = MetricsRegistry()
+observe = _registry.observe
+inc = _registry.inc
+timer = _registry.timer
+snapshot = _registry.snapshot
+reset = _registry.reset
+
+
+def uptime_seconds() -> float:
+    """수집을 시작(또는 초기화)한 뒤 지난 시간."""
+    return time.time() - _registry.started_at
+
+
+# ─────────────────────────────────────────
+# 페이지 재실행 시간
+# ─────────────────────────────────────────
+def begin_rerun(page: str) -> None:
+    """스크립트 맨 위에서 부른다. 이후 기록되는 값에 ``page`` 라벨이 붙는다."""
+    _current_page.set(page)
+    _rerun_started.set(time.perf_counter())
+
+
+def end_rerun() -> None:
+    """스크립트 맨 끝에서 부른다. 중간에 재실행으로 끊긴 실행은 기록되지 않는다."""
+    started = _rerun_started.get()
+    if started is not None:
+        observe("rerun_seconds", time.perf_counter() - started)
+        _rerun_started.set(None)
+
+
+# ─────────────────────────────────────────
+# 내보내기
+# ─────────────────────────────────────────
+def _prom_labels(labels: Dict[str, str], extra: Optional[Dict[str, str]] = None) -> str:
+    items = {**labels, **(extra or {})}
+    if not items:
+        return ""
+    escape = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n"})
+    body = ",".join(f'{k}="{str(v).translate(escape)}"' for k, v in sorted(items.items()))
+    return "{" + body + "}"
+
+
+def prometheus_text() -> str:
+    """Prometheus 텍스트 형식. 히스토그램은 최근 표본 기준 summary(분위수)로 낸다."""
+    snap = snapshot()
+    lines, typed = [], set()
+    for c in snap["counters"]:
+        name = f"museum_{c['name']}"
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{name}{_prom_labels(c['labels'])} {c['value']:g}")
+    for h in snap["histograms"]:
+        name = f"museum_{h['name']}"
+        if name not in typed:
+            lines.append(f"# TYPE {name} summary")
+            typed.add(name)
+        for q in QUANTILES:
+            lines.append(f"{name}{_prom_labels(h['labels'], {'quantile': f'{q:g}'})} {h[f'p{int(q * 100)}']:.6g}")
+        lines.append(f"{name}_sum{_prom_labels(h['labels'])} {h['sum']:.6g}")
+        lines.append(f"{name}_count{_prom_labels(h['labels'])} {h['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def jsonl() -> str:
+    """지표 하나당 한 줄의 JSON. 주기적으로 파일에 덧붙여 두면 추이를 볼 수 있다."""
+    now = time.time()
+    snap = snapshot()
+    rows = [{"ts": now, "type": "counter", **c} for c in snap["counters"]]
+    rows += [{"ts": now, "type": "histogram", **h} for h in snap["histograms"]]
+    return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows)
+
+
+def export_jsonl(path: str) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(jsonl())
@@ -0,0 +1,78 @@
+"""박물관 검색 결과 지도(folium) 생성 + 캐시.
+
+같은 (기준 좌표, 박물관 목록)이면 지도를 다시 만들지 않는다.
+마커가 많으면 MarkerCluster로 묶어 브라우저 렌더링 부담을 줄인다.
+folium 은 지도를 처음 그릴 때 읽는다 (검색 전 첫 화면에서는 필요 없음).
+"""
+
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+import streamlit as st
+
+if TYPE_CHECKING:
+    import folium
+
+CLUSTER_THRESHOLD = 20  # 박물관이 이보다 많으면 마커를 클러스터로 묶는다
+MAP_HEIGHT = 560
+
+MuseumKey = Tuple[Tuple, ...]
+
+
+def museums_key(museums: List[Dict]) -> MuseumKey:
+    """박물관 dict 목록 → 캐시 키로 쓸 수 있는 튜플."""
+    return tuple((x["name"], x["address"], x["distance"], x["lat"], x["lon"], x["url"]) for x in museums)
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def build_museum_map(lat: float, lon: float, address: str, key: MuseumKey) -> "folium.Map":
+    import folium
+    from folium.plugins import MarkerCluster
+
+    m = folium.Map(location=[lat, lon], zoom_start=14, tiles="OpenStreetMap")
+    folium.Marker([lat, lon], tooltip="기준 위치", popup=address, icon=folium.Icon(color="red")).add_to(m)
+
+    layer = MarkerCluster().add_to(m) if len(key) > CLUSTER_THRESHOLD else m
+    for i, (name, addr, distance, mlat, mlon, url) in enumerate(key, start=1):
+        popup_html = f"<b>{i}. {name}</b><br>주소: {addr}<br>거리: {distance} m<br><a href='{url}' target='_blank'>상세보기</a>"
+        folium.Marker([mlat, mlon], tooltip=f"{i}. {name}", popup=popup_html,
+                      icon=folium.Icon(color="blue", icon="info-sign")).add_to(layer)
+    return m
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def museum_map_html(lat: float, lon: float, address: str, key: MuseumKey) -> str:
+    """정적 모드용: 완성된 지도 HTML 문자열."""
+    return build_museum_map(lat, lon, address, key).get_root().render()
+
+
+# ─────────────────────────────────────────
+# 일괄 검색: 출발지 여러 곳 + 합쳐진 박물관 목록을 한 지도에
+# ─────────────────────────────────────────
+OriginKey = Tuple[Tuple[str, float, float], ...]
+
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def build_bulk_map(origins: OriginKey, key: MuseumKey) -> "folium.Map":
+    import folium
+    from folium.plugins import MarkerCluster
+
+    points = [(lat, lon) for _, lat, lon in origins] + [(x[3], x[4]) for x in key]
+    m = folium.Map(location=points[0] if points else [37.5665, 126.9780], zoom_start=11, tiles="OpenStreetMap")
+    for label, lat, lon in origins:
+        folium.Marker([lat, lon], tooltip=f"출발지: {label}", icon=folium.Icon(color="red", icon="home")).add_to(m)
+
+    layer = MarkerCluster().add_to(m) if len(key) > CLUSTER_THRESHOLD else m
+    for i, (name, addr, distance, mlat, mlon, url) in enumerate(key, start=1):
+        popup_html = f"<b>{i}. {name}</b><br>주소: {addr}<br>가장 가까운 출발지까지: {distance} m<br><a href='{url}' target='_blank'>상세보기</a>"
+        folium.Marker([mlat, mlon], tooltip=f"{i}. {name}", popup=popup_html,
+                      icon=folium.Icon(color="blue", icon="info-sign")).add_to(layer)
+    if len(points) > 1:
+        lats, lons = [p[0] for p in points], [p[1] for p in points]
+        m.fit_bounds([[min(lats), min(lons)], [max(lats), max(lons)]])
+    return m
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def bulk_map_html(origins: OriginKey, key: MuseumKey) -> str:
+    """정적 모드용: 일괄 검색 지도 HTML 문자열."""
+    return build_bulk_map(origins, key).get_root().render()
@@ -0,0 +1,192 @@
+"""제공자(+키)별 토큰 버킷 속도 제한기와 같은 요청 합치기(single-flight).
+
+여러 세션·여러 작업 스레드가 같은 API 키를 동시에 쓰더라도
+초당 요청 수가 제공자 할당량을 넘지 않도록 맞춘다.
+
+- 토큰이 없으면 실패하지 않고 줄을 서서 기다린다. 먼저 온 요청이 먼저 나간다.
+- 기다려야 할 시간이 ``max_wait``를 넘으면 기다리지 않고 바로 ``RateLimitExceeded``를 낸다.
+- 똑같은 요청이 이미 진행 중이면 새로 보내지 않고 그 결과를 함께 받는다.
+"""
+
+import hashlib
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+
+# 제공자별 기본값: (초당 요청 수, 순간 최대 허용량)
+DEFAULT_RATES: Dict[str, Tuple[float, float]] = {
+    "gemini": (1.0, 5),
+    "solar": (2.0, 5),
+    "kakao": (10.0, 20),
+}
+# 제공자별 최대 대기 시간(초): 이보다 오래 줄을 서야 하면 바로 실패로 알린다
+DEFAULT_MAX_WAIT: Dict[str, float] = {
+    "gemini": 20.0,
+    "solar": 20.0,
+    "kakao": 5.0,
+}
+WAIT_SAMPLES = 500   # 대기 시간 통계용으로 최근 몇 건을 기억할지
+
+
+class RateLimitExceeded(RuntimeError):
+    """줄이 너무 길어 ``max_wait`` 안에 차례가 오지 않을 때."""
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float, max_wait: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self._stats = {"acquired": 0, "rejected": 0, "waited": 0, "max_queue": 0}
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """토큰 하나를 얻을 때까지 기다린다. ``timeout`` 안에 못 얻으면 False.
+
+        토큰을 미리 예약(잔량이 음수가 될 수 있음)하고 그 차례까지만 자므로,
+        먼저 부른 스레드가 먼저 통과한다.
+        """
+        timeout = self.max_wait if timeout is None else timeout
+        with self._lock:
+            self._refill(time.monotonic())
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if timeout is not None and wait > timeout:
+                self._stats["rejected"] += 1
+                return False
+            self._tokens -= 1
+            self._stats["acquired"] += 1
+            self._waits.append(wait)
+            if wait > 0:
+                self._stats["waited"] += 1
+                self._waiting += 1
+                self._stats["max_queue"] = max(self._stats["max_queue"], self._waiting)
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                with self._lock:
+                    self._waiting -= 1
+        return True
+
+    def acquire_or_raise(self, what: str = "API") -> None:
+        if not self.acquire():
+            raise RateLimitExceeded(f"{what} 요청이 많아 잠시 후 다시 시도해 주세요. (대기 한도 {self.max_wait:.0f}초 초과)")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._refill(time.monotonic())
+            s = dict(self._stats)
+            s["queue_depth"] = self._waiting
+            s["tokens"] = round(self._tokens, 2)
+            waits = np.fromiter(self._waits, dtype=np.float64, count=len(self._waits))
+        s["rate"], s["burst"] = self.rate, self.burst
+        s["avg_wait_ms"] = float(waits.mean() * 1000) if len(waits) else 0.0
+        s["p95_wait_ms"] = float(np.percentile(waits, 95) * 1000) if len(waits) else 0.0
+        s["max_wait_ms"] = float(waits.max() * 1000) if len(waits) else 0.0
+        return s
+
+
+_limiters: Dict[Tuple[str, str], TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider: str, key: str = "") -> TokenBucket:
+    with _limiters_lock:
+        limiter = _limiters.get((provider, key))
+        if limiter is None:
+            rate, burst = DEFAULT_RATES.get(provider, (1.0, 1))
+            limiter = TokenBucket(rate, burst, DEFAULT_MAX_WAIT.get(provider))
+            _limiters[(provider, key)] = limiter
+        return limiter
+
+
+def key_label(provider: str, key: str) -> str:
+    # 화면·지표에 API 키를 그대로 보이지 않도록 짧은 해시만 쓴다
+    return f"{provider}:{hashlib.sha1(key.encode('utf-8')).hexdigest()[:6]}" if key else provider
+
+
+def all_limiter_stats() -> Dict[str, Dict]:
+    with _limiters_lock:
+        items = list(_limiters.items())
+    return {key_label(p, k): limiter.stats() for (p, k), limiter in items}
+
+
+# ─────────────────────────────────────────
+# Single-flight: 같은 요청이 진행 중이면 그 결과를 함께 받는다
+# ─────────────────────────────────────────
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._stats = {"calls": 0, "shared": 0}
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats["calls"] += 1
+            else:
+                call.waiters += 1
+                self._stats["shared"] += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            s = dict(self._stats)
+            s["in_flight"] = len(self._calls)
+        return s
+
+
+_flights: Dict[str, SingleFlight] = {}
+_flights_lock = threading.Lock()
+
+
+def get_single_flight(name: str) -> SingleFlight:
+    with _flights_lock:
+        flight = _flights.get(name)
+        if flight is None:
+            flight = _flights[name] = SingleFlight()
+        return flight
+
+
+def all_flight_stats() -> Dict[str, Dict]:
+    with _flights_lock:
+        items = list(_flights.items())
+    return {name: flight.stats() for name, flight in items}
@@ -0,0 +1,122 @@
+"""첫 질문(대화 맥락이 없는 질문)에 대한 서버 공용 답변 캐시.
+
+"신라 금관의 특징 알려줘" 와 "신라 금관 특징은?" 처럼 표현만 다른 질문을
+글자 n-gram 벡터의 코사인 유사도로 찾아, 저장된 답변을 바로 돌려준다.
+모델 이름과 temperature, 그리고 질문에 붙인 맥락(``context``: 참고 자료 검색 여부·개수와
+지식 인덱스 버전 등)이 다르면 서로 다른 캐시 공간을 쓴다.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from utils import metrics
+from utils.textvec import embed_normalized, normalize_text
+
+DEFAULT_THRESHOLD = 0.9
+
+
+class _Space:
+    """(모델, temperature, 맥락) 하나에 해당하는 저장 공간."""
+
+    def __init__(self):
+        self.keys = []            # 정규화된 질문 (행 순서와 같음)
+        self.answers = []
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+
+
+class SemanticAnswerCache:
+    def __init__(self, maxsize: int = 2000):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._spaces: Dict[str, _Space] = {}
+        self._lru: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._stats = {"hits": 0, "exact_hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def space_key(model: str, temperature: float, context: str = "") -> str:
+        return f"{model}@{temperature:.2f}#{context}"
+
+    def lookup(self, question: str, model: str, temperature: float, context: str = "",
+               threshold: float = DEFAULT_THRESHOLD) -> Optional[Tuple[str, float]]:
+        """(답변, 유사도) 또는 None."""
+        found = self._lookup(question, model, temperature, context, threshold)
+        metrics.inc("cache_lookups_total", cache="answers", result="hit" if found else "miss")
+        return found
+
+    def _lookup(self, question: str, model: str, temperature: float, context: str,
+                threshold: float) -> Optional[Tuple[str, float]]:
+        norm = normalize_text(question)
+        sk = self.space_key(model, temperature, context)
+        with self._lock:
+            space = self._spaces.get(sk)
+            if space is None or not space.keys or not norm:
+                self._stats["misses"] += 1
+                return None
+            if norm in space.keys:
+                i, score = space.keys.index(norm), 1.0
+                self._stats["exact_hits"] += 1
+            else:
+                scores = space.matrix @ embed_normalized([norm])[0]
+                i = int(np.argmax(scores))
+                score = float(scores[i])
+                if score < threshold:
+                    self._stats["misses"] += 1
+                    return None
+            self._stats["hits"] += 1
+            self._lru[(sk, space.keys[i])] = time.time()
+            self._lru.move_to_end((sk, space.keys[i]))
+            return space.answers[i], score
+
+    def store(self, question: str, answer: str, model: str, temperature: float, context: str = "") -> None:
+        norm = normalize_text(question)
+        if not norm or not answer:
+            return
+        sk = self.space_key(model, temperature, context)
+        vec = embed_normalized([norm])
+        with self._lock:
+            space = self._spaces.setdefault(sk, _Space())
+            if norm in space.keys:
+                space.answers[space.keys.index(norm)] = answer
+            else:
+                space.keys.append(norm)
+                space.answers.append(answer)
+                space.matrix = vec if not len(space.matrix) else np.vstack([space.matrix, vec])
+            self._lru[(sk, norm)] = time.time()
+            self._lru.move_to_end((sk, norm))
+            while len(self._lru) > self.maxsize:
+                (old_sk, old_norm), _ = self._lru.popitem(last=False)
+                self._remove(old_sk, old_norm)
+                self._stats["evictions"] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            s = dict(self._stats)
+            s["size"] = len(self._lru)
+        lookups = s["hits"] + s["misses"]
+        s["hit_rate"] = s["hits"] / lookups if lookups else 0.0
+        return s
+
+    def _remove(self, sk: str, norm: str) -> None:
+        space = self._spaces.get(sk)
+        if space is None or norm not in space.keys:
+            return
+        i = space.keys.index(norm)
+        del space.keys[i]
+        del space.answers[i]
+        space.matrix = np.delete(space.matrix, i, axis=0)
+
+
+_cache: Optional[SemanticAnswerCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SemanticAnswerCache()
+        return _cache
@@ -0,0 +1,464 @@
+"""세션별 대화 기록·분석 결과 보관소 (메모리 상한 + SQLite 넘김 + 유휴 세션 만료).
+
+``st.session_state`` 에 그대로 쌓으면 관람객이 많을수록 서버 메모리가 끝없이 늘어난다.
+여기서는 세션마다 최근 메시지만 메모리에 두고 (세션 상한), 모든 세션을 합친 양도
+전역 상한 아래로 유지한다. 상한을 넘으면 오래된 메시지·큰 결과부터 디스크로 넘기고,
+넘긴 메시지는 화면에서 "이전 대화 더 보기"를 누를 때만 다시 읽는다.
+한동안 오지 않은 세션은 메모리와 디스크 모두에서 지운다.
+
+    log = session_log("curator")          # list 처럼 len() / 인덱스 / 슬라이스 사용
+    log.append({"role": "user", "content": "..."})
+    put_blob("batch_results", rows)       # 큰 결과는 처음부터 디스크에 둔다
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from utils import metrics
+from utils.cache import open_db
+
+Message = Dict[str, Any]
+
+SESSION_DB = "sessions.sqlite3"
+SESSION_ID_KEY = "_session_store_id"
+SESSION_MEMORY_LIMIT = int(os.environ.get("MUSEUM_SESSION_MEMORY_KB", "256")) * 1024
+GLOBAL_MEMORY_LIMIT = int(os.environ.get("MUSEUM_SESSION_GLOBAL_MB", "64")) * 1024 * 1024
+IDLE_TTL = float(os.environ.get("MUSEUM_SESSION_IDLE_MIN", "60")) * 60
+KEEP_RECENT = 4                  # 상한을 넘어도 메모리에 남기는 최근 메시지 수 (직전 두 턴)
+BLOB_INLINE_LIMIT = 32 * 1024    # 이보다 큰 결과는 처음부터 디스크에 둔다
+SWEEP_INTERVAL = 60.0            # 유휴 세션 정리 주기(초)
+OBJECT_OVERHEAD = 64             # dict·문자열 객체 자체의 대략적인 크기
+
+_MISSING = object()
+
+
+def _encode(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _size(value: Any) -> int:
+    """메모리 사용량 추정치 (JSON 직렬화 길이 + 객체 오버헤드)."""
+    return len(_encode(value).encode("utf-8")) + OBJECT_OVERHEAD
+
+
+def current_session_id() -> str:
+    """지금 브라우저 세션의 id (스크립트 밖에서 부르면 ``"local"``).
+
+    세션 상태에 한 번 만들어 둔 값을 쓴다. (런타임의 session_id 는 테스트 러너에서 모두 같다)
+    """
+    if get_script_run_ctx() is None:
+        return "local"
+    sid = st.session_state.get(SESSION_ID_KEY)
+    if sid is None:
+        sid = st.session_state[SESSION_ID_KEY] = uuid.uuid4().hex
+    return sid
+
+
+class MessageLog:
+    """한 세션의 대화 기록. 앞쪽 ``spilled`` 개는 디스크에, 나머지는 메모리에 있다.
+
+    ``len()`` 과 인덱스는 디스크 부분까지 포함한 전체 기준이라 ``window_history`` 의
+    ``upto`` 같은 절대 위치를 그대로 쓸 수 있다. 슬라이스는 필요한 구간만 디스크에서 읽는다.
+    """
+
+    def __init__(self, store: "SessionStore", session_id: str, name: str):
+        self._store = store
+        self.session_id = session_id
+        self.name = name
+        self.spilled = 0
+        self.disk_bytes = 0
+        self._recent: List[Message] = []
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return self.spilled + len(self._recent)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("MessageLog 슬라이스는 step 1만 지원합니다.")
+            return self._range(start, stop)
+        with self._store._lock:
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError(index)
+            if index >= self.spilled:
+                return self._recent[index - self.spilled]
+        return self._range(index, index + 1)[0]
+
+    def view(self, stop: int) -> "LogView":
+        """앞에서 ``stop`` 개까지만 보이는 읽기 전용 창 (음수면 뒤에서 뺀다)."""
+        return LogView(self, stop if stop >= 0 else max(len(self) + stop, 0))
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._bytes
+
+    def recent(self) -> List[Message]:
+        """메모리에 남아 있는 최근 메시지."""
+        with self._store._lock:
+            return list(self._recent)
+
+    def older(self, count: int) -> List[Message]:
+        """디스크로 넘긴 메시지 중 가장 최근 ``count`` 개 (화면에 펼칠 때만 읽는다)."""
+        spilled = self.spilled
+        return self._range(max(spilled - count, 0), spilled)
+
+    def append(self, message: Message) -> None:
+        with self._store._lock:
+            self._recent.append(message)
+            self._bytes += _size(message)
+        self._store._after_write(self.session_id)
+
+    def clear(self) -> None:
+        self._store._clear_log(self)
+
+    def _range(self, start: int, stop: int) -> List[Message]:
+        with self._store._lock:
+            spilled, recent = self.spilled, list(self._recent)
+        out: List[Message] = []
+        if start < spilled:
+            out = self._store._load_messages(self, start, min(stop, spilled))
+        return out + recent[max(start - spilled, 0):max(stop - spilled, 0)]
+
+
+class LogView:
+    """``MessageLog`` 의 앞부분만 보여 주는 창. (방금 넣은 질문을 뺀 기록 등)"""
+
+    def __init__(self, log: MessageLog, stop: int):
+        self._log = log
+        self._stop = stop
+
+    def __len__(self) -> int:
+        return min(self._stop, len(self._log))
+
+    def __getitem__(self, index):
+        n = len(self)
+        if isinstance(index, slice):
+            start, stop, step = index.indices(n)
+            if step != 1:
+                raise ValueError("LogView 슬라이스는 step 1만 지원합니다.")
+            return self._log._range(start, stop)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError(index)
+        return self._log[index]
+
+
+@dataclass
+class _Blob:
+    size: int
+    value: Any = _MISSING        # _MISSING 이면 디스크에 있다
+
+
+@dataclass
+class _Session:
+    session_id: str
+    last_seen: float
+    logs: Dict[str, MessageLog] = field(default_factory=dict)
+    blobs: Dict[str, _Blob] = field(default_factory=dict)
+
+    def memory_bytes(self) -> int:
+        return (sum(log.memory_bytes for log in self.logs.values())
+                + sum(b.size for b in self.blobs.values() if b.value is not _MISSING))
+
+    def disk_bytes(self) -> int:
+        return (sum(log.disk_bytes for log in self.logs.values())
+                + sum(b.size for b in self.blobs.values() if b.value is _MISSING))
+
+
+class SessionStore:
+    """모든 세션의 대화 기록·결과를 관리한다. (프로세스에 하나, ``get_session_store()``)
+
+    디스크를 쓸 수 없는 환경이면 넘길 메시지를 그냥 버려서라도 메모리 상한을 지킨다.
+    """
+
+    def __init__(self, filename: str = SESSION_DB, session_limit: int = SESSION_MEMORY_LIMIT,
+                 global_limit: int = GLOBAL_MEMORY_LIMIT, idle_ttl: float = IDLE_TTL):
+        self.session_limit = session_limit
+        self.global_limit = global_limit
+        self.idle_ttl = idle_ttl
+        self._lock = threading.RLock()
+        self._sessions: Dict[str, _Session] = {}
+        self._last_sweep = time.time()
+        self._stats = {"spilled_messages": 0, "spilled_blobs": 0, "disk_loads": 0, "expired_sessions": 0}
+        self._conn: Optional[sqlite3.Connection] = None
+        try:
+            self._conn = open_db(filename)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_messages ("
+                " session_id TEXT NOT NULL, log TEXT NOT NULL, seq INTEGER NOT NULL,"
+                " value TEXT NOT NULL, saved_at REAL NOT NULL,"
+                " PRIMARY KEY (session_id, log, seq))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_blobs ("
+                " session_id TEXT NOT NULL, name TEXT NOT NULL,"
+                " value TEXT NOT NULL, saved_at REAL NOT NULL,"
+                " PRIMARY KEY (session_id, name))"
+            )
+            # 지난번 프로세스가 남긴 세션은 다시 이어 붙을 수 없다
+            self._purge_orphans(time.time() - idle_ttl)
+            self._conn.commit()
+        except sqlite3.Error:
+            self._conn = None
+
+    # ── 세션 단위 API ──────────────────────
+    def log(self, session_id: str, name: str) -> MessageLog:
+        """세션의 대화 기록 (없으면 빈 기록을 만든다). 부를 때마다 세션을 '활동 중'으로 표시."""
+        self._maybe_sweep()
+        with self._lock:
+            rec = self._touch(session_id)
+            log = rec.logs.get(name)
+            if log is None:
+                log = rec.logs[name] = MessageLog(self, session_id, name)
+            return log
+
+    def put_blob(self, session_id: str, name: str, value: Any) -> None:
+        """JSON으로 바꿀 수 있는 결과를 저장한다. 크면 바로 디스크로 간다."""
+        self._maybe_sweep()
+        encoded = _encode(value)
+        size = len(encoded.encode("utf-8")) + OBJECT_OVERHEAD
+        with self._lock:
+            rec = self._touch(session_id)
+            self._drop_blob(rec, name)
+            if size > BLOB_INLINE_LIMIT and self._conn is not None:
+                self._write_blob(rec, name, encoded)
+                rec.blobs[name] = _Blob(size)
+            else:
+                rec.blobs[name] = _Blob(size, value)
+        self._after_write(session_id)
+
+    def get_blob(self, session_id: str, name: str, default: Any = None) -> Any:
+        """저장한 결과. 디스크에 있으면 읽어 오기만 하고 메모리에 다시 올리지 않는다."""
+        self._maybe_sweep()
+        with self._lock:
+            rec = self._touch(session_id)
+            blob = rec.blobs.get(name)
+            if blob is None:
+                return default
+            if blob.value is not _MISSING:
+                return blob.value
+            if self._conn is None:
+                return default
+            row = self._conn.execute("SELECT value FROM session_blobs WHERE session_id = ? AND name = ?",
+                                     (session_id, name)).fetchone()
+            self._stats["disk_loads"] += 1
+        return json.loads(row[0]) if row else default
+
+    def drop_blob(self, session_id: str, name: str) -> None:
+        self._maybe_sweep()
+        with self._lock:
+            rec = self._sessions.get(session_id)
+            if rec is not None:
+                self._drop_blob(rec, name)
+                self._commit()
+
+    # ── 현황 ──────────────────────────────
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            s = dict(self._stats)
+            s["sessions"] = len(self._sessions)
+            s["memory_bytes"] = sum(rec.memory_bytes() for rec in self._sessions.values())
+            s["disk_bytes"] = sum(rec.disk_bytes() for rec in self._sessions.values())
+        s["session_limit"] = self.session_limit
+        s["global_limit"] = self.global_limit
+        return s
+
+    def session_stats(self) -> List[Dict[str, Any]]:
+        """세션별 메모리 사용량 (메모리를 많이 쓰는 순)."""
+        now = time.time()
+        with self._lock:
+            rows = [{
+                "session": rec.session_id[:8],
+                "messages_in_memory": sum(len(log._recent) for log in rec.logs.values()),
+                "messages_on_disk": sum(log.spilled for log in rec.logs.values()),
+                "blobs": len(rec.blobs),
+                "memory_kb": round(rec.memory_bytes() / 1024, 1),
+                "disk_kb": round(rec.disk_bytes() / 1024, 1),
+                "idle_s": round(now - rec.last_seen),
+            } for rec in self._sessions.values()]
+        return sorted(rows, key=lambda r: r["memory_kb"], reverse=True)
+
+    def expire_idle(self, now: Optional[float] = None) -> int:
+        """``idle_ttl`` 동안 오지 않은 세션을 메모리·디스크에서 지운다. 지운 세션 수."""
+        now = time.time() if now is None else now
+        cutoff = now - self.idle_ttl
+        with self._lock:
+            expired = [sid for sid, rec in self._sessions.items() if rec.last_seen < cutoff]
+            for sid in expired:
+                del self._sessions[sid]
+                if self._conn is not None:
+                    self._conn.execute("DELETE FROM session_messages WHERE session_id = ?", (sid,))
+                    self._conn.execute("DELETE FROM session_blobs WHERE session_id = ?", (sid,))
+            self._purge_orphans(cutoff)
+            self._commit()
+            self._stats["expired_sessions"] += len(expired)
+        if expired:
+            metrics.inc("session_expired_total", len(expired))
+        return len(expired)
+
+    # ── 내부 구현 ──────────────────────────
+    def _touch(self, session_id: str) -> _Session:
+        rec = self._sessions.get(session_id)
+        if rec is None:
+            rec = self._sessions[session_id] = _Session(session_id, time.time())
+        rec.last_seen = time.time()
+        return rec
+
+    def _maybe_sweep(self) -> None:
+        """오래 쉰 세션 정리. 세션에 닿는 모든 경로(대화 기록·결과 보관)에서 부른다."""
+        if time.time() - self._last_sweep >= SWEEP_INTERVAL:
+            self._last_sweep = time.time()
+            self.expire_idle()
+
+    def _after_write(self, session_id: str) -> None:
+        """세션 상한 → 전역 상한 순서로 넘칠 만큼만 디스크로 보낸다."""
+        with self._lock:
+            rec = self._sessions.get(session_id)
+            if rec is None:
+                return
+            excess = rec.memory_bytes() - self.session_limit
+            if excess > 0:
+                self._free(rec, excess, KEEP_RECENT)
+            total = sum(r.memory_bytes() for r in self._sessions.values())
+            if total > self.global_limit:
+                # 오래 안 온 세션부터 통째로 내린다 (지금 세션은 최근 메시지를 남긴다)
+                for other in sorted(self._sessions.values(), key=lambda r: r.last_seen):
+                    if total <= self.global_limit:
+                        break
+                    keep = KEEP_RECENT if other.session_id == session_id else 0
+                    total -= self._free(other, total - self.global_limit, keep)
+            self._commit()
+            memory = rec.memory_bytes()
+        metrics.observe("session_memory_bytes", memory)
+
+    def _free(self, rec: _Session, excess: int, keep: int) -> int:
+        """큰 결과부터, 그다음 오래된 메시지부터 디스크로 보낸다. 줄인 바이트 수."""
+        freed = 0
+        for name, blob in rec.blobs.items():
+            if freed >= excess:
+                return freed
+            if blob.value is not _MISSING:
+                if self._conn is not None:
+                    self._write_blob(rec, name, _encode(blob.value))
+                blob.value = _MISSING
+                freed += blob.size
+                self._stats["spilled_blobs"] += 1
+                metrics.inc("session_spills_total", kind="blob")
+        for log in rec.logs.values():
+            if freed >= excess:
+                break
+            freed += self._spill(rec, log, excess - freed, keep)
+        return freed
+
+    def _spill(self, rec: _Session, log: MessageLog, excess: int, keep: int) -> int:
+        count, freed = 0, 0
+        while count < len(log._recent) - keep and freed < excess:
+            freed += _size(log._recent[count])
+            count += 1
+        if not count:
+            return 0
+        moved = log._recent[:count]
+        if self._conn is not None:
+            now = time.time()
+            rows = [(rec.session_id, log.name, log.spilled + i, _encode(m), now) for i, m in enumerate(moved)]
+            self._conn.executemany("INSERT OR REPLACE INTO session_messages VALUES (?, ?, ?, ?, ?)", rows)
+            log.disk_bytes += sum(len(r[3].encode("utf-8")) for r in rows)
+        del log._recent[:count]
+        log.spilled += count
+        log._bytes -= freed
+        self._stats["spilled_messages"] += count
+        metrics.inc("session_spills_total", count, kind="message")
+        return freed
+
+    def _load_messages(self, log: MessageLog, start: int, stop: int) -> List[Message]:
+        if self._conn is None or start >= stop:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT value FROM session_messages WHERE session_id = ? AND log = ? AND seq >= ? AND seq < ?"
+                " ORDER BY seq", (log.session_id, log.name, start, stop),
+            ).fetchall()
+            self._stats["disk_loads"] += 1
+        return [json.loads(r[0]) for r in rows]
+
+    def _clear_log(self, log: MessageLog) -> None:
+        with self._lock:
+            log._recent, log._bytes, log.spilled, log.disk_bytes = [], 0, 0, 0
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM session_messages WHERE session_id = ? AND log = ?",
+                                   (log.session_id, log.name))
+                self._commit()
+
+    def _write_blob(self, rec: _Session, name: str, encoded: str) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO session_blobs VALUES (?, ?, ?, ?)",
+                           (rec.session_id, name, encoded, time.time()))
+
+    def _drop_blob(self, rec: _Session, name: str) -> None:
+        blob = rec.blobs.pop(name, None)
+        if blob is not None and blob.value is _MISSING and self._conn is not None:
+            self._conn.execute("DELETE FROM session_blobs WHERE session_id = ? AND name = ?",
+                               (rec.session_id, name))
+
+    def _purge_orphans(self, cutoff: float) -> None:
+        """메모리에 없는 세션(만료·지난 프로세스)의 오래된 행을 지운다."""
+        if self._conn is None:
+            return
+        live = list(self._sessions)
+        marks = ",".join("?" * len(live))
+        for table in ("session_messages", "session_blobs"):
+            sql = f"DELETE FROM {table} WHERE saved_at < ?"
+            if live:
+                sql += f" AND session_id NOT IN ({marks})"
+            self._conn.execute(sql, (cutoff, *live))
+
+    def _commit(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.commit()
+            except sqlite3.Error:
+                pass
+
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore()
+        return _store
+
+
+# ─────────────────────────────────────────
+# 페이지에서 쓰는 짧은 이름 (지금 세션 기준)
+# ─────────────────────────────────────────
+def session_log(name: str) -> MessageLog:
+    return get_session_store().log(current_session_id(), name)
+
+
+def put_blob(name: str, value: Any) -> None:
+    get_session_store().put_blob(current_session_id(), name, value)
+
+
+def get_blob(name: str, default: Any = None) -> Any:
+    return get_session_store().get_blob(current_session_id(), name, default)
+
+
+def drop_blob(name: str) -> None:
+    get_session_store().drop_blob(current_session_id(), name)
@@ -0,0 +1,34 @@
+"""LLM 스트리밍 응답을 텍스트 조각(generator)으로 바꾸는 도우미.
+
+조각은 백그라운드 작업(``utils/jobs.py`` 의 ``stream_into``)이 받아서 쌓는다.
+"""
+
+from typing import Iterable, Iterator
+
+
+def gemini_text_chunks(response: Iterable) -> Iterator[str]:
+    """``send_message(..., stream=True)`` / ``generate_content(..., stream=True)`` 응답."""
+    for chunk in response:
+        try:
+            text = chunk.text
+        except ValueError:
+            # 안전 필터 등으로 텍스트가 없는 조각
+            continue
+        if text:
+            yield text
+
+
+def openai_text_chunks(stream) -> Iterator[str]:
+    """OpenAI 호환 ``chat.completions.create(..., stream=True)`` 응답 (Solar)."""
+    try:
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    finally:
+        close = getattr(stream, "close", None)
+        if close:
+            close()
+
@@ -0,0 +1,75 @@
+"""외부 모델 없이 쓰는 가벼운 텍스트 벡터화 (글자 n-gram + 해싱 트릭).
+
+한국어는 띄어쓰기·조사 차이가 커서 단어 단위보다 글자 n-gram이 잘 맞는다.
+차원은 고정(해싱)이라 어휘 사전을 따로 관리할 필요가 없다.
+"""
+
+import re
+import unicodedata
+import zlib
+from typing import Iterable, List
+
+import numpy as np
+
+DIM = 4096
+NGRAM_SIZES = (2, 3)
+
+_PUNCT_RE = re.compile(r"[^\w\s]", re.UNICODE)
+# 질문 끝의 요청 표현: 의미에 영향이 없으므로 지운다
+_REQUEST_SUFFIXES = (
+    "알려주세요", "알려줘요", "알려줘", "설명해주세요", "설명해줘요", "설명해줘", "말해주세요", "말해줘",
+    "궁금해요", "궁금합니다", "무엇인가요", "뭔가요", "뭐예요", "뭐야", "인가요", "이에요", "입니다",
+)
+# 단어 끝 한 글자 조사
+_JOSA = set("은는이가을를의에와과도")
+
+
+def normalize_text(text: str) -> str:
+    """같은 뜻의 질문이 최대한 같은 문자열이 되도록 정리한다."""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = " ".join(_PUNCT_RE.sub(" ", text).split())
+    stripped = True
+    while stripped:
+        stripped = False
+        for suffix in _REQUEST_SUFFIXES:
+            if text.endswith(suffix) and len(text) > len(suffix):
+                text, stripped = text[: -len(suffix)].rstrip(), True
+                break
+    words = [w[:-1] if len(w) >= 3 and w[-1] in _JOSA else w for w in text.split()]
+    return " ".join(words)
+
+
+def char_ngrams(text: str, sizes: Iterable[int] = NGRAM_SIZES) -> List[str]:
+    grams = []
+    for word in text.split():
+        padded = f" {word} "
+        for n in sizes:
+            grams.extend(padded[i:i + n] for i in range(max(1, len(padded) - n + 1)))
+    return grams
+
+
+def hashed_counts(text: str, dim: int = DIM) -> np.ndarray:
+    """정규화된 텍스트 → 해싱된 n-gram 빈도 벡터 (로그 스케일)."""
+    vec = np.zeros(dim, dtype=np.float32)
+    for g in char_ngrams(text):
+        vec[zlib.crc32(g.encode("utf-8")) % dim] += 1.0
+    np.log1p(vec, out=vec)
+    return vec
+
+
+def l2_normalize(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=-1, keepdims=True)
+    return mat / np.maximum(norms, 1e-12)
+
+
+def embed(texts: Iterable[str], dim: int = DIM) -> np.ndarray:
+    """여러 텍스트를 (n, dim) 단위 벡터 행렬로 만든다."""
+    return embed_normalized([normalize_text(t) for t in texts], dim)
+
+
+def embed_normalized(norms: Iterable[str], dim: int = DIM) -> np.ndarray:
+    """``normalize_text`` 를 이미 거친 텍스트용 ``embed``. (정규화를 두 번 하지 않는다)"""
+    rows = [hashed_counts(t, dim) for t in norms]
+    if not rows:
+        return np.zeros((0, dim), dtype=np.float32)
+    return l2_normalize(np.vstack(rows))